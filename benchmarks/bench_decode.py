@@ -0,0 +1,97 @@
+"""Peak memory and time of prepare_image on large sources, draft vs full decode.
+
+    uv run python benchmarks/bench_decode.py [--size 4000x3000] [--repeat N]
+
+Each case runs in a fresh process, so its peak RSS is its own: the figure
+reported is the peak above that process's baseline after importing
+fichero.imaging and reading the file into memory.  Peak RSS is VmHWM on
+Linux; elsewhere ru_maxrss, which a child can inherit from this (large)
+parent process, so compare the draft and full rows rather than reading
+them as absolutes there.
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+FORMATS = ("JPEG", "PNG")
+
+_CHILD = r"""
+import io, json, resource, sys, time
+from PIL import Image
+from fichero.imaging import prepare_image
+
+
+def peak_kb():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS
+
+
+path, draft, repeat = sys.argv[1], sys.argv[2] == "1", int(sys.argv[3])
+with open(path, "rb") as f:
+    data = f.read()
+base = peak_kb()
+best = float("inf")
+for _ in range(repeat):
+    t0 = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as src:
+        prepare_image(src, max_rows=240, draft=draft)
+    best = min(best, time.perf_counter() - t0)
+print(json.dumps({"seconds": best, "peak_kb": peak_kb() - base}))
+"""
+
+
+def _photo(w: int, h: int) -> Image.Image:
+    """Deterministic photo-like RGB image: gradients plus noise."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noise = rng.normal(0, 25, (h, w, 3)).astype(np.float32)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def _run(path: str, draft: bool, repeat: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, path, "1" if draft else "0", str(repeat)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="4000x3000", help="Source size WxH (default: 12 MP)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best time is kept)")
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    img = _photo(w, h)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            path = os.path.join(tmp, f"photo.{fmt.lower()}")
+            buf = io.BytesIO()
+            img.save(buf, fmt, **({"quality": 90} if fmt == "JPEG" else {}))
+            with open(path, "wb") as f:
+                f.write(buf.getvalue())
+            full = _run(path, False, args.repeat)
+            fast = _run(path, True, args.repeat)
+            print(f"{fmt} {w}x{h} ({len(buf.getvalue()) / 1e6:.1f} MB):")
+            for name, r in (("full", full), ("draft", fast)):
+                print(f"  {name:6s} {r['seconds'] * 1000:8.1f} ms  {r['peak_kb'] / 1024:7.1f} MB peak")
+            print(f"  {full['seconds'] / fast['seconds']:.1f}x faster, "
+                  f"{max(full['peak_kb'], 1) / max(fast['peak_kb'], 1):.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
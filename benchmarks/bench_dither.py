@@ -0,0 +1,56 @@
+"""Compare dithering engines on label-sized and banner-sized images.
+
+    uv run python benchmarks/bench_dither.py [--repeat N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from fichero.imaging import FS_ENGINES, bayer_matrix, blue_noise_matrix, ordered_dither
+
+SIZES = [(96, 240), (96, 2400)]  # 30mm label, 300mm continuous banner
+
+
+def _gradient_photo(w: int, h: int) -> Image.Image:
+    """Deterministic photo-like test image: gradient plus noise."""
+    rng = np.random.default_rng(0)
+    base = np.linspace(0, 255, w, dtype=np.float32)[None, :].repeat(h, axis=0)
+    noise = rng.normal(0, 30, (h, w)).astype(np.float32)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), mode="L")
+
+
+def _time(fn, img: Image.Image, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(img)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (best is kept)")
+    args = parser.parse_args()
+    ordered = {"bayer8": bayer_matrix(8), "bluenoise": blue_noise_matrix()}
+
+    for w, h in SIZES:
+        img = _gradient_photo(w, h)
+        times = {name: _time(fn, img, args.repeat) for name, fn in FS_ENGINES.items()}
+        same = np.array_equal(
+            np.array(FS_ENGINES["rows"](img)), np.array(FS_ENGINES["pixel"](img))
+        )
+        print(f"{w}x{h}:")
+        for name, t in times.items():
+            print(f"  {name:6s} {t * 1000:8.1f} ms/label")
+        print(f"  speedup {times['pixel'] / times['rows']:.1f}x, identical={same}")
+        for name, matrix in ordered.items():
+            t = _time(lambda im: ordered_dither(im, matrix), img, args.repeat)
+            print(f"  {name:9s} {t * 1000:8.2f} ms/label")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Seconds per label: per-copy print sequence vs. one PrinterClient.print_job().
+
+    uv run python benchmarks/bench_job.py [--counts 10 100] [--transport ble|classic]
+
+Runs against the simulated printer, so the numbers include modelled link
+bandwidth, print-head time and the fixed protocol delays, but no radio.
+"""
+
+import argparse
+import asyncio
+import time
+
+from fichero.printer import (
+    DELAY_AFTER_DENSITY,
+    DELAY_AFTER_FEED,
+    DELAY_COMMAND_GAP,
+    DELAY_RASTER_SETTLE,
+    PrinterClient,
+    connect,
+    raster_header,
+)
+from fichero.simulator import SimulatedPrinter
+
+RASTER = bytes([0xF0, 0x0F] * 6) * 240  # 96x240 label
+
+
+async def per_copy(pc: PrinterClient, labels: list[bytes]) -> None:
+    """The original sequence: full setup and a blocking stop for every label."""
+    await pc.set_density(2)
+    await asyncio.sleep(DELAY_AFTER_DENSITY)
+    for raster in labels:
+        await pc.get_status()
+        await pc.set_paper_type(0)
+        await asyncio.sleep(DELAY_COMMAND_GAP)
+        await pc.wakeup()
+        await asyncio.sleep(DELAY_COMMAND_GAP)
+        await pc.enable()
+        await asyncio.sleep(DELAY_COMMAND_GAP)
+        await pc.send_chunked(raster_header(len(raster) // 12) + raster)
+        await asyncio.sleep(DELAY_RASTER_SETTLE)
+        await pc.form_feed()
+        await asyncio.sleep(DELAY_AFTER_FEED)
+        await pc.stop_print()
+
+
+async def job(pc: PrinterClient, labels: list[bytes]) -> None:
+    await pc.print_job(labels, density=2)
+
+
+async def measure(fn, count: int, transport: str) -> float:
+    sim = SimulatedPrinter(transport)
+    async with connect(simulate=sim) as pc:
+        t0 = time.perf_counter()
+        await fn(pc, [RASTER] * count)
+        elapsed = time.perf_counter() - t0
+    assert len(sim.rasters) == count
+    return elapsed / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10])
+    parser.add_argument("--transport", choices=["ble", "classic"], default="ble")
+    args = parser.parse_args()
+
+    for count in args.counts:
+        old = asyncio.run(measure(per_copy, count, args.transport))
+        new = asyncio.run(measure(job, count, args.transport))
+        print(f"{count:4d} labels: per-copy {old:.3f} s/label, print_job {new:.3f} s/label "
+              f"({100 * (1 - new / old):.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
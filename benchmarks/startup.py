@@ -0,0 +1,133 @@
+"""CLI cold-start time per subcommand, from `python -X importtime`.
+
+    uv run python benchmarks/startup.py                      # table of import times
+    uv run python benchmarks/startup.py --save startup.json
+    uv run python benchmarks/startup.py --compare startup.json [--tolerance 0.25]
+
+Each case runs `python -X importtime -m fichero.cli ...` in a fresh
+process (against the simulator, or failing fast before a Classic
+connect) and reports the total import time and the slowest top-level
+imports.  A case fails if it loads a module it must not need: NumPy and
+Pillow for info/status/set and replaying a spool file, bleak for anything not on a BLE link.
+--compare also fails if a case's import time regressed by more than
+--tolerance against a saved baseline.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fichero.spool import SpoolWriter
+
+HEAVY = ("numpy", "PIL", "bleak")
+
+# name -> (CLI arguments, top-level packages that must not be imported)
+CASES = {
+    "help": (["--help"], HEAVY),
+    "status": (["--simulate", "status"], HEAVY),
+    "info": (["--simulate", "info"], HEAVY),
+    "set density": (["--simulate", "set", "density", "2"], HEAVY),
+    "status --classic": (["--classic", "status"], HEAVY),
+    "text": (["--simulate", "text", "hi"], ("bleak",)),
+    "replay": (["--simulate", "replay", "{spool}"], HEAVY),
+}
+
+
+def run_case(argv: list[str], repeat: int) -> dict:
+    """Best import time over *repeat* runs, with the modules of the last run."""
+    best = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # An empty cache dir: no remembered printer, so --classic fails fast
+        env = dict(os.environ, FICHERO_CACHE_DIR=cache_dir, PYTHONDONTWRITEBYTECODE="")
+        env.pop("FICHERO_TRANSPORT", None)
+        env.pop("FICHERO_ADDR", None)
+        spool = os.path.join(cache_dir, "job.spool")
+        with SpoolWriter(spool, density=2) as out:
+            out.add(bytes(12 * 240))
+        argv = [arg.format(spool=spool) for arg in argv]
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-m", "fichero.cli", *argv],
+                capture_output=True, text=True, env=env, timeout=120,
+            )
+            wall = time.perf_counter() - t0
+            imports = _parse_importtime(proc.stderr)
+            total = sum(self_us for self_us, _ in imports.values()) / 1e6
+            if best is None or total < best["import_seconds"]:
+                best = {"import_seconds": total, "wall_seconds": wall, "imports": imports}
+    return best
+
+
+def _parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """{module: (self us, cumulative us)} from -X importtime output."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        out[name.strip()] = (int(self_us), int(cumulative))
+    return out
+
+
+def _top_level(imports: dict[str, tuple[int, int]], n: int = 3) -> str:
+    roots = {}
+    for name, (_, cumulative) in imports.items():
+        if "." not in name:
+            roots[name] = cumulative
+    slowest = sorted(roots.items(), key=lambda kv: -kv[1])[:n]
+    return ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="filter", default="", help="Only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (default: 5)")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline before failing (default: 0.25)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failures = []
+    print(f"{'case':20s} {'imports':>9s} {'wall':>9s}  slowest")
+    for name, (argv, forbidden) in CASES.items():
+        if args.filter not in name:
+            continue
+        r = run_case(argv, args.repeat)
+        results[name] = {"import_seconds": r["import_seconds"], "wall_seconds": r["wall_seconds"]}
+        line = (f"{name:20s} {r['import_seconds'] * 1000:7.1f}ms {r['wall_seconds'] * 1000:7.1f}ms"
+                f"  {_top_level(r['imports'])}")
+        loaded = [m for m in forbidden if m in r["imports"]]
+        if loaded:
+            line += f"  LOADS {', '.join(loaded)}"
+            failures.append(name)
+        if name in baseline:
+            ratio = r["import_seconds"] / baseline[name]["import_seconds"]
+            flag = "  REGRESSION" if ratio > 1 + args.tolerance else ""
+            line += f"  {ratio:5.2f}x baseline{flag}"
+            if flag:
+                failures.append(name)
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if failures:
+        print(f"{len(failures)} failure(s): {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Benchmark suite for the imaging and transport hot paths.
+
+    uv run python benchmarks/suite.py                      # run everything
+    uv run python benchmarks/suite.py -k prepare            # only matching cases
+    uv run python benchmarks/suite.py --save baseline.json
+    uv run python benchmarks/suite.py --compare baseline.json [--tolerance 0.25]
+
+Each case reports the best time per call, labels/second and bytes/second.
+--compare exits non-zero if any case is slower than the baseline by more
+than --tolerance (a fraction), so it can gate CI.  Baselines are only
+comparable on the same machine.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from collections.abc import Callable
+
+import numpy as np
+from PIL import Image
+
+from fichero.imaging import (
+    array_to_raster,
+    barcode_to_raster,
+    image_to_raster,
+    iter_bands,
+    prepare_image,
+    qr_to_raster,
+    text_to_image,
+)
+from fichero.printer import PrinterClient, connect
+from fichero.simulator import SimulatedPrinter
+
+# name -> (callable returning (labels, bytes) per run, default repeats, warm up first)
+CASES: dict[str, tuple[Callable[[], tuple[int, int]], int, bool]] = {}
+
+
+def case(name: str, repeat: int = 5, warmup: bool = True):
+    def register(fn):
+        CASES[name] = (fn, repeat, warmup)
+        return fn
+    return register
+
+
+def _photo(w: int, h: int) -> Image.Image:
+    """Deterministic photo-like RGB image: gradients plus noise."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noise = rng.normal(0, 25, (h, w, 3)).astype(np.float32)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), mode="RGB")
+
+
+# --- Imaging ---
+
+PHOTOS = {"label": _photo(192, 480), "photo": _photo(1200, 1600)}
+
+
+def _prepare_case(img: Image.Image, mode: str) -> Callable[[], tuple[int, int]]:
+    def run() -> tuple[int, int]:
+        out = prepare_image(img, max_rows=240, dither=mode)
+        return 1, out.width * out.height // 8
+    return run
+
+
+for _size, _img in PHOTOS.items():
+    for _mode in ("fs", "bayer", "bluenoise", "none"):
+        case(f"prepare_image[{_mode},{_size}]")(_prepare_case(_img, _mode))
+
+
+# A 12 MP camera JPEG and the same picture as PNG, opened fresh on every run
+# as the CLI does, to time decoding along with the resize.
+_LARGE: dict[str, bytes] = {}
+
+
+def _large(fmt: str) -> bytes:
+    if fmt not in _LARGE:
+        buf = io.BytesIO()
+        _photo(4000, 3000).save(buf, fmt, **({"quality": 90} if fmt == "JPEG" else {}))
+        _LARGE[fmt] = buf.getvalue()
+    return _LARGE[fmt]
+
+
+def _large_case(fmt: str, draft: bool) -> Callable[[], tuple[int, int]]:
+    def run() -> tuple[int, int]:
+        with Image.open(io.BytesIO(_large(fmt))) as src:
+            out = prepare_image(src, max_rows=240, dither="bayer", draft=draft)
+        return 1, out.width * out.height // 8
+    return run
+
+
+for _fmt in ("JPEG", "PNG"):
+    for _draft in (True, False):
+        case(f"prepare_image[{_fmt.lower()} 12MP,{'draft' if _draft else 'full decode'}]",
+             repeat=3)(_large_case(_fmt, _draft))
+
+
+@case("iter_bands[fs,photo]")
+def _bands() -> tuple[int, int]:
+    nbytes = sum(len(b) for b in iter_bands(PHOTOS["photo"], dither="fs"))
+    return 1, nbytes
+
+
+@case("iter_bands[fs,photo,first band]", repeat=20)
+def _first_band() -> tuple[int, int]:
+    return 1, len(next(iter_bands(PHOTOS["photo"], dither="fs")))
+
+
+@case("text_to_image")
+def _text() -> tuple[int, int]:
+    img = text_to_image("SKU 12345-AB", font_size=30, label_height=240)
+    return 1, img.width * img.height // 8
+
+
+_PREPARED = prepare_image(PHOTOS["label"], max_rows=240)
+
+
+@case("image_to_raster", repeat=200)
+def _raster() -> tuple[int, int]:
+    return 1, len(image_to_raster(_PREPARED))
+
+
+_DOTS = np.random.default_rng(0).random((240, 96)) < 0.3
+
+
+@case("array_to_raster", repeat=200)
+def _array() -> tuple[int, int]:
+    return 1, len(array_to_raster(_DOTS))
+
+
+@case("barcode_to_raster[code128]", repeat=200)
+def _barcode() -> tuple[int, int]:
+    return 1, len(barcode_to_raster("SKU-0012345"))
+
+
+@case("qr_to_raster[url]", repeat=50)
+def _qr() -> tuple[int, int]:
+    return 1, len(qr_to_raster("https://example.com/item/0012345"))
+
+
+# --- Templates ---
+
+RECORDS = [{"sku": f"SKU-{i:05d}", "price": f"{i % 100}.99"} for i in range(10_000)]
+
+
+def _price_template():
+    from fichero.template import Template
+
+    tpl = Template(232, 96)
+    tpl.add_text("ACME Hardware", (4, 2, 224, 26))
+    tpl.add_text("{sku}", (4, 34, 224, 30))
+    tpl.add_text("{price} EUR", (4, 66, 224, 28))
+    return tpl
+
+
+@case("template[10k records]", repeat=1, warmup=False)
+def _template() -> tuple[int, int]:
+    tpl = _price_template()
+    nbytes = sum(len(tpl.render(r)) for r in RECORDS)
+    return len(RECORDS), nbytes
+
+
+@case("template[10k records,full render]", repeat=1, warmup=False)
+def _template_naive() -> tuple[int, int]:
+    # The same labels drawn from scratch each time, as `batch --text` does
+    nbytes = 0
+    for r in RECORDS:
+        img = text_to_image(f"ACME Hardware\n{r['sku']}\n{r['price']} EUR",
+                            font_size=24, label_height=232)
+        nbytes += len(image_to_raster(prepare_image(img, max_rows=232, dither="none")))
+    return len(RECORDS), nbytes
+
+
+# --- Transport ---
+
+
+class NullTransport:
+    """Accepts writes instantly: measures PrinterClient's own overhead."""
+
+    is_classic = False
+    mtu_size = 247
+
+    async def write_gatt_char(self, _uuid, data, response=False) -> None:
+        pass
+
+    async def start_notify(self, _uuid, callback) -> None:
+        pass
+
+
+@case("send_chunked[null,1MB]")
+def _send_null() -> tuple[int, int]:
+    data = bytes(1 << 20)
+
+    async def run():
+        pc = PrinterClient(NullTransport(), chunk_gap=0.0)
+        await pc.send_chunked(data)
+
+    asyncio.run(run())
+    return len(data) // 2880, len(data)
+
+
+@case("send_chunked[sim-ble,label]", repeat=3)
+def _send_sim() -> tuple[int, int]:
+    data = bytes(2880)
+
+    async def run():
+        async with connect(simulate=SimulatedPrinter("ble")) as pc:
+            await pc.send_chunked(data)
+
+    asyncio.run(run())
+    return 1, len(data)
+
+
+@case("do_print[sim-ble,3 copies]", repeat=1, warmup=False)
+def _do_print() -> tuple[int, int]:
+    from fichero.cli import do_print
+
+    copies = 3
+    img = PHOTOS["label"]
+    sim = SimulatedPrinter("ble")
+
+    async def run():
+        async with connect(simulate=sim) as pc:
+            await do_print(pc, img, density=2, copies=copies, dither="bayer")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run())
+    return copies, sim.bytes_received
+
+
+@case("print_job[sim hot head,thermal,12 black labels]", repeat=1, warmup=False)
+def _thermal_job() -> tuple[int, int]:
+    from fichero.thermal import HeatModel, ThermalScheduler, label_heat
+
+    # Cooling sped up ~40x: a head that trips after ~3 back-to-back black labels
+    black = b"\xff" * 2880
+    sim = SimulatedPrinter("classic", rows_per_second=4000,
+                           heat_limit=3 * label_heat(black, 2), heat_tau=0.5)
+
+    async def run():
+        async with connect(simulate=sim) as pc:
+            pc.thermal = ThermalScheduler(model=HeatModel(tau=0.5))
+            await pc.print_job([black] * 12, density=2)
+
+    asyncio.run(run())
+    return 12, sim.bytes_received
+
+
+# --- Spool ---
+
+_SPOOL: list[str] = []
+
+
+def _spool_path() -> str:
+    """Spool of 1000 price labels, compiled once per run."""
+    if not _SPOOL:
+        import atexit
+        import os
+        import tempfile
+
+        from fichero.spool import SpoolWriter
+
+        tpl = _price_template()
+        path = tempfile.NamedTemporaryFile(suffix=".spool", delete=False).name
+        with SpoolWriter(path, density=2) as out:
+            for r in RECORDS[:1000]:
+                out.add(tpl.render(r))
+        atexit.register(os.unlink, path)
+        _SPOOL.append(path)
+    return _SPOOL[0]
+
+
+@case("spool replay[1000 labels,null link]", repeat=3)
+def _spool_replay() -> tuple[int, int]:
+    # What `fichero replay` does per label, minus the printer's own pacing
+    from fichero.printer import raster_header
+    from fichero.spool import Spool
+
+    path = _spool_path()
+    nbytes = 0
+
+    async def run():
+        nonlocal nbytes
+        pc = PrinterClient(NullTransport(), chunk_gap=0.0)
+        with Spool(path) as spool:
+            for label in spool:
+                await pc.send_chunked((raster_header(len(label) // 12), label))
+                nbytes += len(label)
+
+    asyncio.run(run())
+    return 1000, nbytes
+
+
+# --- Runner ---
+
+
+def run_case(fn: Callable[[], tuple[int, int]], repeat: int, warmup: bool = True) -> dict:
+    if warmup:
+        fn()  # lazy matrices, font loading, imports
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        labels, nbytes = fn()
+        t = min(t, time.perf_counter() - t0)
+    return {"seconds": t, "labels_per_s": labels / t, "bytes_per_s": nbytes / t}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="filter", default="", help="Only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=None, help="Override runs per case")
+    parser.add_argument("--save", metavar="FILE", help="Write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline before failing (default: 0.25)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'case':36s} {'time':>10s} {'labels/s':>10s} {'kB/s':>10s}")
+    for name, (fn, repeat, warmup) in CASES.items():
+        if args.filter not in name:
+            continue
+        r = results[name] = run_case(fn, args.repeat or repeat, warmup)
+        line = (f"{name:36s} {r['seconds'] * 1000:8.2f}ms {r['labels_per_s']:10.1f} "
+                f"{r['bytes_per_s'] / 1024:10.1f}")
+        if name in baseline:
+            ratio = r["seconds"] / baseline[name]["seconds"]
+            flag = "  REGRESSION" if ratio > 1 + args.tolerance else ""
+            line += f"  {ratio:5.2f}x baseline{flag}"
+            if flag:
+                regressions.append(name)
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""Barcode symbologies: Code 128, EAN-13 and QR code module patterns.
+
+The encoders return modules as NumPy bool arrays (True = dark), with no
+quiet zone and no scaling; fichero.imaging turns them into packed rasters.
+
+    code128("SKU-12345")        -> 1-D modules
+    ean13("400638133393")       -> ("4006381333931", 1-D modules)
+    qr_matrix("https://...")    -> 2-D modules, (size, size)
+"""
+
+import numpy as np
+
+# --- Code 128 ---
+
+# Bar/space widths of symbol values 0..105, then the stop pattern
+_CODE128_WIDTHS = (
+    "212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 "
+    "221312 231212 112232 122132 122231 113222 123122 123221 223211 221132 "
+    "221231 213212 223112 312131 311222 321122 321221 312212 322112 322211 "
+    "212123 212321 232121 111323 131123 131321 112313 132113 132311 211313 "
+    "231113 231311 112133 112331 132131 113123 113321 133121 313121 211331 "
+    "231131 213113 213311 213131 311123 311321 331121 312113 312311 332111 "
+    "314111 221411 431111 111224 111422 121124 121421 141122 141221 112214 "
+    "112412 122114 122411 142112 142211 241211 221114 413111 241112 134111 "
+    "111242 121142 121241 114212 124112 124211 411212 421112 421211 212141 "
+    "214121 412121 111143 111341 131141 114113 114311 411113 411311 113141 "
+    "114131 311141 411131 211412 211214 211232 2331112"
+).split()
+
+CODE_B, CODE_C = 100, 99          # code set switches (from C, from B)
+START_B, START_C, STOP = 104, 105, 106
+_MIN_C_RUN = 4                    # digits worth switching to code set C for
+
+
+def _digit_run(data: str, i: int) -> int:
+    n = i
+    while n < len(data) and data[n].isdigit() and data[n].isascii():
+        n += 1
+    return n - i
+
+
+def code128_values(data: str) -> list[int]:
+    """Symbol values for *data*, start to check character (no stop).
+
+    Printable ASCII goes out in code set B; runs of four or more digits are
+    packed two per symbol in code set C.
+    """
+    if not data:
+        raise ValueError("Code 128 needs at least one character")
+    values: list[int] = []
+    i, mode = 0, None
+    while i < len(data):
+        run = _digit_run(data, i)
+        whole = mode is None and run == len(data) and run % 2 == 0
+        if (mode == "C" and run >= 2) or run >= _MIN_C_RUN or whole:
+            if mode != "C" and run % 2:
+                run = 1  # odd run: its first digit goes in code set B
+            else:
+                if mode != "C":
+                    values.append(START_C if mode is None else CODE_C)
+                    mode = "C"
+                run -= run % 2
+                values += [int(data[j : j + 2]) for j in range(i, i + run, 2)]
+                i += run
+                continue
+        ch = data[i]
+        if not " " <= ch <= "\x7f":
+            raise ValueError(f"Code 128 set B cannot encode {ch!r}")
+        if mode != "B":
+            values.append(START_B if mode is None else CODE_B)
+            mode = "B"
+        values.append(ord(ch) - 32)
+        i += 1
+    check = (values[0] + sum(pos * v for pos, v in enumerate(values[1:], 1))) % 103
+    return values + [check]
+
+
+def _widths_to_modules(widths: str) -> list[bool]:
+    out: list[bool] = []
+    for k, w in enumerate(widths):
+        out += [k % 2 == 0] * int(w)
+    return out
+
+
+def code128(data: str) -> np.ndarray:
+    """Code 128 modules for *data*, including start, check and stop symbols."""
+    modules: list[bool] = []
+    for v in code128_values(data) + [STOP]:
+        modules += _widths_to_modules(_CODE128_WIDTHS[v])
+    return np.array(modules, dtype=bool)
+
+
+# --- EAN-13 ---
+
+_EAN_L = ("0001101", "0011001", "0010011", "0111101", "0100011",
+          "0110001", "0101111", "0111011", "0110111", "0001011")
+_EAN_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+               "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+
+def ean13_checksum(digits: str) -> int:
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return (10 - total % 10) % 10
+
+
+def ean13(data: str) -> tuple[str, np.ndarray]:
+    """The full 13 digits and the 95 EAN-13 modules for 12 or 13 digits.
+
+    A 13th digit must be the correct check digit.
+    """
+    if not (data.isascii() and data.isdigit() and len(data) in (12, 13)):
+        raise ValueError("EAN-13 takes 12 digits, or 13 with the check digit")
+    check = ean13_checksum(data)
+    if len(data) == 13 and int(data[12]) != check:
+        raise ValueError(f"EAN-13 check digit should be {check}, not {data[12]}")
+    digits = data[:12] + str(check)
+
+    bits = "101"
+    for d, parity in zip(digits[1:7], _EAN_PARITY[int(digits[0])]):
+        code = _EAN_L[int(d)]
+        # G codes are the R codes (L inverted) read backwards
+        bits += code if parity == "L" else code.translate(str.maketrans("01", "10"))[::-1]
+    bits += "01010"
+    for d in digits[7:]:
+        bits += _EAN_L[int(d)].translate(str.maketrans("01", "10"))
+    bits += "101"
+    return digits, np.frombuffer(bits.encode(), dtype=np.uint8) == ord("1")
+
+
+# --- QR code ---
+
+ECC_LEVELS = ("L", "M", "Q", "H")
+_ECC_FORMAT_BITS = {"L": 1, "M": 0, "Q": 3, "H": 2}
+
+# Per version 1..10 and level: (EC codewords per block, [(blocks, data codewords), ...])
+_QR_BLOCKS = {
+    "L": [(7, [(1, 19)]), (10, [(1, 34)]), (15, [(1, 55)]), (20, [(1, 80)]),
+          (26, [(1, 108)]), (18, [(2, 68)]), (20, [(2, 78)]), (24, [(2, 97)]),
+          (30, [(2, 116)]), (18, [(2, 68), (2, 69)])],
+    "M": [(10, [(1, 16)]), (16, [(1, 28)]), (26, [(1, 44)]), (18, [(2, 32)]),
+          (24, [(2, 43)]), (16, [(4, 27)]), (18, [(4, 31)]), (22, [(2, 38), (2, 39)]),
+          (22, [(3, 36), (2, 37)]), (26, [(4, 43), (1, 44)])],
+    "Q": [(13, [(1, 13)]), (22, [(1, 22)]), (18, [(2, 17)]), (26, [(2, 24)]),
+          (18, [(2, 15), (2, 16)]), (24, [(4, 19)]), (18, [(2, 14), (4, 15)]),
+          (22, [(4, 18), (2, 19)]), (20, [(4, 16), (4, 17)]), (24, [(6, 19), (2, 20)])],
+    "H": [(17, [(1, 9)]), (28, [(1, 16)]), (22, [(2, 13)]), (16, [(4, 9)]),
+          (22, [(2, 11), (2, 12)]), (28, [(4, 15)]), (26, [(4, 13), (1, 14)]),
+          (26, [(4, 14), (2, 15)]), (24, [(4, 12), (4, 13)]), (28, [(6, 15), (2, 16)])],
+}
+QR_MAX_VERSION = 10  # 57x57 modules; larger codes would not resolve on a 96-dot head
+
+_QR_ALIGN = [[], [6, 18], [6, 22], [6, 26], [6, 30], [6, 34],
+             [6, 22, 38], [6, 24, 42], [6, 26, 46], [6, 28, 50]]
+
+_ALNUM = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# GF(256) with the QR polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+
+
+def _gf_mul(a: int, b: int) -> int:
+    return 0 if a == 0 or b == 0 else _EXP[_LOG[a] + _LOG[b]]
+
+
+def _rs_generator(degree: int) -> list[int]:
+    """Reed-Solomon generator polynomial, highest term dropped, coefficients high first."""
+    poly = [1]
+    for i in range(degree):
+        nxt = poly + [0]
+        for j, c in enumerate(poly):
+            nxt[j + 1] ^= _gf_mul(c, _EXP[i])
+        poly = nxt
+    return poly[1:]
+
+
+def rs_ecc(data: bytes | list[int], degree: int) -> list[int]:
+    """*degree* Reed-Solomon error correction codewords for *data*."""
+    gen = _rs_generator(degree)
+    rem = [0] * degree
+    for b in data:
+        factor = b ^ rem.pop(0)
+        rem.append(0)
+        for i, g in enumerate(gen):
+            rem[i] ^= _gf_mul(g, factor)
+    return rem
+
+
+class _Bits(list):
+    def put(self, value: int, n: int) -> None:
+        self.extend((value >> i) & 1 for i in range(n - 1, -1, -1))
+
+
+def _segment(data: str) -> tuple[int, int, int, _Bits]:
+    """Mode indicator, count, char-count width class and payload bits of *data*."""
+    bits = _Bits()
+    if data.isascii() and data.isdigit():
+        for i in range(0, len(data), 3):
+            chunk = data[i : i + 3]
+            bits.put(int(chunk), 3 * len(chunk) + 1)
+        return 0b0001, len(data), 0, bits
+    if all(c in _ALNUM for c in data):
+        for i in range(0, len(data) - 1, 2):
+            bits.put(_ALNUM.index(data[i]) * 45 + _ALNUM.index(data[i + 1]), 11)
+        if len(data) % 2:
+            bits.put(_ALNUM.index(data[-1]), 6)
+        return 0b0010, len(data), 1, bits
+    raw = data.encode("utf-8")
+    for b in raw:
+        bits.put(b, 8)
+    return 0b0100, len(raw), 2, bits
+
+
+def _codewords(data: str, ecc: str) -> tuple[int, list[int]]:
+    """Smallest version holding *data* and its interleaved data + EC codewords."""
+    mode, count, kind, payload = _segment(data)
+    for version in range(1, QR_MAX_VERSION + 1):
+        ec_len, groups = _QR_BLOCKS[ecc][version - 1]
+        capacity = 8 * sum(n * k for n, k in groups)
+        count_bits = ((10, 9, 8) if version <= 9 else (12, 11, 16))[kind]
+        if count >= 1 << count_bits or 4 + count_bits + len(payload) > capacity:
+            continue
+        bits = _Bits()
+        bits.put(mode, 4)
+        bits.put(count, count_bits)
+        bits += payload
+        bits += [0] * min(4, capacity - len(bits))
+        bits += [0] * (-len(bits) % 8)
+        data_cw = [int("".join(map(str, bits[i : i + 8])), 2) for i in range(0, len(bits), 8)]
+        data_cw += [(0xEC, 0x11)[i % 2] for i in range(capacity // 8 - len(data_cw))]
+
+        blocks, pos = [], 0
+        for n, k in groups:
+            for _ in range(n):
+                blocks.append(data_cw[pos : pos + k])
+                pos += k
+        ecs = [rs_ecc(b, ec_len) for b in blocks]
+        out = [b[i] for i in range(max(map(len, blocks))) for b in blocks if i < len(b)]
+        out += [e[i] for i in range(ec_len) for e in ecs]
+        return version, out
+    raise ValueError(f"{len(data)} characters do not fit a version {QR_MAX_VERSION} "
+                     f"QR code at level {ecc}")
+
+
+def _bch(value: int, poly: int, degree: int) -> int:
+    rem = value << degree
+    for shift in range(rem.bit_length() - 1, degree - 1, -1):
+        if rem >> shift & 1:
+            rem ^= poly << (shift - degree)
+    return (value << degree) | rem
+
+
+def format_bits(ecc: str, mask: int) -> int:
+    """The 15 masked format-information bits for *ecc* and *mask*."""
+    return _bch(_ECC_FORMAT_BITS[ecc] << 3 | mask, 0x537, 10) ^ 0x5412
+
+
+_MASKS = [
+    lambda y, x: (x + y) % 2 == 0,
+    lambda y, x: y % 2 == 0,
+    lambda y, x: x % 3 == 0,
+    lambda y, x: (x + y) % 3 == 0,
+    lambda y, x: (x // 3 + y // 2) % 2 == 0,
+    lambda y, x: x * y % 2 + x * y % 3 == 0,
+    lambda y, x: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda y, x: ((x + y) % 2 + x * y % 3) % 2 == 0,
+]
+
+_FINDER_RUN = np.array([1, 0, 1, 1, 1, 0, 1], dtype=bool)
+
+
+def _penalty(m: np.ndarray) -> int:
+    """Mask penalty score (ISO 18004 rules 1-4)."""
+    score = 0
+    n = len(m)
+    for grid in (m, m.T):
+        # Rule 1: runs of five or more same-coloured modules.  Row ends are
+        # forced run boundaries; the gaps between rows give runs of 1.
+        edges = np.ones((n, n + 1), dtype=bool)
+        edges[:, 1:-1] = grid[:, 1:] != grid[:, :-1]
+        runs = np.diff(np.flatnonzero(edges))
+        score += int(np.sum(runs[runs >= 5] - 2))
+        # Rule 3: 1:1:3:1:1 finder lookalike with four light modules on either side
+        padded = np.pad(grid, ((0, 0), (4, 4)))
+        win = np.lib.stride_tricks.sliding_window_view(padded, 11, axis=1)
+        before = ~win[..., :4].any(axis=-1) & (win[..., 4:] == _FINDER_RUN).all(axis=-1)
+        after = ~win[..., 7:].any(axis=-1) & (win[..., :7] == _FINDER_RUN).all(axis=-1)
+        score += 40 * int(before.sum() + after.sum())
+    # Rule 2: 2x2 blocks of one colour
+    same = (m[:-1, :-1] == m[1:, :-1]) & (m[:-1, :-1] == m[:-1, 1:]) & (m[:-1, :-1] == m[1:, 1:])
+    score += 3 * int(same.sum())
+    # Rule 4: dark proportion away from 50%
+    total = m.size
+    k = (abs(int(m.sum()) * 20 - total * 10) + total - 1) // total - 1
+    return score + 10 * k
+
+
+def qr_matrix(data: str, ecc: str = "M") -> np.ndarray:
+    """QR code modules for *data* (versions 1-10, numeric/alphanumeric/byte mode).
+
+    The smallest version that fits is used and the mask with the lowest
+    penalty score is chosen.  No quiet zone is included.
+    """
+    if ecc not in ECC_LEVELS:
+        raise ValueError(f"ECC level must be one of {', '.join(ECC_LEVELS)}")
+    version, codewords = _codewords(data, ecc)
+    size = 17 + 4 * version
+    mod = np.zeros((size, size), dtype=bool)
+    func = np.zeros((size, size), dtype=bool)
+
+    def put(y: int, x: int, dark: bool) -> None:
+        mod[y, x] = dark
+        func[y, x] = True
+
+    # Timing patterns, then finders with separators over them
+    for i in range(size):
+        put(6, i, i % 2 == 0)
+        put(i, 6, i % 2 == 0)
+    for cy, cx in ((3, 3), (3, size - 4), (size - 4, 3)):
+        for dy in range(-4, 5):
+            for dx in range(-4, 5):
+                if 0 <= cy + dy < size and 0 <= cx + dx < size:
+                    put(cy + dy, cx + dx, max(abs(dy), abs(dx)) not in (2, 4))
+    align = _QR_ALIGN[version - 1]
+    for cy in align:
+        for cx in align:
+            if (cy, cx) in ((6, 6), (6, align[-1]), (align[-1], 6)):
+                continue
+            for dy in range(-2, 3):
+                for dx in range(-2, 3):
+                    put(cy + dy, cx + dx, max(abs(dy), abs(dx)) != 1)
+
+    def draw_format(mask: int) -> None:
+        bits = format_bits(ecc, mask)
+        bit = [(bits >> i) & 1 == 1 for i in range(15)]
+        for i in range(6):
+            put(i, 8, bit[i])
+        put(7, 8, bit[6])
+        put(8, 8, bit[7])
+        put(8, 7, bit[8])
+        for i in range(9, 15):
+            put(8, 14 - i, bit[i])
+        for i in range(8):
+            put(8, size - 1 - i, bit[i])
+        for i in range(8, 15):
+            put(size - 15 + i, 8, bit[i])
+        put(size - 8, 8, True)  # dark module
+
+    draw_format(0)
+    if version >= 7:
+        bits = _bch(version, 0x1F25, 12)
+        for i in range(18):
+            a, b = size - 11 + i % 3, i // 3
+            put(b, a, (bits >> i) & 1 == 1)
+            put(a, b, (bits >> i) & 1 == 1)
+
+    # Data in two-column zigzags from the bottom right, skipping the timing column
+    stream = [(cw >> (7 - k)) & 1 == 1 for cw in codewords for k in range(8)]
+    i = 0
+    right = size - 1
+    while right >= 1:
+        if right == 6:
+            right = 5
+        upward = ((right + 1) & 2) == 0
+        for vert in range(size):
+            y = size - 1 - vert if upward else vert
+            for x in (right, right - 1):
+                if not func[y, x] and i < len(stream):
+                    mod[y, x] = stream[i]
+                    i += 1
+        right -= 2
+
+    ys, xs = np.indices((size, size))
+    best = None
+    for mask, fn in enumerate(_MASKS):
+        draw_format(mask)
+        candidate = mod ^ (fn(ys, xs) & ~func)
+        score = _penalty(candidate)
+        if best is None or score < best[0]:
+            best = (score, mask, candidate)
+    draw_format(best[1])
+    return np.where(func, mod, best[2])
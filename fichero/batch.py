@@ -0,0 +1,129 @@
+"""Variable-data batch printing: read rows, render labels in parallel."""
+
+import asyncio
+import csv
+import json
+import os
+from collections import deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from fichero.imaging import image_to_raster, prepare_image, text_to_image
+
+
+def read_rows(path: str, fmt: str | None = None) -> Iterator[dict]:
+    """Yield one dict per CSV row or NDJSON line.
+
+    *fmt* is "csv" or "ndjson"; when None it is guessed from the extension
+    (.ndjson/.jsonl are NDJSON, anything else CSV).
+    """
+    if fmt is None:
+        fmt = "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{lineno}: invalid JSON: {e}") from None
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}:{lineno}: expected a JSON object")
+            yield row
+
+
+def row_to_spec(
+    row: dict,
+    text: str | None = None,
+    image: str | None = None,
+    font_size: int = 30,
+    label_height: int = 240,
+    dither: bool | str = True,
+) -> dict:
+    """Build a picklable label spec from one data row.
+
+    *text* / *image* are str.format templates filled from the row's columns,
+    e.g. "SKU {sku}  {price} EUR".  Without a template the row's own "text"
+    or "image" column is used.  An optional "copies" column is honoured.
+    """
+    try:
+        if text is not None:
+            spec = {"text": text.format_map(row)}
+        elif image is not None:
+            spec = {"image": image.format_map(row)}
+        elif row.get("text"):
+            spec = {"text": str(row["text"])}
+        elif row.get("image"):
+            spec = {"image": str(row["image"])}
+        else:
+            raise ValueError("row has no 'text' or 'image' column and no template was given")
+    except KeyError as e:
+        raise ValueError(f"template field {e} not found in row") from None
+    spec.update(
+        font_size=int(row.get("font_size") or font_size),
+        label_height=int(row.get("label_height") or label_height),
+        dither=dither,
+        copies=int(row.get("copies") or 1),
+    )
+    return spec
+
+
+def render_label(spec: dict) -> bytes:
+    """Render one spec to a packed raster. Runs in worker processes."""
+    if "text" in spec:
+        img = text_to_image(spec["text"], font_size=spec["font_size"],
+                            label_height=spec["label_height"])
+        img = prepare_image(img, max_rows=spec["label_height"], dither=False)
+    else:
+        from PIL import Image
+
+        with Image.open(spec["image"]) as src:
+            img = prepare_image(src, max_rows=spec["label_height"], dither=spec["dither"])
+    return image_to_raster(img)
+
+
+async def render_ordered(
+    specs: Iterable[dict],
+    workers: int | None = None,
+    lookahead: int | None = None,
+    executor: Executor | None = None,
+) -> AsyncIterator[tuple[dict, bytes]]:
+    """Render specs in a process pool, yielding (spec, raster) in input order.
+
+    Up to *lookahead* labels are rendered ahead of the consumer, so while the
+    caller is transmitting label N the pool is already working on N+1..N+k.
+    *workers* <= 0 renders inline with no pool (handy for debugging).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        for spec in specs:
+            yield spec, render_label(spec)
+        return
+
+    lookahead = lookahead or 2 * workers
+    own_pool = executor is None
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    loop = asyncio.get_running_loop()
+    pending: deque[tuple[dict, asyncio.Future]] = deque()
+    it = iter(specs)
+    try:
+        for spec in it:
+            pending.append((spec, loop.run_in_executor(pool, render_label, spec)))
+            if len(pending) >= lookahead:
+                break
+        while pending:
+            spec, fut = pending.popleft()
+            raster = await fut
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, loop.run_in_executor(pool, render_label, nxt)))
+            yield spec, raster
+    finally:
+        for _, fut in pending:
+            fut.cancel()
+        if own_pool:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,136 @@
+"""On-disk cache of prepared label rasters, keyed by source content."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from fichero.paths import default_cache_dir
+
+CACHE_VERSION = 2  # bump when prepare_image() output changes for the same inputs
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_STATS_FILE = "stats.json"
+_SUFFIX = ".raster"
+
+
+class RasterCache:
+    """Content-addressed store of packed rasters (12 bytes per row).
+
+    Entries are plain files named by key.  A hit refreshes the file's mtime,
+    and put() evicts least recently used entries once the total size goes
+    over *max_bytes*.  Hit/miss counters persist in stats.json so they
+    accumulate across CLI runs.
+    """
+
+    def __init__(self, directory: str | Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir() / "rasters"
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(source: bytes, **params) -> str:
+        """Hash of the source bytes plus the parameters that shape the raster."""
+        h = hashlib.sha256()
+        h.update(json.dumps({"v": CACHE_VERSION, **params}, sort_keys=True).encode())
+        h.update(source)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def get(self, key: str) -> bytes | None:
+        """The cached raster for *key*, or None.  An unreadable cache is a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by a concurrent writer; the data we read is still valid
+        self._count("hits")
+        return data
+
+    def put(self, key: str, raster: bytes) -> None:
+        """Store *raster* under *key*; an unwritable cache just stores nothing."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return  # the cache is only a shortcut, never fail a print over it
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raster)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            os.unlink(tmp)
+            return
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """(mtime, size, path) for every entry, oldest first."""
+        entries = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under max_bytes. Returns count removed."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """Remove all entries and reset stats. Returns count removed."""
+        entries = self._entries()
+        for _, _, path in entries:
+            path.unlink(missing_ok=True)
+        (self.directory / _STATS_FILE).unlink(missing_ok=True)
+        return len(entries)
+
+    def _load_stats(self) -> dict:
+        try:
+            return json.loads((self.directory / _STATS_FILE).read_text())
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def _count(self, field: str) -> None:
+        stats = self._load_stats()
+        stats[field] = stats.get(field, 0) + 1
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / _STATS_FILE).write_text(json.dumps(stats))
+        except OSError:
+            pass  # stats are best-effort, never fail a print over them
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.directory.is_dir() else []
+        stats = self._load_stats()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+        }
@@ -1,29 +1,68 @@
-"""CLI for Fichero D11s thermal label printer."""
+"""CLI for Fichero D11s thermal label printer.
+
+Pillow and NumPy (fichero.imaging, fichero.batch) are imported inside the
+commands that render, so info/status/set start without them; bleak is
+only imported when a BLE link is opened.
+"""
 
 import argparse
 import asyncio
+import io
 import os
 import sys
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
-from PIL import Image
-
-from fichero.imaging import image_to_raster, prepare_image, text_to_image
+from fichero.cache import DEFAULT_MAX_BYTES, RasterCache
+from fichero.raster import encode_raster
 from fichero.printer import (
     BYTES_PER_ROW,
-    DELAY_AFTER_DENSITY,
-    DELAY_AFTER_FEED,
-    DELAY_COMMAND_GAP,
-    DELAY_RASTER_SETTLE,
+    CHUNK_SIZE_BLE,
     PAPER_GAP,
+    PRINTHEAD_PX,
     PrinterClient,
     PrinterError,
-    PrinterNotReady,
     connect,
+    save_tuning,
 )
+from fichero.trace import Tracer, span
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 DOTS_PER_MM = 8  # 203 DPI
 
 
+def _tracer(args: argparse.Namespace) -> Tracer | None:
+    return getattr(args, "tracer", None)
+
+
+@asynccontextmanager
+async def _connect(args: argparse.Namespace):
+    async with connect(args.address, classic=args.classic, channel=args.channel,
+                       simulate=args.simulate, trace=_tracer(args)) as pc:
+        if args.fixed_delays:
+            pc.pacing = "fixed"
+        if args.thermal:
+            from fichero.thermal import ThermalScheduler
+
+            pc.thermal = ThermalScheduler(min_density=args.min_density)
+        yield pc
+
+
+def _report_pacing(pc: PrinterClient) -> None:
+    if pc.thermal is not None and (pc.thermal.pauses or pc.thermal.lowered):
+        t = pc.thermal.stats()
+        print(f"  Thermal: {t['pauses']} cool-down pauses ({t['paused']:.1f}s), "
+              f"{t['lowered']} labels at lower density, {t['trips']} overheat reports")
+    if pc.pacing != "status" or not pc.labels_printed:
+        return
+    summary = pc.pacing_summary()
+    print(f"  Waited {summary['waited']:.2f}s of {summary['budget']:.2f}s fixed delays "
+          f"({summary['saved_per_label']:.2f}s/label saved)")
+
+
 def _resolve_label_height(args: argparse.Namespace) -> int:
     """Return label height in pixels from --label-length (mm) or --label-height (px)."""
     if args.label_length is not None:
@@ -33,70 +72,99 @@ def _resolve_label_height(args: argparse.Namespace) -> int:
 
 async def do_print(
     pc: PrinterClient,
-    img: Image.Image,
+    img: "Image.Image",
     density: int = 1,
     paper: int = PAPER_GAP,
     copies: int = 1,
-    dither: bool = True,
+    dither: bool | str = True,
     max_rows: int = 240,
+    compact: bool = False,
+) -> bool:
+    from fichero.imaging import image_to_raster, prepare_image
+
+    with span(pc.trace, "prepare_image", "render", dither=str(dither)):
+        img = prepare_image(img, max_rows=max_rows, dither=dither)
+    with span(pc.trace, "image_to_raster", "render") as ev:
+        raster = image_to_raster(img)
+        ev["bytes"] = len(raster)
+    return await _print_raster(pc, raster, density, paper=paper, copies=copies,
+                              compact=compact)
+
+
+async def _print_raster(
+    pc: PrinterClient,
+    raster: bytes,
+    density: int = 1,
+    paper: int = PAPER_GAP,
+    copies: int = 1,
+    compact: bool = False,
 ) -> bool:
-    img = prepare_image(img, max_rows=max_rows, dither=dither)
-    rows = img.height
-    raster = image_to_raster(img)
+    """PrinterClient.print_raster, reporting the label and pacing on stdout."""
+    rows = len(raster) // BYTES_PER_ROW
 
-    print(f"  Image: {img.width}x{rows}, {len(raster)} bytes, {copies} copies")
+    print(f"  Image: {PRINTHEAD_PX}x{rows}, {len(raster)} bytes, {copies} copies")
+    if compact:
+        print(f"  Compact: {len(encode_raster(raster))} bytes on the wire")
 
-    await pc.set_density(density)
-    await asyncio.sleep(DELAY_AFTER_DENSITY)
+    ok = await pc.print_raster(raster, density=density, paper=paper, copies=copies,
+                               compact=compact)
+    if not ok:
+        print("  WARNING: no OK/0xAA from stop command")
+    _report_pacing(pc)
 
-    for copy_num in range(copies):
-        if copies > 1:
-            print(f"  Copy {copy_num + 1}/{copies}...")
+    return True
 
-        # Check status before each copy (matches decompiled app behaviour)
-        status = await pc.get_status()
-        if not status.ok:
-            raise PrinterNotReady(f"Printer not ready: {status}")
-
-        # AiYin print sequence (from decompiled APK)
-        await pc.set_paper_type(paper)
-        await asyncio.sleep(DELAY_COMMAND_GAP)
-        await pc.wakeup()
-        await asyncio.sleep(DELAY_COMMAND_GAP)
-        await pc.enable()
-        await asyncio.sleep(DELAY_COMMAND_GAP)
-
-        # Raster image: GS v 0 m xL xH yL yH <data>
-        yl = rows & 0xFF
-        yh = (rows >> 8) & 0xFF
-        header = bytes([0x1D, 0x76, 0x30, 0x00, BYTES_PER_ROW, 0x00, yl, yh])
-        await pc.send_chunked(header + raster)
-
-        await asyncio.sleep(DELAY_RASTER_SETTLE)
-        await pc.form_feed()
-        await asyncio.sleep(DELAY_AFTER_FEED)
-
-        ok = await pc.stop_print()
+
+async def print_stream(
+    pc: PrinterClient,
+    img: "Image.Image",
+    density: int = 1,
+    paper: int = PAPER_GAP,
+    copies: int = 1,
+    dither: bool | str = True,
+    max_rows: int | None = None,
+    compact: bool = False,
+) -> bool:
+    """Print *img* as one long label, rendering bands while earlier ones print."""
+    from fichero.imaging import BAND_ROWS, iter_bands
+
+    for _ in range(copies):
+        rows = 0
+
+        async def bands():
+            nonlocal rows
+            async for band in _in_thread(iter_bands(img, dither=dither, max_rows=max_rows)):
+                rows += len(band) // BYTES_PER_ROW
+                yield band
+
+        ok = await pc.print_banner(bands(), density=density, paper=paper, compact=compact)
+        print(f"  Streamed {PRINTHEAD_PX}x{rows} in bands of {BAND_ROWS} rows")
         if not ok:
             print("  WARNING: no OK/0xAA from stop command")
+    _report_pacing(pc)
 
     return True
 
 
+async def _in_thread(it: Iterator):
+    """Run a blocking iterator in a worker thread, one item ahead of the consumer."""
+    loop = asyncio.get_running_loop()
+    end = object()
+    nxt = loop.run_in_executor(None, next, it, end)
+    while (item := await nxt) is not end:
+        nxt = loop.run_in_executor(None, next, it, end)
+        yield item
+
+
 async def cmd_info(args: argparse.Namespace) -> None:
-    async with connect(args.address, classic=args.classic, channel=args.channel) as pc:
+    async with _connect(args) as pc:
         info = await pc.get_info()
         for k, v in info.items():
             print(f"  {k}: {v}")
 
-        print()
-        all_info = await pc.get_all_info()
-        for k, v in all_info.items():
-            print(f"  {k}: {v}")
-
 
 async def cmd_status(args: argparse.Namespace) -> None:
-    async with connect(args.address, classic=args.classic, channel=args.channel) as pc:
+    async with _connect(args) as pc:
         status = await pc.get_status()
         print(f"  Status: {status}")
         print(f"  Raw: 0x{status.raw:02X} ({status.raw:08b})")
@@ -106,29 +174,395 @@ async def cmd_status(args: argparse.Namespace) -> None:
 
 
 async def cmd_text(args: argparse.Namespace) -> None:
+    from fichero.imaging import text_to_image
+
     text = " ".join(args.text)
+    if args.stream:
+        length = args.label_length * DOTS_PER_MM if args.label_length else None
+        img = text_to_image(text, font_size=args.font_size, label_height=length)
+        async with _connect(args) as pc:
+            print(f'Printing banner "{text}"...')
+            ok = await print_stream(pc, img, args.density, paper=args.paper,
+                                    copies=args.copies, dither=False, compact=args.compact)
+            print("Done." if ok else "FAILED.")
+        return
+
     label_h = _resolve_label_height(args)
-    img = text_to_image(text, font_size=args.font_size, label_height=label_h)
-    async with connect(args.address, classic=args.classic, channel=args.channel) as pc:
+    with span(_tracer(args), "text_to_image", "render"):
+        img = text_to_image(text, font_size=args.font_size, label_height=label_h)
+    async with _connect(args) as pc:
         print(f'Printing "{text}"...')
         ok = await do_print(pc, img, args.density, paper=args.paper,
-                            copies=args.copies, dither=False, max_rows=label_h)
+                            copies=args.copies, dither=False, max_rows=label_h,
+                            compact=args.compact)
         print("Done." if ok else "FAILED.")
 
 
+def _open_cache(args: argparse.Namespace) -> RasterCache | None:
+    if getattr(args, "no_cache", False):
+        return None
+    max_mb = os.environ.get("FICHERO_CACHE_MAX_MB")
+    max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    return RasterCache(args.cache_dir, max_bytes=max_bytes)
+
+
+def _image_raster(
+    path: str, max_rows: int, dither: bool | str, cache: RasterCache | None,
+    trace: Tracer | None = None,
+) -> bytes:
+    """Prepared raster for an image file, served from *cache* when possible."""
+    from PIL import Image
+
+    from fichero.imaging import image_to_raster, prepare_image
+
+    with open(path, "rb") as f:
+        source = f.read()
+    key = None
+    if cache is not None:
+        key = RasterCache.key(source, max_rows=max_rows, dither=dither)
+        raster = cache.get(key)
+        if raster is not None:
+            print(f"  Using cached raster ({len(raster)} bytes)")
+            return raster
+    with span(trace, "prepare_image", "render", dither=str(dither)):
+        img = prepare_image(Image.open(io.BytesIO(source)), max_rows=max_rows, dither=dither)
+    with span(trace, "image_to_raster", "render") as ev:
+        raster = image_to_raster(img)
+        ev["bytes"] = len(raster)
+    if cache is not None:
+        cache.put(key, raster)
+    return raster
+
+
 async def cmd_image(args: argparse.Namespace) -> None:
-    img = Image.open(args.path)
+    from PIL import Image
+
     label_h = _resolve_label_height(args)
-    async with connect(args.address, classic=args.classic, channel=args.channel) as pc:
+    dither = "none" if args.no_dither else args.dither
+    if args.stream:
+        max_rows = args.label_length * DOTS_PER_MM if args.label_length else None
+        with Image.open(args.path) as img:
+            async with _connect(args) as pc:
+                print(f"Printing {args.path} as a banner...")
+                ok = await print_stream(pc, img, args.density, paper=args.paper,
+                                        copies=args.copies, dither=dither,
+                                        max_rows=max_rows, compact=args.compact)
+                print("Done." if ok else "FAILED.")
+        return
+
+    raster = _image_raster(args.path, label_h, dither, _open_cache(args), _tracer(args))
+    async with _connect(args) as pc:
         print(f"Printing {args.path}...")
-        ok = await do_print(pc, img, args.density, paper=args.paper,
-                            copies=args.copies, dither=not args.no_dither,
-                            max_rows=label_h)
+        ok = await _print_raster(pc, raster, args.density, paper=args.paper,
+                                copies=args.copies, compact=args.compact)
+        print("Done." if ok else "FAILED.")
+
+
+async def cmd_barcode(args: argparse.Namespace) -> None:
+    from fichero.imaging import barcode_to_raster
+
+    try:
+        with span(_tracer(args), "barcode_to_raster", "render", symbology=args.type):
+            raster = barcode_to_raster(args.data, args.type,
+                                       label_rows=_resolve_label_height(args),
+                                       module=args.module, caption=not args.no_text)
+    except ValueError as e:
+        print(f"  ERROR: {e}")
+        return
+    async with _connect(args) as pc:
+        print(f'Printing {args.type} barcode "{args.data}"...')
+        ok = await _print_raster(pc, raster, args.density, paper=args.paper,
+                                copies=args.copies, compact=args.compact)
+        print("Done." if ok else "FAILED.")
+
+
+async def cmd_qr(args: argparse.Namespace) -> None:
+    from fichero.imaging import qr_to_raster
+
+    try:
+        with span(_tracer(args), "qr_to_raster", "render", ecc=args.ecc):
+            raster = qr_to_raster(args.data, label_rows=_resolve_label_height(args),
+                                  module=args.module, ecc=args.ecc)
+    except ValueError as e:
+        print(f"  ERROR: {e}")
+        return
+    async with _connect(args) as pc:
+        print(f'Printing QR code "{args.data}"...')
+        ok = await _print_raster(pc, raster, args.density, paper=args.paper,
+                                copies=args.copies, compact=args.compact)
         print("Done." if ok else "FAILED.")
 
 
+async def cmd_batch(args: argparse.Namespace) -> None:
+    from fichero.batch import read_rows, render_ordered, row_to_spec
+
+    label_h = _resolve_label_height(args)
+    try:
+        specs = [
+            row_to_spec(row, text=args.text, image=args.image, font_size=args.font_size,
+                        label_height=label_h, dither=args.dither)
+            for row in read_rows(args.path, args.format)
+        ]
+    except (OSError, ValueError) as e:
+        print(f"  ERROR: {e}")
+        return
+    if not specs:
+        print("  Nothing to print.")
+        return
+
+    async def rasters():
+        labels = render_ordered(specs, workers=args.workers)
+        n = 0
+        async for spec, raster in labels:
+            n += 1
+            print(f"  Label {n}/{len(specs)}: {spec.get('text') or spec.get('image')}")
+            for _ in range(spec["copies"]):
+                yield raster
+
+    if args.pool:
+        if args.resumable:
+            print("  ERROR: --resumable cannot be combined with --pool")
+            return
+        await _print_pool(args, rasters())
+        return
+    if args.resumable:
+        await _print_journaled(args, [raster async for raster in rasters()])
+        return
+
+    async with _connect(args) as pc:
+        print(f"Printing {len(specs)} labels from {args.path}...")
+        ok = await pc.print_job(rasters(), density=args.density, paper=args.paper,
+                                compact=args.compact)
+        if not ok:
+            print("  WARNING: no OK/0xAA from stop command")
+        _report_pacing(pc)
+        print("Done.")
+
+
+async def _print_pool(args: argparse.Namespace, rasters) -> None:
+    from fichero.pool import PrinterPool
+
+    pool = PrinterPool(args.pool, density=args.density, paper=args.paper,
+                       compact=args.compact,
+                       pacing="fixed" if args.fixed_delays else "status",
+                       trace=_tracer(args), thermal=args.thermal,
+                       min_density=args.min_density)
+    async with pool:
+        print(f"Printing from {args.path} on {len(args.pool)} printers...")
+        try:
+            await pool.print_all(rasters)
+        except PrinterError as e:
+            print(f"  ERROR: {e}")
+        stats = pool.stats()
+    for name, m in stats["printers"].items():
+        state = "ok" if m["error"] is None else m["error"]
+        uncertain = f" ({m['uncertain']} interrupted, check them)" if m["uncertain"] else ""
+        print(f"  {name}: {m['printed']} labels{uncertain}, battery {m['battery']}%, {state}")
+    print(f"  {stats['printed']} labels in {stats['seconds']:.1f}s "
+          f"({stats['labels_per_second']:.2f} labels/s)")
+    print("Done.")
+
+
+async def cmd_template(args: argparse.Namespace) -> None:
+    from fichero.batch import read_rows
+    from fichero.template import Template
+
+    try:
+        tpl = Template.from_designer(args.path)
+        records = list(read_rows(args.data, args.format)) if args.data else tpl.records()
+    except (OSError, ValueError) as e:
+        print(f"  ERROR: {e}")
+        return
+    records = records or [{}]
+
+    def rasters():
+        for n, record in enumerate(records, 1):
+            print(f"  Label {n}/{len(records)}")
+            with span(_tracer(args), "template_render", "render", record=n - 1):
+                raster = tpl.render(record)
+            for _ in range(args.copies):
+                yield raster
+
+    if args.resumable:
+        await _print_journaled(args, list(rasters()))
+        return
+
+    async with _connect(args) as pc:
+        print(f"Printing {len(records)} labels from {args.path} "
+              f"({len(tpl.fields)} variable fields)...")
+        ok = await pc.print_job(rasters(), density=args.density, paper=args.paper,
+                                compact=args.compact)
+        if not ok:
+            print("  WARNING: no OK/0xAA from stop command")
+        _report_pacing(pc)
+        print("Done.")
+
+
+async def _print_journaled(args: argparse.Namespace, labels: list) -> None:
+    """Print *labels* with a job journal, resuming a previous run of the same job."""
+    from fichero.journal import JobJournal, print_resumable
+
+    journal = JobJournal.for_labels(labels)
+    if journal.done:
+        print(f"  Resuming: {len(journal.done)} of {len(labels)} labels already printed")
+    print(f"Printing {len(journal.pending())} labels from {args.path} (journal {journal.path})...")
+    ok = await print_resumable(labels, journal, lambda: _connect(args), density=args.density,
+                               paper=args.paper, compact=args.compact)
+    if not ok:
+        print("  WARNING: no OK/0xAA from stop command")
+    print("Done.")
+
+
+async def _spool_rasters(args: argparse.Namespace, label_h: int):
+    """Rasters for compile's --image/--text/--batch/--template sources, in order."""
+    from fichero.imaging import image_to_raster, prepare_image, text_to_image
+
+    cache = _open_cache(args)
+    for kind, value in args.sources:
+        print(f"  {kind} {value}")
+        if kind == "image":
+            yield _image_raster(value, label_h, args.dither, cache, _tracer(args))
+        elif kind == "text":
+            with span(_tracer(args), "text_to_image", "render"):
+                img = text_to_image(value, font_size=args.font_size, label_height=label_h)
+            yield image_to_raster(prepare_image(img, max_rows=label_h, dither=False))
+        elif kind == "batch":
+            from fichero.batch import read_rows, render_ordered, row_to_spec
+
+            specs = [row_to_spec(row, font_size=args.font_size, label_height=label_h,
+                                 dither=args.dither)
+                     for row in read_rows(value)]
+            async for spec, raster in render_ordered(specs, workers=args.workers):
+                for _ in range(spec["copies"]):
+                    yield raster
+        else:
+            from fichero.template import Template
+
+            tpl = Template.from_designer(value)
+            for n, record in enumerate(tpl.records() or [{}]):
+                with span(_tracer(args), "template_render", "render", record=n):
+                    yield tpl.render(record)
+
+
+async def cmd_compile(args: argparse.Namespace) -> None:
+    from fichero.spool import Spool, SpoolWriter
+
+    if not args.sources:
+        print("  ERROR: nothing to compile, give --image, --text, --batch or --template")
+        return
+    label_h = _resolve_label_height(args)
+    print(f"Compiling {args.output}...")
+    try:
+        with SpoolWriter(args.output, density=args.density, paper=args.paper,
+                         compact=args.compact, rle=not args.no_rle) as out:
+            async for raster in _spool_rasters(args, label_h):
+                for _ in range(args.copies):
+                    out.add(raster)
+    except (OSError, ValueError) as e:
+        print(f"  ERROR: {e}")
+        return
+    with Spool(args.output) as spool:
+        stats = spool.stats()
+    print(f"  {stats['labels']} labels ({stats['unique']} unique, {stats['rle']} run-length "
+          f"encoded), {stats['raster_bytes']} raster bytes in a {stats['file_bytes']} byte spool")
+    print("Done.")
+
+
+async def cmd_replay(args: argparse.Namespace) -> None:
+    from fichero.spool import Spool
+
+    try:
+        spool = Spool(args.path)
+    except (OSError, ValueError) as e:
+        print(f"  ERROR: {e}")
+        return
+    with spool:
+        if args.density is None:
+            args.density = spool.density
+        if args.paper is None:
+            args.paper = spool.paper
+        args.compact = args.compact or spool.compact
+        if args.resumable:
+            await _print_journaled(args, list(spool))
+            return
+
+        async with _connect(args) as pc:
+            print(f"Replaying {len(spool)} labels from {args.path}...")
+            ok = await pc.print_job(spool, density=args.density, paper=args.paper,
+                                    compact=args.compact)
+            if not ok:
+                print("  WARNING: no OK/0xAA from stop command")
+            _report_pacing(pc)
+            print("Done.")
+
+
+async def cmd_serve(args: argparse.Namespace) -> None:
+    import logging
+
+    from fichero.server import PrintServer, serve
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    server = PrintServer(args.address, classic=args.classic, channel=args.channel,
+                         simulate=args.simulate, density=args.density, paper=args.paper,
+                         keepalive=args.keepalive)
+    await serve(server, path=args.socket, port=args.port)
+
+
+TUNE_GAPS = (0.02, 0.01, 0.005, 0.002, 0.0)
+
+
+async def cmd_tune(args: argparse.Namespace) -> None:
+    async with _connect(args) as pc:
+        if pc.is_classic:
+            print("  Classic Bluetooth is stream-based, there is nothing to tune.")
+            return
+        address = pc.client.address
+        firmware = await pc.get_firmware()
+        largest = pc.chunk_size
+        sizes = sorted({largest} | {n for n in (CHUNK_SIZE_BLE, 100) if n < largest},
+                       reverse=True)
+        print(f"Tuning {address} (firmware {firmware}), {args.bytes} bytes per trial...")
+
+        best = None
+        for size in sizes:
+            for gap in TUNE_GAPS:
+                # Two runs, keep the slower: the setting must hold up every time
+                runs = [await pc.measure_throughput(size, gap, args.bytes) for _ in range(2)]
+                if None in runs:
+                    print(f"  chunk {size:3d}  gap {gap * 1000:4.1f} ms  printer stopped answering")
+                    break  # smaller gaps won't fare better
+                rate = min(runs)
+                print(f"  chunk {size:3d}  gap {gap * 1000:4.1f} ms  {rate / 1024:6.1f} kB/s")
+                if best is None or rate > best[0]:
+                    best = (rate, size, gap)
+
+        if best is None:
+            print("  ERROR: no setting worked, keeping defaults")
+            return
+        rate, size, gap = best
+        best = f"chunk {size}, gap {gap * 1000:.1f} ms ({rate / 1024:.1f} kB/s)"
+        if save_tuning(address, firmware=firmware, chunk_size=size, chunk_gap=gap,
+                       bytes_per_s=round(rate)):
+            print(f"Saved {best}")
+        else:
+            print(f"  WARNING: could not write the tuning file, not saved: {best}")
+
+
+async def cmd_cache(args: argparse.Namespace) -> None:
+    cache = RasterCache(args.cache_dir)
+    if args.action == "clear":
+        print(f"  Removed {cache.clear()} cached rasters")
+        return
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    rate = f"{100 * stats['hits'] / lookups:.0f}%" if lookups else "n/a"
+    print(f"  directory: {stats['directory']}")
+    print(f"  entries: {stats['entries']} ({stats['bytes']} bytes)")
+    print(f"  hits: {stats['hits']}  misses: {stats['misses']}  hit rate: {rate}")
+
+
 async def cmd_set(args: argparse.Namespace) -> None:
-    async with connect(args.address, classic=args.classic, channel=args.channel) as pc:
+    async with _connect(args) as pc:
         if args.setting == "density":
             val = int(args.value)
             if not 0 <= val <= 2:
@@ -168,6 +602,63 @@ def _add_paper_arg(parser: argparse.ArgumentParser) -> None:
     )
 
 
+def _add_code_args(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments shared by the barcode and qr subparsers."""
+    parser.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
+                        help="Print density: 0=light, 1=medium, 2=thick")
+    parser.add_argument("--copies", type=int, default=1, help="Number of copies")
+    parser.add_argument("--label-length", type=int, default=None,
+                        help="Label length in mm (default: 30mm)")
+    parser.add_argument("--label-height", type=int, default=240,
+                        help="Label height in pixels (default: 240, prefer --label-length)")
+    _add_paper_arg(parser)
+    _add_compact_arg(parser)
+
+
+def _add_compact_arg(parser: argparse.ArgumentParser) -> None:
+    """Add --compact argument to a printing subparser."""
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Send white runs as paper feeds and doubled rows in double-height "
+             "mode (fewer bytes over BLE, same print)",
+    )
+
+
+def _add_resumable_arg(parser: argparse.ArgumentParser) -> None:
+    """Add --resumable argument to a multi-label subparser."""
+    parser.add_argument(
+        "--resumable", action="store_true",
+        help="Journal each confirmed label and reconnect after a lost link; "
+             "running the same job again resumes at the first unprinted label",
+    )
+
+
+def _add_stream_arg(parser: argparse.ArgumentParser) -> None:
+    """Add --stream argument to a printing subparser."""
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Print as one long banner, rendered and sent band by band "
+             "(no length limit; --label-length caps it)",
+    )
+
+
+def _write_trace(args: argparse.Namespace) -> None:
+    """Save --trace and print seconds per label, throughput and the slowest phases."""
+    fmt = args.trace_format or ("chrome" if args.trace.endswith(".json") else "jsonl")
+    args.tracer.write(args.trace, fmt)
+    summary = args.tracer.summary()
+    print(f"  Trace: {len(args.tracer.events)} events in {summary['seconds']:.2f}s "
+          f"written to {args.trace}")
+    if summary["labels"]:
+        print(f"  {summary['labels']} labels, {summary['seconds_per_label']:.2f}s/label, "
+              f"{summary['bytes_sent']} bytes sent, "
+              f"{summary['bytes_per_second'] / 1024:.1f} kB/s raster transfer")
+    slowest = sorted(summary["phases"].items(), key=lambda kv: -kv[1]["seconds"])[:6]
+    print("  " + ", ".join(f"{name} {p['seconds']:.2f}s" + (f" x{p['count']}" if p["count"] > 1
+                                                              else "")
+                           for name, p in slowest))
+
+
 def _parse_paper(value: str) -> int:
     """Convert paper string/int to protocol value."""
     types = {"gap": 0, "black": 1, "continuous": 2}
@@ -193,6 +684,28 @@ def main() -> None:
                              "or set FICHERO_TRANSPORT=classic)")
     parser.add_argument("--channel", type=int, default=1,
                         help="RFCOMM channel (default: 1, only used with --classic)")
+    parser.add_argument("--simulate", action="store_true",
+                        default=os.environ.get("FICHERO_TRANSPORT", "").lower() == "sim",
+                        help="Talk to a built-in simulated printer instead of hardware "
+                             "(or set FICHERO_TRANSPORT=sim)")
+    parser.add_argument("--fixed-delays", action="store_true",
+                        help="Sleep the full hand-tuned delay in every print phase instead "
+                             "of advancing when the printer reports ready")
+    parser.add_argument("--thermal", action="store_true",
+                        help="Pause between labels (only as long as needed) to keep the head "
+                             "from overheating, and wait out an overheat instead of failing")
+    parser.add_argument("--min-density", type=int, default=None, choices=[0, 1, 2],
+                        help="With --thermal, print at down to this density rather than "
+                             "pause long (implies --thermal)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Raster cache directory (default: $FICHERO_CACHE_DIR or "
+                             "~/.cache/fichero/rasters)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Record the time and bytes of every connect, render, command, "
+                             "transfer and wait to FILE, and print a summary")
+    parser.add_argument("--trace-format", choices=["jsonl", "chrome"], default=None,
+                        help="JSON lines, or Chrome/Perfetto trace events (default: chrome "
+                             "for a .json FILE, else jsonl)")
     sub = parser.add_subparsers(dest="command", required=True)
 
     p_info = sub.add_parser("info", help="Show device info")
@@ -212,6 +725,8 @@ def main() -> None:
     p_text.add_argument("--label-height", type=int, default=240,
                         help="Label height in pixels (default: 240, prefer --label-length)")
     _add_paper_arg(p_text)
+    _add_compact_arg(p_text)
+    _add_stream_arg(p_text)
     p_text.set_defaults(func=cmd_text)
 
     p_image = sub.add_parser("image", help="Print image file")
@@ -219,15 +734,154 @@ def main() -> None:
     p_image.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
                          help="Print density: 0=light, 1=medium, 2=thick")
     p_image.add_argument("--copies", type=int, default=1, help="Number of copies")
+    p_image.add_argument("--dither", default="fs",
+                         choices=["fs", "bayer", "bayer4", "bluenoise", "none"],
+                         help="Dithering: fs=Floyd-Steinberg (default), bayer=ordered 8x8, "
+                              "bayer4=ordered 4x4, bluenoise=blue-noise mask, none=threshold")
     p_image.add_argument("--no-dither", action="store_true",
-                         help="Disable Floyd-Steinberg dithering (use simple threshold)")
+                         help="Same as --dither none")
     p_image.add_argument("--label-length", type=int, default=None,
                          help="Label length in mm (default: 30mm)")
     p_image.add_argument("--label-height", type=int, default=240,
                          help="Max image height in pixels (default: 240, prefer --label-length)")
+    p_image.add_argument("--no-cache", action="store_true",
+                         help="Always re-process the image, bypassing the raster cache")
     _add_paper_arg(p_image)
+    _add_compact_arg(p_image)
+    _add_stream_arg(p_image)
     p_image.set_defaults(func=cmd_image)
 
+    p_barcode = sub.add_parser("barcode", help="Print a Code 128 or EAN-13 barcode")
+    p_barcode.add_argument("data", help="Text to encode (12 or 13 digits for EAN-13)")
+    p_barcode.add_argument("--type", default="code128", choices=["code128", "ean13"],
+                           help="Symbology (default: code128)")
+    p_barcode.add_argument("--module", type=int, default=None,
+                           help="Dots per narrow bar (default: widest that fits the label)")
+    p_barcode.add_argument("--no-text", action="store_true",
+                           help="Leave out the human-readable text beside the bars")
+    _add_code_args(p_barcode)
+    p_barcode.set_defaults(func=cmd_barcode)
+
+    p_qr = sub.add_parser("qr", help="Print a QR code")
+    p_qr.add_argument("data", help="Text or URL to encode")
+    p_qr.add_argument("--ecc", default="M", choices=["L", "M", "Q", "H"],
+                      help="Error correction level (default: M)")
+    p_qr.add_argument("--module", type=int, default=None,
+                      help="Dots per module (default: largest that fits the 96-dot head)")
+    _add_code_args(p_qr)
+    p_qr.set_defaults(func=cmd_qr)
+
+    p_batch = sub.add_parser("batch", help="Print one label per CSV/NDJSON row")
+    p_batch.add_argument("path", help="CSV file with a header row, or NDJSON (.ndjson/.jsonl)")
+    p_batch.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                         help="Input format (default: from file extension)")
+    source = p_batch.add_mutually_exclusive_group()
+    source.add_argument("--text", default=None,
+                        help='Text template filled from columns, e.g. "SKU {sku} {price}" '
+                             "(default: the 'text' column)")
+    source.add_argument("--image", default=None,
+                        help="Image path template filled from columns "
+                             "(default: the 'image' column)")
+    p_batch.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
+                         help="Print density: 0=light, 1=medium, 2=thick")
+    p_batch.add_argument("--font-size", type=int, default=30, help="Font size in points")
+    p_batch.add_argument("--dither", default="fs",
+                         choices=["fs", "bayer", "bayer4", "bluenoise", "none"],
+                         help="Dithering for image labels (default: fs)")
+    p_batch.add_argument("--label-length", type=int, default=None,
+                         help="Label length in mm (default: 30mm)")
+    p_batch.add_argument("--label-height", type=int, default=240,
+                         help="Label height in pixels (default: 240, prefer --label-length)")
+    p_batch.add_argument("--pool", action="append", default=[], metavar="PRINTER",
+                         help="Spread labels over several printers; repeat per printer "
+                              "(BLE address, classic:ADDR[@CHANNEL], or sim:NAME)")
+    p_batch.add_argument("--workers", type=int, default=None,
+                         help="Render processes (default: CPU count, 0 = render inline)")
+    _add_paper_arg(p_batch)
+    _add_compact_arg(p_batch)
+    _add_resumable_arg(p_batch)
+    p_batch.set_defaults(func=cmd_batch)
+
+    p_template = sub.add_parser("template", help="Print a label saved by the web designer")
+    p_template.add_argument("path", help="Saved-label JSON exported from the web designer")
+    p_template.add_argument("--data", default=None,
+                            help="CSV/NDJSON rows for the {name} fields "
+                                 "(default: the CSV saved with the label)")
+    p_template.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                            help="Format of --data (default: from file extension)")
+    p_template.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
+                            help="Print density: 0=light, 1=medium, 2=thick")
+    p_template.add_argument("--copies", type=int, default=1, help="Copies of each label")
+    _add_paper_arg(p_template)
+    _add_compact_arg(p_template)
+    _add_resumable_arg(p_template)
+    p_template.set_defaults(func=cmd_template)
+
+    p_compile = sub.add_parser("compile", help="Render labels into a spool file for replay")
+    p_compile.add_argument("output", help="Spool file to write")
+    p_compile.add_argument("--image", dest="sources", action="append", metavar="PATH",
+                           type=lambda v: ("image", v), help="Add an image label")
+    p_compile.add_argument("--text", dest="sources", action="append", metavar="TEXT",
+                           type=lambda v: ("text", v), help="Add a text label")
+    p_compile.add_argument("--batch", dest="sources", action="append", metavar="FILE",
+                           type=lambda v: ("batch", v),
+                           help="Add one label per CSV/NDJSON row ('text' or 'image' column)")
+    p_compile.add_argument("--template", dest="sources", action="append", metavar="JSON",
+                           type=lambda v: ("template", v),
+                           help="Add a web designer label, once per saved record")
+    p_compile.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
+                           help="Print density stored for replay: 0=light, 1=medium, 2=thick")
+    p_compile.add_argument("--copies", type=int, default=1, help="Copies of each label")
+    p_compile.add_argument("--font-size", type=int, default=30, help="Font size in points")
+    p_compile.add_argument("--dither", default="fs",
+                           choices=["fs", "bayer", "bayer4", "bluenoise", "none"],
+                           help="Dithering for image labels (default: fs)")
+    p_compile.add_argument("--label-length", type=int, default=None,
+                           help="Label length in mm (default: 30mm)")
+    p_compile.add_argument("--label-height", type=int, default=240,
+                           help="Label height in pixels (default: 240, prefer --label-length)")
+    p_compile.add_argument("--workers", type=int, default=None,
+                           help="Render processes for --batch (default: CPU count)")
+    p_compile.add_argument("--no-rle", action="store_true",
+                           help="Store rasters uncompressed instead of run-length encoded")
+    p_compile.add_argument("--no-cache", action="store_true",
+                           help="Always re-process images, bypassing the raster cache")
+    _add_paper_arg(p_compile)
+    _add_compact_arg(p_compile)
+    p_compile.set_defaults(func=cmd_compile, sources=[])
+
+    p_replay = sub.add_parser("replay", help="Print a spool file made by compile")
+    p_replay.add_argument("path", help="Spool file")
+    p_replay.add_argument("--density", type=int, default=None, choices=[0, 1, 2],
+                          help="Override the density stored in the spool")
+    p_replay.add_argument("--paper", default=None,
+                          help="Override the paper type stored in the spool "
+                               "(gap, black, continuous)")
+    _add_compact_arg(p_replay)
+    _add_resumable_arg(p_replay)
+    p_replay.set_defaults(func=cmd_replay)
+
+    p_serve = sub.add_parser("serve", help="Run a print daemon with a persistent connection")
+    p_serve.add_argument("--socket", default=None,
+                         help="Unix socket path (default: $XDG_RUNTIME_DIR/fichero.sock)")
+    p_serve.add_argument("--port", type=int, default=None,
+                         help="Listen on 127.0.0.1:PORT instead of a Unix socket")
+    p_serve.add_argument("--density", type=int, default=2, choices=[0, 1, 2],
+                         help="Default print density for jobs that don't set one")
+    p_serve.add_argument("--keepalive", type=float, default=60.0,
+                         help="Seconds between idle status polls that keep the printer awake")
+    _add_paper_arg(p_serve)
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_tune = sub.add_parser("tune", help="Measure and save the fastest reliable BLE pacing")
+    p_tune.add_argument("--bytes", type=int, default=4096,
+                        help="Padding bytes sent per trial (default: 4096)")
+    p_tune.set_defaults(func=cmd_tune)
+
+    p_cache = sub.add_parser("cache", help="Inspect or clear the raster cache")
+    p_cache.add_argument("action", choices=["stats", "clear"], help="What to do")
+    p_cache.set_defaults(func=cmd_cache)
+
     p_set = sub.add_parser("set", help="Change printer settings")
     p_set.add_argument("setting", choices=["density", "shutdown", "paper"],
                        help="Setting to change")
@@ -240,11 +894,16 @@ def main() -> None:
     if hasattr(args, "paper") and isinstance(args.paper, str):
         args.paper = _parse_paper(args.paper)
 
+    args.tracer = Tracer() if args.trace else None
+    args.thermal = args.thermal or args.min_density is not None
     try:
         asyncio.run(args.func(args))
     except PrinterError as e:
         print(f"  ERROR: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args.tracer is not None:
+            _write_trace(args)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
 """Image processing for Fichero D11s thermal label printer."""
 
+import functools
 import logging
+import math
+from array import array
+from collections.abc import Iterator
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageOps
@@ -39,17 +43,236 @@ def floyd_steinberg_dither(img: Image.Image) -> Image.Image:
     return Image.fromarray(arr, mode="L")
 
 
+def _fs_rows(
+    arr: np.ndarray, prev_err: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Row-at-a-time Floyd-Steinberg core, float32-exact with the pixel loop.
+
+    *arr* is a float32 (h, w) array and is modified in place.  Only the 7/16
+    carry along a row is sequential; it runs over an ``array("f")`` so every
+    intermediate is rounded to float32 exactly like NumPy does in
+    floyd_steinberg_dither().  The 3/16, 5/16 and 1/16 terms are then pushed
+    into the next row as whole-row NumPy ops, in the same order the pixel
+    loop adds them, so results are bit-identical.
+
+    *prev_err* is the error row returned by a previous call and is diffused
+    into the first row of *arr* - this lets callers dither in bands.
+    Returns (uint8 rows of 0/255, error row of the last processed row).
+    """
+    h, w = arr.shape
+    out = np.empty((h, w), dtype=np.uint8)
+    f = array("f", [0.0])
+    err = np.zeros(w, dtype=np.float32)
+    if prev_err is not None and h:
+        _fs_diffuse_down(prev_err, arr[0])
+
+    for y in range(h):
+        row = array("f", arr[y].tobytes())
+        e = array("f", bytes(4 * w))
+        bits = bytearray(w)
+        c = 0.0
+        for x in range(w):
+            f[0] = row[x] + c
+            old = f[0]
+            if old < 128:
+                e[x] = old
+            else:
+                e[x] = old - 255.0
+                bits[x] = 255
+            f[0] = e[x] * 7.0
+            f[0] = f[0] / 16.0
+            c = f[0]
+        out[y] = np.frombuffer(bits, dtype=np.uint8)
+        err = np.frombuffer(e, dtype=np.float32)
+        if y + 1 < h:
+            _fs_diffuse_down(err, arr[y + 1])
+
+    return out, err
+
+
+def _fs_diffuse_down(err: np.ndarray, nxt: np.ndarray) -> None:
+    """Add one row's 1/16, 5/16, 3/16 error terms to the row below, in place."""
+    nxt[1:] += err[:-1] * 1 / 16
+    nxt += err * 5 / 16
+    nxt[:-1] += err[1:] * 3 / 16
+
+
+def floyd_steinberg_dither_rows(img: Image.Image) -> Image.Image:
+    """Floyd-Steinberg dithering to 1-bit, processed a row at a time.
+
+    Produces output identical to floyd_steinberg_dither() but carries error
+    between rows as NumPy vectors, roughly 5x faster on a 96x240 label.
+    """
+    arr = np.array(img, dtype=np.float32)
+    out, _ = _fs_rows(arr)
+    return Image.fromarray(out, mode="L")
+
+
+FS_ENGINES = {
+    "rows": floyd_steinberg_dither_rows,
+    "pixel": floyd_steinberg_dither,
+}
+
+
+# --- Ordered dithering (threshold matrices) ---
+
+
+@functools.lru_cache(maxsize=None)
+def bayer_matrix(size: int = 8) -> np.ndarray:
+    """Recursive Bayer index matrix of *size* x *size* (power of two)."""
+    if size < 2 or size & (size - 1):
+        raise ValueError(f"Bayer matrix size must be a power of two >= 2, got {size}")
+    m = np.array([[0, 2], [3, 1]], dtype=np.int32)
+    while m.shape[0] < size:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    m.flags.writeable = False
+    return m
+
+
+@functools.lru_cache(maxsize=None)
+def blue_noise_matrix(size: int = 64, sigma: float = 1.5) -> np.ndarray:
+    """Blue-noise rank matrix built with Ulichney's void-and-cluster method.
+
+    Deterministic (fixed seed) and computed once per process.  Energy is a
+    toroidal Gaussian so the matrix tiles without seams.
+    """
+    n = size * size
+    d = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(d[:, None] ** 2 + d[None, :] ** 2) / (2 * sigma**2))
+
+    def splat(energy: np.ndarray, idx: int, sign: int) -> None:
+        energy += sign * np.roll(kernel, divmod(int(idx), size), axis=(0, 1))
+
+    def tightest_cluster(pattern: np.ndarray, energy: np.ndarray) -> int:
+        return int(np.argmax(np.where(pattern, energy.ravel(), -np.inf)))
+
+    def largest_void(pattern: np.ndarray, energy: np.ndarray) -> int:
+        return int(np.argmin(np.where(pattern, np.inf, energy.ravel())))
+
+    # Initial pattern: 10% random points, relaxed until stable
+    rng = np.random.default_rng(0)
+    pattern = np.zeros(n, dtype=bool)
+    pattern[rng.choice(n, n // 10, replace=False)] = True
+    energy = np.zeros((size, size))
+    for idx in np.flatnonzero(pattern):
+        splat(energy, idx, 1)
+    while True:
+        cluster = tightest_cluster(pattern, energy)
+        pattern[cluster] = False
+        splat(energy, cluster, -1)
+        void = largest_void(pattern, energy)
+        pattern[void] = True
+        splat(energy, void, 1)
+        if void == cluster:
+            break
+
+    ranks = np.zeros(n, dtype=np.int32)
+    ones = int(pattern.sum())
+
+    # Phase 1: rank the initial points by removing tightest clusters
+    p, e = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = tightest_cluster(p, e)
+        p[cluster] = False
+        splat(e, cluster, -1)
+        ranks[cluster] = rank
+
+    # Phases 2+3: fill largest voids until every cell is ranked
+    p, e = pattern, energy
+    for rank in range(ones, n):
+        void = largest_void(p, e)
+        p[void] = True
+        splat(e, void, 1)
+        ranks[void] = rank
+
+    m = ranks.reshape(size, size)
+    m.flags.writeable = False
+    return m
+
+
+def ordered_dither(img: Image.Image, matrix: np.ndarray, row_offset: int = 0) -> Image.Image:
+    """Threshold *img* against a tiled rank *matrix* in one array comparison.
+
+    *row_offset* is the image's first row within a larger picture, so bands
+    dithered separately line up with the matrix as if done in one piece.
+    """
+    arr = np.asarray(img, dtype=np.uint8)
+    h, w = arr.shape
+    mh, mw = matrix.shape
+    thresholds = ((matrix + 0.5) * (255.0 / matrix.size)).astype(np.float32)
+    tiled = np.tile(thresholds, (-(-(h + row_offset % mh) // mh), -(-w // mw)))
+    tiled = tiled[row_offset % mh : row_offset % mh + h, :w]
+    out = np.where(arr > tiled, 255, 0).astype(np.uint8)
+    return Image.fromarray(out, mode="L")
+
+
+DITHER_MODES = ("fs", "bayer", "bayer4", "bayer8", "bluenoise", "none")
+
+
+def _resolve_dither(dither: bool | str) -> str:
+    """Map prepare_image()'s *dither* argument to a DITHER_MODES name."""
+    if dither is True:
+        return "fs"
+    if dither is False:
+        return "none"
+    if dither not in DITHER_MODES:
+        raise ValueError(f"Unknown dither mode {dither!r}, expected one of {DITHER_MODES}")
+    return "bayer8" if dither == "bayer" else dither
+
+
+# --- Decoding near the target size ---
+
+REDUCING_GAP = 2.0  # sources are kept at least this many times the output size for LANCZOS
+_REDUCIBLE = ("L", "RGB")  # modes where reduce() then convert("L") matches the reverse
+
+
+def _decode_reduced(img: Image.Image, width: int, height: int) -> Image.Image:
+    """*img* decoded or box-reduced to no less than REDUCING_GAP x (width, height).
+
+    A JPEG that is not loaded yet (fresh from Image.open()) is set up with
+    draft() to decode straight to greyscale at 1/2, 1/4 or 1/8 scale, so
+    its full-resolution pixels never exist; as with Image.thumbnail(),
+    this changes the Image object passed in.  Other L and RGB images are
+    shrunk by an integer factor with reduce() before grey conversion.
+    The final LANCZOS resize then starts from a source only a few times
+    the label size: the same two-stage scheme as Image.thumbnail().
+    """
+    need = (max(1, round(width * REDUCING_GAP)), max(1, round(height * REDUCING_GAP)))
+    img.draft("L", need)
+    factor = min(img.width // need[0], img.height // need[1])
+    if factor >= 2 and img.mode in _REDUCIBLE:
+        img = img.reduce(factor)
+    return img
+
+
 def prepare_image(
-    img: Image.Image, max_rows: int = 240, dither: bool = True
+    img: Image.Image,
+    max_rows: int = 240,
+    dither: bool | str = True,
+    fs_engine: str = "rows",
+    draft: bool = True,
 ) -> Image.Image:
     """Convert any image to 96px wide, 1-bit, black on white.
 
-    When *dither* is True (default), uses Floyd-Steinberg error diffusion
-    for better quality on photos and gradients.  Set False for crisp text.
+    *dither* is a DITHER_MODES name or a bool.  True (default) or "fs" uses
+    Floyd-Steinberg error diffusion for better quality on photos and
+    gradients.  "bayer" (8x8), "bayer4" and "bluenoise" are ordered
+    threshold-matrix modes with no per-pixel Python work, for high volume.
+    False or "none" is a plain threshold for crisp text.
+    *fs_engine* picks the implementation from FS_ENGINES: "rows" (default,
+    fast) or "pixel" (the original per-pixel reference loop).
+    Large sources are decoded or reduced close to the label size first
+    (see _decode_reduced); *draft* False converts and resizes the source
+    at full resolution instead, as a reference.
     """
-    img = img.convert("L")
+    mode = _resolve_dither(dither)
+    if fs_engine not in FS_ENGINES:
+        raise ValueError(f"Unknown fs_engine {fs_engine!r}, expected one of {sorted(FS_ENGINES)}")
     w, h = img.size
     new_h = int(h * (PRINTHEAD_PX / w))
+    if draft:
+        img = _decode_reduced(img, PRINTHEAD_PX, new_h)
+    img = img.convert("L")
     img = img.resize((PRINTHEAD_PX, new_h), Image.LANCZOS)
 
     if new_h > max_rows:
@@ -58,8 +281,14 @@ def prepare_image(
 
     img = ImageOps.autocontrast(img, cutoff=1)
 
-    if dither:
-        img = floyd_steinberg_dither(img)
+    if mode == "fs":
+        img = FS_ENGINES[fs_engine](img)
+    elif mode == "bayer4":
+        img = ordered_dither(img, bayer_matrix(4))
+    elif mode == "bayer8":
+        img = ordered_dither(img, bayer_matrix(8))
+    elif mode == "bluenoise":
+        img = ordered_dither(img, blue_noise_matrix())
 
     # Pack to 1-bit.  PIL mode "1" tobytes() uses 0-bit=black, 1-bit=white,
     # but the printer wants 1-bit=black.  Mapping dark->1 via point() inverts
@@ -68,6 +297,91 @@ def prepare_image(
     return img
 
 
+# --- Streaming (band by band) ---
+
+BAND_ROWS = 64  # rows rendered, packed and sent per raster block when streaming
+
+_ORDERED = {"bayer4": lambda: bayer_matrix(4), "bayer8": lambda: bayer_matrix(8),
+            "bluenoise": blue_noise_matrix}
+
+
+def _autocontrast_lut(hist: list[int], cutoff: int = 1) -> list[int]:
+    """ImageOps.autocontrast(cutoff=...)'s lookup table for an L histogram."""
+    h = list(hist)
+    n = sum(h)
+    for order in (range(256), range(255, -1, -1)):
+        cut = int(n * cutoff // 100)
+        for i in order:
+            take = min(cut, h[i])
+            h[i] -= take
+            cut -= take
+            if cut <= 0:
+                break
+    lo = next((i for i in range(256) if h[i]), 255)
+    hi = next((i for i in range(255, -1, -1) if h[i]), 0)
+    if hi <= lo:
+        return list(range(256))
+    scale = 255.0 / (hi - lo)
+    offset = -lo * scale
+    return [min(255, max(0, int(i * scale + offset))) for i in range(256)]
+
+
+def iter_bands(
+    img: Image.Image,
+    dither: bool | str = True,
+    band_rows: int = BAND_ROWS,
+    max_rows: int | None = None,
+    draft: bool = True,
+) -> Iterator[bytes]:
+    """Yield packed raster bands (12 bytes per row) for *img*, top to bottom.
+
+    Same pipeline as prepare_image() + image_to_raster(), but the 96px-wide
+    image is never held whole: each band is resized straight from the
+    (grayscale) source, dithered (Floyd-Steinberg error carries across
+    bands) and packed, so memory beyond the source stays bounded and the
+    first band is ready early.  Output is identical when the resize scale
+    is exact (e.g. a 96 or 192px wide source with an even height);
+    otherwise band edges can shift a resampled pixel by one grey level.
+    Autocontrast needs the whole histogram, which is taken from a cheap
+    box-reduced copy of the source rather than the resized bands, so its
+    levels can differ slightly from prepare_image()'s when the source is
+    wider than 96px.  Nothing is cropped unless *max_rows* is given.
+    Large sources are decoded near the label size first, as in
+    prepare_image() (*draft*).
+    """
+    mode = _resolve_dither(dither)
+    w, h = img.size
+    full_h = int(h * (PRINTHEAD_PX / w))
+    new_h = full_h if max_rows is None else min(full_h, max_rows)
+    if draft:
+        img = _decode_reduced(img, PRINTHEAD_PX, full_h)
+    img = img.convert("L")
+    w, h = img.size
+    scale = h / full_h
+
+    def band(r0: int, r1: int) -> Image.Image:
+        return img.resize((PRINTHEAD_PX, r1 - r0), Image.LANCZOS,
+                          box=(0, r0 * scale, w, r1 * scale))
+
+    # Autocontrast levels from the printed part of the source, box-reduced to
+    # about the output size: no band is resized before the first is yielded
+    box = (0, 0, w, min(h, math.ceil(new_h * scale)))
+    lut = _autocontrast_lut(img.reduce(max(1, int(scale)), box=box).histogram())
+
+    spans = [(r0, min(new_h, r0 + band_rows)) for r0 in range(0, new_h, band_rows)]
+
+    err = None
+    for r0, r1 in spans:
+        part = band(r0, r1).point(lut)
+        if mode == "fs":
+            arr, err = _fs_rows(np.array(part, dtype=np.float32), err)
+        elif mode in _ORDERED:
+            arr = np.asarray(ordered_dither(part, _ORDERED[mode](), row_offset=r0))
+        else:
+            arr = np.asarray(part)
+        yield np.packbits(arr < 128, axis=1).tobytes()
+
+
 def image_to_raster(img: Image.Image) -> bytes:
     """Pack 1-bit image into raw raster bytes, MSB first."""
     if img.mode != "1":
@@ -77,16 +391,49 @@ def image_to_raster(img: Image.Image) -> bytes:
     return img.tobytes()
 
 
-def text_to_image(text: str, font_size: int = 30, label_height: int = 240) -> Image.Image:
-    """Render crisp 1-bit text, rotated 90 degrees for label printing."""
+def array_to_raster(arr) -> memoryview:
+    """Packed raster bytes for a 2-D array, as a memoryview.
+
+    A (rows, 96) array of bools or integers is packed with np.packbits,
+    non-zero meaning a black dot.  A (rows, 12) uint8 array is taken as
+    already packed and is returned as a view of the same memory.
+    """
+    arr = np.asarray(arr)
+    if arr.ndim != 2:
+        raise ValueError(f"Expected a 2-D array, got {arr.ndim}-D")
+    if arr.shape[1] == PRINTHEAD_PX:
+        packed = np.packbits(arr, axis=1)
+    elif arr.shape[1] == PRINTHEAD_PX // 8 and arr.dtype == np.uint8:
+        packed = np.ascontiguousarray(arr)
+    else:
+        raise ValueError(f"Expected {PRINTHEAD_PX} columns (or {PRINTHEAD_PX // 8} packed "
+                         f"uint8 columns), got {arr.shape[1]} of {arr.dtype}")
+    return memoryview(packed).cast("B")
+
+
+BANNER_MARGIN = 16  # px of paper before and after the text when fitting its length
+
+
+def text_to_image(
+    text: str, font_size: int = 30, label_height: int | None = 240
+) -> Image.Image:
+    """Render crisp 1-bit text, rotated 90 degrees for label printing.
+
+    *label_height* None makes the label as long as the text plus
+    BANNER_MARGIN at each end, for banners.
+    """
+    font = ImageFont.load_default(size=font_size)
+    if label_height is None:
+        probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+        left, _, right, _ = probe.textbbox((0, 0), text, font=font)
+        label_height = right - left + 2 * BANNER_MARGIN
+
     canvas_w = label_height
     canvas_h = PRINTHEAD_PX
     img = Image.new("L", (canvas_w, canvas_h), 255)
     draw = ImageDraw.Draw(img)
     draw.fontmode = "1"  # disable antialiasing - pure 1-bit glyph rendering
 
-    font = ImageFont.load_default(size=font_size)
-
     bbox = draw.textbbox((0, 0), text, font=font)
     tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
     x = (canvas_w - tw) // 2 - bbox[0]
@@ -95,3 +442,97 @@ def text_to_image(text: str, font_size: int = 30, label_height: int = 240) -> Im
 
     img = img.rotate(90, expand=True)
     return img
+
+
+# --- Barcodes ---
+
+BARCODE_QUIET = 10  # white modules before and after a linear barcode
+QR_QUIET = 2        # white modules around a QR code (the label edge adds more)
+CAPTION_SIZE = 16   # font size of the text line beside a linear barcode
+CAPTION_GAP = 2     # px between the bars and the text
+
+
+def _fit_module(units: int, room: int, module: int | None, what: str) -> int:
+    """Dots per module: *module*, or the largest (up to 4) that fits *room* dots."""
+    if module is None:
+        module = min(4, room // units)
+    if module < 1 or units * module > room:
+        raise ValueError(f"{what} needs {units * max(module, 1)} dots but only {room} fit; "
+                         "use a longer label or a smaller module")
+    return module
+
+
+def _pack_centered(rows: np.ndarray, label_rows: int | None) -> bytes:
+    """Pack (n, PRINTHEAD_PX) bool rows, centred in *label_rows* rows."""
+    label_rows = len(rows) if label_rows is None else label_rows
+    out = np.zeros((label_rows, PRINTHEAD_PX // 8), dtype=np.uint8)
+    top = (label_rows - len(rows)) // 2
+    out[top : top + len(rows)] = np.packbits(rows, axis=1)
+    return out.tobytes()
+
+
+def barcode_to_raster(
+    data: str,
+    symbology: str = "code128",
+    label_rows: int | None = 240,
+    module: int | None = None,
+    caption: bool = True,
+) -> bytes:
+    """Packed raster of a Code 128 or EAN-13 barcode running along the label.
+
+    Every bar is a whole number of dots (*module* per narrow bar, by default
+    the widest that fits *label_rows*), so edges stay sharp.  With *caption*
+    the human-readable text is printed beside the bars.  *label_rows* None
+    makes the label exactly as long as the barcode.
+    """
+    from fichero.barcode import code128, ean13
+
+    if symbology == "ean13":
+        data, modules = ean13(data)
+    elif symbology == "code128":
+        modules = code128(data)
+    else:
+        raise ValueError(f"Unknown symbology {symbology!r}")
+    units = len(modules) + 2 * BARCODE_QUIET
+    module = _fit_module(units, label_rows or units * (module or 2), module, "Barcode")
+
+    # Bars are laid out so they read the same way round as the caption
+    dark = np.repeat(np.pad(modules, BARCODE_QUIET)[::-1], module)
+    rows = np.zeros((len(dark), PRINTHEAD_PX), dtype=bool)
+    bar_cols = PRINTHEAD_PX
+    if caption:
+        font = ImageFont.load_default(size=CAPTION_SIZE)
+        left, top, right, bottom = font.getbbox(data)
+        cap_h = bottom - top
+        bar_cols = PRINTHEAD_PX - cap_h - CAPTION_GAP
+        img = Image.new("L", (len(dark), cap_h), 255)
+        draw = ImageDraw.Draw(img)
+        draw.fontmode = "1"
+        draw.text(((len(dark) - (right - left)) // 2 - left, -top), data, fill=0, font=font)
+        rows[:, PRINTHEAD_PX - cap_h :] = np.rot90(np.asarray(img) < 128)
+    rows[:, :bar_cols] = dark[:, None]
+    return _pack_centered(rows, label_rows)
+
+
+def qr_to_raster(
+    data: str,
+    label_rows: int | None = 240,
+    module: int | None = None,
+    ecc: str = "M",
+) -> bytes:
+    """Packed raster of a QR code centred across the print head.
+
+    *module* dots per module defaults to the largest that fits the 96-dot
+    head (and *label_rows*); *ecc* is the error correction level L/M/Q/H.
+    """
+    from fichero.barcode import qr_matrix
+
+    matrix = np.pad(qr_matrix(data, ecc), QR_QUIET)
+    units = len(matrix)
+    room = min(PRINTHEAD_PX, label_rows or PRINTHEAD_PX)
+    module = _fit_module(units, room, module, "QR code")
+    square = np.repeat(np.repeat(matrix, module, axis=0), module, axis=1)
+    rows = np.zeros((len(square), PRINTHEAD_PX), dtype=bool)
+    left = (PRINTHEAD_PX - len(square)) // 2
+    rows[:, left : left + len(square)] = square
+    return _pack_centered(rows, label_rows)
@@ -0,0 +1,170 @@
+"""Journaled print jobs that survive a lost link and resume where they stopped.
+
+    labels = [render(row) for row in rows]
+    journal = JobJournal.for_labels(labels)
+    await print_resumable(labels, journal)
+
+The journal is a JSON-lines file: a header naming the job (a hash of
+every label's raster) and one line per label the printer confirmed,
+fsynced as it is written.  print_resumable() prints only the labels the
+journal lacks, reconnecting with exponential backoff when the link
+drops, and deletes the journal once every label is confirmed.  Running
+the same job again after a crash therefore picks up at the first
+unconfirmed label.
+
+A label is confirmed by a status reply after its form feed (see the
+*on_printed* argument of PrinterClient.print_job).  A link lost between
+the form feed and that reply can reprint one label; none is ever skipped,
+and a reply that may answer an earlier, timed-out query confirms nothing.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Callable, Sequence
+from contextlib import AbstractAsyncContextManager
+from pathlib import Path
+
+from fichero.paths import default_cache_dir
+from fichero.printer import (
+    PAPER_GAP,
+    PrinterClient,
+    PrinterError,
+    PrinterNotReady,
+    as_raster,
+    bleak_errors,
+    connect,
+)
+
+log = logging.getLogger(__name__)
+
+RECONNECT_TRIES = 5      # consecutive failed attempts without progress before giving up
+RECONNECT_BACKOFF = 1.0  # s before the first reconnect, doubled per failed attempt
+RECONNECT_MAX = 30.0     # s, backoff ceiling
+
+
+def job_key(labels: Sequence) -> str:
+    """Hash identifying a job by the rasters of its labels, in order."""
+    h = hashlib.sha256(len(labels).to_bytes(8, "big"))
+    for label in labels:
+        h.update(hashlib.sha256(as_raster(label)).digest())
+    return h.hexdigest()
+
+
+class JobJournal:
+    """Set of confirmed label indexes for one job, persisted as JSON lines.
+
+    An existing file for the same job is resumed; a file left by a
+    different job is replaced.  Lines cut short by a crash are ignored.
+    """
+
+    def __init__(self, path: str | Path, key: str, labels: int):
+        self.path = Path(path)
+        self.key = key
+        self.labels = labels
+        self.done: set[int] = set()
+        if not self._load():
+            self._write_header()
+
+    @classmethod
+    def for_labels(cls, labels: Sequence, directory: str | Path | None = None) -> "JobJournal":
+        """Journal for *labels* under *directory* (default: the cache's jobs/)."""
+        key = job_key(labels)
+        directory = Path(directory) if directory else default_cache_dir() / "jobs"
+        return cls(directory / f"{key[:16]}.jsonl", key, len(labels))
+
+    def _load(self) -> bool:
+        try:
+            lines = self.path.read_text().splitlines()
+        except OSError:
+            return False
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        if not entries or entries[0].get("job") != self.key:
+            return False
+        self.done = {e["done"] for e in entries[1:] if 0 <= e.get("done", -1) < self.labels}
+        return True
+
+    def _write_header(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"job": self.key, "labels": self.labels}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark(self, index: int) -> None:
+        """Record label *index* as printed, durably, before returning."""
+        self.done.add(index)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"done": index}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self) -> list[int]:
+        """Indexes still to print, in order."""
+        return [i for i in range(self.labels) if i not in self.done]
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _link_errors() -> tuple:
+    """Exceptions that mean the link (not the printer) failed."""
+    return (PrinterError, OSError, asyncio.TimeoutError, *bleak_errors())
+
+
+async def print_resumable(
+    labels: Sequence,
+    journal: JobJournal,
+    open_printer: Callable[[], AbstractAsyncContextManager[PrinterClient]] = connect,
+    density: int | None = None,
+    paper: int = PAPER_GAP,
+    compact: bool = False,
+    tries: int = RECONNECT_TRIES,
+    backoff: float = RECONNECT_BACKOFF,
+) -> bool:
+    """Print the labels *journal* has not confirmed, reconnecting until all are.
+
+    *open_printer* returns a fresh connection each time it is called, like
+    connect() (the default) with no arguments.  A lost link is retried
+    after *backoff* seconds, doubling up to RECONNECT_MAX; *tries* failures
+    in a row without a newly confirmed label give up and re-raise.  If the
+    first connect fails there is nothing to resume, so it raises at once.
+    PrinterNotReady (cover open, no paper) is raised at once, with the
+    journal kept so a later run resumes.  Returns True if the final stop
+    was acknowledged.
+    """
+    failures = 0
+    connected = False
+    while True:
+        pending = journal.pending()
+        if not pending:
+            journal.remove()
+            return True
+        before = len(journal.done)
+        try:
+            async with open_printer() as pc:
+                connected = True
+                ok = await pc.print_job((labels[i] for i in pending), density=density,
+                                        paper=paper, compact=compact,
+                                        on_printed=lambda n: journal.mark(pending[n]))
+            journal.remove()
+            return ok
+        except PrinterNotReady:
+            raise
+        except _link_errors() as e:
+            if not connected:
+                raise  # never got a working link: nothing to resume yet
+            failures = 0 if len(journal.done) > before else failures + 1
+            if failures >= tries:
+                raise
+            delay = min(RECONNECT_MAX, backoff * 2 ** max(failures - 1, 0))
+            log.warning("Link lost after %d of %d labels (%s), reconnecting in %.1fs",
+                        len(journal.done), journal.labels, repr(e), delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,13 @@
+"""Where fichero keeps its files: the per-user cache directory."""
+
+import os
+from pathlib import Path
+
+
+def default_cache_dir() -> Path:
+    """$FICHERO_CACHE_DIR, else $XDG_CACHE_HOME/fichero, else ~/.cache/fichero."""
+    env = os.environ.get("FICHERO_CACHE_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "fichero"
@@ -0,0 +1,319 @@
+"""Printer pool: several printers, one stream of labels, least-busy dispatch.
+
+    async with PrinterPool(["AA:BB:CC:DD:EE:01", "classic:AA:BB:CC:DD:EE:02"]) as pool:
+        await pool.print_all(rasters)
+        print(pool.stats()["labels_per_second"])
+
+Each printer has its own connection and job queue.  A label goes to the
+healthy printer with the fewest labels outstanding (ties go to the fuller
+battery).  Queued labels are printed in print_job sessions, so a busy
+printer keeps one session open for as long as its queue has work.  When a
+printer fails (link lost, cover open, out of paper) the labels it has not
+started are dispatched to the others.  The label in progress may already
+be on paper, whether the link dropped or a fault was reported after its
+raster was sent, so it is reported as uncertain rather than printed twice.  A printer that lost its
+link is reconnected with exponential backoff and takes work again.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterable, Iterable
+
+from fichero.printer import (
+    PAPER_GAP,
+    RFCOMM_CHANNEL,
+    PrinterClient,
+    PrinterError,
+    PrinterNotReady,
+    as_async_iter,
+    connect,
+)
+from fichero.trace import Hook
+
+log = logging.getLogger(__name__)
+
+HEALTH_INTERVAL = 5.0    # status poll for a printer that reported a fault
+PREFETCH = 2             # labels print_all() queues per printer beyond the one printing
+RECONNECT_TRIES = 5      # failed reconnects in a row before a printer is given up
+RECONNECT_BACKOFF = 1.0  # s before the first reconnect, doubled per failed attempt
+RECONNECT_MAX = 30.0     # s, backoff ceiling
+
+
+def parse_target(spec: str) -> dict:
+    """connect() arguments for "ADDR", "classic:ADDR[@CHANNEL]" or "sim[:NAME]"."""
+    if spec == "sim" or spec.startswith("sim:"):
+        return {"address": spec, "simulate": True}
+    if spec.startswith("classic:"):
+        address, _, channel = spec[len("classic:"):].partition("@")
+        return {"address": address, "classic": True,
+                "channel": int(channel) if channel else RFCOMM_CHANNEL}
+    return {"address": spec}
+
+
+class PoolMember:
+    """One printer in a pool: its connection, queue and counters."""
+
+    def __init__(self, target: dict):
+        self.target = target
+        self.name = str(target.get("address") or "printer")
+        self.pc: PrinterClient | None = None
+        self.healthy = False
+        self.battery = -1
+        self.error: str | None = None
+        self.printed = 0
+        self.uncertain = 0  # labels interrupted by a lost link, possibly printed
+        self.in_flight = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.ready = asyncio.Event()  # set once connected, or once connecting failed
+
+    @property
+    def outstanding(self) -> int:
+        return self.queue.qsize() + self.in_flight
+
+
+class PrinterPool:
+    """Concurrent connections to several printers fed from one label stream.
+
+    *targets* are connect() keyword dicts or strings for parse_target().
+    Labels are packed rasters, as for PrinterClient.print_job.  *trace* is
+    a fichero.trace hook shared by all printers; each event gets a
+    "printer" arg naming the one it came from.  *thermal* gives every
+    printer its own fichero.thermal.ThermalScheduler(*min_density*).
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[dict | str],
+        density: int | None = None,
+        paper: int = PAPER_GAP,
+        compact: bool = False,
+        pacing: str = "status",
+        trace: Hook | None = None,
+        thermal: bool = False,
+        min_density: int | None = None,
+    ):
+        self.members = [PoolMember(parse_target(t) if isinstance(t, str) else dict(t))
+                        for t in targets]
+        if not self.members:
+            raise ValueError("a printer pool needs at least one printer")
+        self.density = density
+        self.paper = paper
+        self.compact = compact
+        self.pacing = pacing
+        self.trace = trace
+        self.thermal = thermal
+        self.min_density = min_density
+        self._tasks: list[asyncio.Task] = []
+        self._progress = asyncio.Event()  # a label finished or a printer changed state
+        self._started: float | None = None
+        self._finished: float | None = None
+
+    # --- Lifecycle ---
+
+    async def __aenter__(self) -> "PrinterPool":
+        self._tasks = [asyncio.create_task(self._run_member(m)) for m in self.members]
+        await asyncio.gather(*(m.ready.wait() for m in self.members))
+        if not any(m.healthy for m in self.members):
+            await self.close()
+            errors = "; ".join(f"{m.name}: {m.error}" for m in self.members)
+            raise PrinterError(f"No printer in the pool is available ({errors})")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for m in self.members:
+            self._fail_queue(m, PrinterError("printer pool closed"))
+
+    # --- Dispatch ---
+
+    def submit(self, raster: bytes) -> asyncio.Future:
+        """Queue one label; the future resolves to the name of the printer used."""
+        if self._started is None:
+            self._started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        self._dispatch((raster, fut))
+        return fut
+
+    async def print_all(self, labels: Iterable[bytes] | AsyncIterable[bytes]) -> list[str]:
+        """Print every label, returning the printer name used for each, in order.
+
+        If a label could not be printed, or may have printed as its link
+        dropped, the first such PrinterError is raised once every other
+        label has been printed.
+        """
+        futures = []
+        async for raster in as_async_iter(labels):
+            # Hold labels back until a printer has room, so a faster printer
+            # takes more of the stream instead of an even split up front.
+            while (m := self._pick()) is not None and m.outstanding > PREFETCH:
+                self._progress.clear()
+                await self._progress.wait()
+            futures.append(self.submit(raster))
+        used = await asyncio.gather(*futures, return_exceptions=True)
+        for result in used:
+            if isinstance(result, BaseException):
+                raise result
+        return list(used)
+
+    def _pick(self) -> PoolMember | None:
+        healthy = [m for m in self.members if m.healthy]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda m: (m.outstanding, -m.battery))
+
+    def _dispatch(self, item: tuple) -> None:
+        m = self._pick()
+        if m is None:
+            if not item[1].done():
+                item[1].set_exception(PrinterError("No healthy printer left in the pool"))
+            return
+        m.queue.put_nowait(item)
+
+    def _drain(self, m: PoolMember, items: list[tuple]) -> None:
+        """Move *items*, never sent, and everything still queued on *m* to other printers."""
+        m.healthy = False
+        m.in_flight = 0
+        self._progress.set()
+        while not m.queue.empty():
+            items.append(m.queue.get_nowait())
+        if items:
+            log.warning("%s: moving %d label(s) to other printers", m.name, len(items))
+        for item in items:
+            self._dispatch(item)
+
+    def _uncertain(self, m: PoolMember, item: tuple, error: BaseException) -> None:
+        """Fail a label interrupted mid-print: it may be on paper, so it is not re-sent."""
+        m.uncertain += 1
+        log.warning("%s: label interrupted (%r), it may have printed", m.name, error)
+        if not item[1].done():
+            item[1].set_exception(PrinterError(
+                f"{m.name}: interrupted while printing ({error!r}), the label may have printed"))
+
+    def _fail_queue(self, m: PoolMember, error: Exception) -> None:
+        while not m.queue.empty():
+            _, fut = m.queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(error)
+
+    # --- Printer side ---
+
+    async def _refresh(self, m: PoolMember) -> bool:
+        status, m.battery = await asyncio.gather(m.pc.get_status(), m.pc.get_battery())
+        m.error = None if status.ok else str(status)
+        return status.ok
+
+    def _member_trace(self, m: PoolMember) -> Hook | None:
+        if self.trace is None:
+            return None
+        trace = self.trace
+        return lambda event: trace({**event, "args": {**event["args"], "printer": m.name}})
+
+    async def _run_member(self, m: PoolMember) -> None:
+        """Connect m and serve its queue; after a lost link, reconnect with backoff.
+
+        A printer that cannot be reached at all is left out.  Once it has
+        been connected, RECONNECT_TRIES failed reconnects in a row give it up.
+        """
+        connected = False
+        failures = 0
+        while True:
+            try:
+                async with connect(**m.target, trace=self._member_trace(m)) as pc:
+                    pc.pacing = self.pacing
+                    if self.thermal:
+                        from fichero.thermal import ThermalScheduler
+
+                        pc.thermal = ThermalScheduler(min_density=self.min_density)
+                    m.pc = pc
+                    m.healthy = await self._refresh(m)
+                    connected, failures = True, 0
+                    m.ready.set()
+                    self._progress.set()
+                    await self._serve(m)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("%s: %s", m.name, e)
+                m.error = str(e) or type(e).__name__
+                self._drain(m, [])
+            finally:
+                m.healthy = False
+                m.pc = None
+                m.ready.set()
+            failures += 1
+            if not connected or failures > RECONNECT_TRIES:
+                return
+            delay = min(RECONNECT_MAX, RECONNECT_BACKOFF * 2 ** (failures - 1))
+            log.warning("%s: reconnecting in %.1fs", m.name, delay)
+            await asyncio.sleep(delay)
+
+    async def _serve(self, m: PoolMember) -> None:
+        """Print m's queue in sessions; park the printer while it reports a fault."""
+        while True:
+            if not m.healthy:
+                await asyncio.sleep(HEALTH_INTERVAL)
+                m.healthy = await self._refresh(m)
+                self._progress.set()
+                continue
+            first = await m.queue.get()
+            current: list[tuple] = [first]
+            if not await self._refresh(m):
+                self._drain(m, current)
+                continue
+
+            async def session():
+                while current:
+                    m.in_flight = 1
+                    yield current[0][0]
+                    # print_job asks for the next label only after feeding this one
+                    self._done(m, current.pop())
+                    if not m.queue.empty():
+                        current.append(m.queue.get_nowait())
+
+            try:
+                await m.pc.print_job(session(), density=self.density, paper=self.paper,
+                                     compact=self.compact)
+            except PrinterNotReady as e:
+                # reported after the raster went out (e.g. the cover opened during
+                # feed), the label may be on paper: only unsent labels move
+                m.error = str(e)
+                if m.in_flight:
+                    self._uncertain(m, current.pop(), e)
+                self._drain(m, current)
+                continue
+            except BaseException as e:
+                if m.in_flight:
+                    self._uncertain(m, current.pop(), e)
+                self._drain(m, current)
+                raise
+
+    def _done(self, m: PoolMember, item: tuple) -> None:
+        m.printed += 1
+        m.in_flight = 0
+        self._finished = time.monotonic()
+        self._progress.set()
+        if not item[1].done():
+            item[1].set_result(m.name)
+
+    # --- Reporting ---
+
+    def stats(self) -> dict:
+        printed = sum(m.printed for m in self.members)
+        elapsed = (self._finished or 0.0) - (self._started or 0.0)
+        return {
+            "printed": printed,
+            "seconds": max(elapsed, 0.0),
+            "labels_per_second": printed / elapsed if elapsed > 0 else 0.0,
+            "printers": {
+                m.name: {"printed": m.printed, "uncertain": m.uncertain,
+                         "queued": m.outstanding, "healthy": m.healthy,
+                         "battery": m.battery, "error": m.error}
+                for m in self.members
+            },
+        }
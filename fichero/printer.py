@@ -7,11 +7,54 @@ Device class: AiYinNormalDevice (LuckPrinter SDK)
 """
 
 import asyncio
+import importlib
+import json
 import sys
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterable, Callable, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import TYPE_CHECKING
 
-from bleak import BleakClient, BleakGATTCharacteristic, BleakScanner
+from fichero.paths import default_cache_dir
+from fichero.trace import Hook, span
+
+if TYPE_CHECKING:
+    from bleak import BleakClient, BleakGATTCharacteristic
+
+    from fichero.simulator import SimulatedPrinter
+    from fichero.thermal import ThermalScheduler
+
+# --- bleak, imported on first BLE use ---
+# Classic Bluetooth and simulated links never load it.  The names still
+# resolve as module attributes (fichero.printer.BleakClient), so callers
+# and tests can use or patch them as before.
+
+_BLEAK_NAMES = {
+    "BleakClient": "bleak",
+    "BleakScanner": "bleak",
+    "BleakGATTCharacteristic": "bleak",
+    "BleakError": "bleak.exc",
+}
+
+
+def _bleak(name: str):
+    """bleak's *name*, or whatever fichero.printer.<name> was patched to."""
+    if name not in globals():
+        globals()[name] = getattr(importlib.import_module(_BLEAK_NAMES[name]), name)
+    return globals()[name]
+
+
+def bleak_errors() -> tuple:
+    """(BleakError,) once bleak is loaded; only a BLE link can raise it."""
+    exc = sys.modules.get("bleak.exc")
+    return (exc.BleakError,) if exc is not None else ()
+
+
+def __getattr__(name: str):
+    if name in _BLEAK_NAMES:
+        return _bleak(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- RFCOMM (Classic Bluetooth) support - Linux + Windows (Python 3.9+) ---
 
@@ -35,9 +78,18 @@ NOTIFY_UUID = "00002af0-0000-1000-8000-00805f9b34fb"
 
 PRINTHEAD_PX = 96
 BYTES_PER_ROW = PRINTHEAD_PX // 8  # 12
-CHUNK_SIZE_BLE = 200        # BLE MTU-limited
+CHUNK_SIZE_BLE = 200        # BLE fallback when the negotiated MTU is unknown
+CHUNK_SIZE_BLE_MAX = 512    # largest ATT attribute value
 CHUNK_SIZE_CLASSIC = 16384  # from decompiled app (C1703d.java), stream-based
 
+
+def raster_header(rows: int, mode: int = 0) -> bytes:
+    """GS v 0 header: 1D 76 30 mm xL xH yL yH for *rows* rows of BYTES_PER_ROW."""
+    if not 0 < rows <= 0xFFFF:
+        raise ValueError(f"Raster height must be 1-65535 rows, got {rows}")
+    return bytes([0x1D, 0x76, 0x30, mode, BYTES_PER_ROW, 0x00, rows & 0xFF, rows >> 8])
+
+
 # --- Paper types for 10 FF 84 nn ---
 
 PAPER_GAP = 0x00
@@ -45,13 +97,19 @@ PAPER_BLACK_MARK = 0x01
 PAPER_CONTINUOUS = 0x02
 
 # --- Timing (seconds) - empirically tuned against D11s fw 2.4.6 ---
+# With status pacing (the default) the phase delays below are only upper
+# bounds: each phase ends as soon as the printer acknowledges or reports idle.
 
 DELAY_AFTER_DENSITY = 0.10   # printer needs time to apply density setting
 DELAY_COMMAND_GAP = 0.05     # minimum gap between sequential commands
-DELAY_CHUNK_GAP = 0.02       # inter-chunk pacing for BLE throughput
+DELAY_CHUNK_GAP = 0.02       # inter-chunk pacing for BLE throughput (per CHUNK_SIZE_BLE bytes)
+DELAY_CHUNK_GAP_MAX = 0.20   # pacing ceiling when writes show backpressure
+SLOW_WRITE = 0.05            # a BLE write taking longer than this means the link is backed up
 DELAY_RASTER_SETTLE = 0.50   # wait for printhead after raster transfer
 DELAY_AFTER_FEED = 0.30      # wait after form feed before stop command
-DELAY_NOTIFY_EXTRA = 0.05    # extra wait for trailing BLE notification fragments
+DELAY_STATUS_POLL = 0.02     # between status polls while the head is still printing
+DELAY_NOTIFY_EXTRA = 0.05    # silence that ends a reply with no known length
+DELAY_LATE_REPLY = 5.0       # a timed-out query's reply is still expected (and discarded) this long
 
 
 # --- Exceptions ---
@@ -75,16 +133,85 @@ class PrinterNotReady(PrinterError):
 
 # --- Discovery ---
 
+SCAN_TIMEOUT = 8.0
+KNOWN_PRINTER_FILE = "printer.json"
+
+
+def load_known_printer() -> dict:
+    """Last printer found by scanning: {"address", "name", "mac_classic"}."""
+    try:
+        return json.loads((default_cache_dir() / KNOWN_PRINTER_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_known_printer(**fields: str) -> None:
+    """Merge *fields* into the known-printer record (a new address replaces it)."""
+    known = load_known_printer()
+    if "address" in fields and fields["address"] != known.get("address"):
+        known = {}
+    known.update(fields)
+    path = default_cache_dir() / KNOWN_PRINTER_FILE
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(known))
+    except OSError:
+        pass  # the cache only saves a scan next time
 
-async def find_printer() -> str:
-    """Scan BLE for a Fichero/D11s printer. Returns the address."""
+
+def _is_printer_name(name: str | None) -> bool:
+    return bool(name) and any(name.startswith(p) for p in PRINTER_NAME_PREFIXES)
+
+
+async def find_printer(timeout: float = SCAN_TIMEOUT) -> str:
+    """Scan BLE for a Fichero/D11s printer. Returns the address.
+
+    Stops at the first matching advertisement instead of waiting out the
+    whole scan, and records the address for connect() to try next time.
+    """
     print("Scanning for printer...")
-    devices = await BleakScanner.discover(timeout=8)
-    for d in devices:
-        if d.name and any(d.name.startswith(p) for p in PRINTER_NAME_PREFIXES):
-            print(f"  Found {d.name} at {d.address}")
-            return d.address
-    raise PrinterNotFound("No Fichero/D11s printer found. Is it turned on?")
+    device = await _bleak("BleakScanner").find_device_by_filter(
+        lambda d, adv: _is_printer_name(d.name or adv.local_name), timeout=timeout
+    )
+    if device is None:
+        raise PrinterNotFound("No Fichero/D11s printer found. Is it turned on?")
+    name = device.name or "printer"
+    print(f"  Found {name} at {device.address}")
+    save_known_printer(address=device.address, name=name)
+    return device.address
+
+
+# --- Transfer tuning (written by `fichero tune`) ---
+
+TUNING_FILE = "tuning.json"
+
+
+def load_tuning(address: str) -> dict:
+    """Tuned {"chunk_size", "chunk_gap", "firmware", ...} for *address*, or {}.
+
+    connect() applies it only while the printer reports the same firmware.
+    """
+    try:
+        all_tuning = json.loads((default_cache_dir() / TUNING_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+    return all_tuning.get(str(address), {})
+
+
+def save_tuning(address: str, **fields) -> bool:
+    """Record *fields* as *address*'s tuning.  Returns False if the file can't be written."""
+    path = default_cache_dir() / TUNING_FILE
+    try:
+        all_tuning = json.loads(path.read_text())
+    except (OSError, ValueError):
+        all_tuning = {}
+    all_tuning[str(address)] = fields
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(all_tuning, indent=2))
+    except OSError:
+        return False
+    return True
 
 
 # --- Status ---
@@ -123,6 +250,98 @@ class PrinterStatus:
         return not (self.cover_open or self.no_paper or self.overheated)
 
 
+# --- Response framing ---
+
+# Reply shape per command prefix: an int is a fixed length, "ok" is b"OK",
+# "stop" is 0xAA or b"OK", "info" is the 10 FF 70 pipe list and "error" an
+# FF nn frame that only comes back on failure.  ASCII string replies and
+# unlisted commands carry no length; they end after DELAY_NOTIFY_EXTRA of
+# silence, as does any reply the decoder cannot make sense of.
+REPLY_SHAPES: dict[bytes, int | str] = {
+    bytes([0x10, 0xFF, 0x40]): 1,
+    bytes([0x10, 0xFF, 0x50]): 2,
+    bytes([0x10, 0xFF, 0x13]): 2,
+    bytes([0x10, 0xFF, 0x11]): 3,
+    bytes([0x10, 0xFF, 0x70]): "info",
+    bytes([0x10, 0xFF, 0x10]): "ok",
+    bytes([0x10, 0xFF, 0x84]): "ok",
+    bytes([0x10, 0xFF, 0x12]): "ok",
+    bytes([0x10, 0xFF, 0x04]): "ok",
+    bytes([0x10, 0xFF, 0xFE, 0x45]): "stop",
+    bytes([0x10, 0x0C]): "ok",
+    bytes([0x1D, 0x76]): "error",
+}
+
+
+def reply_shape(cmd: bytes) -> int | str | None:
+    """Expected reply shape for *cmd* (longest matching prefix), or None."""
+    for n in (4, 3, 2):
+        shape = REPLY_SHAPES.get(bytes(cmd[:n]))
+        if shape is not None:
+            return shape
+    return None
+
+
+# Command names for traces, by prefix as in REPLY_SHAPES
+COMMAND_NAMES: dict[bytes, str] = {
+    bytes([0x10, 0xFF, 0x40]): "status",
+    bytes([0x10, 0xFF, 0x50]): "battery",
+    bytes([0x10, 0xFF, 0x13]): "get_shutdown",
+    bytes([0x10, 0xFF, 0x11]): "get_density",
+    bytes([0x10, 0xFF, 0x70]): "all_info",
+    bytes([0x10, 0xFF, 0x20]): "identity",
+    bytes([0x10, 0xFF, 0x10]): "set_density",
+    bytes([0x10, 0xFF, 0x84]): "set_paper",
+    bytes([0x10, 0xFF, 0x12]): "set_shutdown",
+    bytes([0x10, 0xFF, 0x04]): "factory_reset",
+    bytes([0x10, 0xFF, 0xFE, 0x01]): "enable",
+    bytes([0x10, 0xFF, 0xFE, 0x45]): "stop",
+    bytes([0x1B, 0x4A]): "feed",
+    bytes([0x1D, 0x0C]): "form_feed",
+    bytes([0x1D, 0x76]): "raster",
+    bytes([0x00, 0x00]): "wakeup",
+}
+
+
+def command_name(cmd: bytes) -> str:
+    """Name of *cmd* for traces (longest matching prefix), else its first bytes in hex."""
+    for n in (4, 3, 2):
+        name = COMMAND_NAMES.get(bytes(cmd[:n]))
+        if name is not None:
+            return name
+    return bytes(cmd[:4]).hex()
+
+
+def _has_frame(shape: int | str | None) -> bool:
+    """True if every reply of this shape can be cut out of a stream of replies."""
+    return isinstance(shape, int) or shape in ("ok", "stop", "info")
+
+
+def frame_length(shape: int | str | None, buf: bytes | bytearray) -> int | None:
+    """Length of the complete reply at the start of *buf*, or None if not yet known."""
+    if not buf:
+        return None
+    if buf[0] == 0xFF and shape in ("ok", "stop", "info", "error"):
+        return 2 if len(buf) >= 2 else None
+    if isinstance(shape, int):
+        return shape if len(buf) >= shape else None
+    if shape == "stop" and buf[0] == 0xAA:
+        return 1
+    if shape in ("ok", "stop"):
+        return 2 if len(buf) >= 2 else None
+    if shape == "info":
+        parts = bytes(buf).split(b"|")
+        if len(parts) < 6:
+            return None
+        # Battery is the last field, 0-100 with no terminator: only two digits
+        # other than "10", or three digits, cannot still be growing.
+        battery = parts[5]
+        if len(parts) > 6 or (battery.isdigit() and (len(battery) == 3
+                                                     or (len(battery) == 2 and battery != b"10"))):
+            return len(buf)
+    return None
+
+
 # --- RFCOMM client (duck-types the BleakClient interface) ---
 
 
@@ -142,6 +361,10 @@ class RFCOMMClient:
         self._sock: "_socket.socket | None" = None
         self._reader_task: asyncio.Task | None = None
 
+    @property
+    def address(self) -> str:
+        return self._address
+
     async def __aenter__(self) -> "RFCOMMClient":
         if not _RFCOMM_AVAILABLE:
             raise PrinterError(
@@ -201,45 +424,292 @@ class RFCOMMClient:
 # --- Client ---
 
 
+def _ble_payload_size(client) -> int | None:
+    """Largest write-without-response payload for the connection, if known."""
+    try:
+        size = client.services.get_characteristic(WRITE_UUID).max_write_without_response_size
+    except (AttributeError, *bleak_errors()):
+        size = None
+    if not isinstance(size, int):
+        mtu = getattr(client, "mtu_size", None)
+        size = mtu - 3 if isinstance(mtu, int) else None
+    # 20 is the unnegotiated ATT default (BlueZ always reports it), not a real limit
+    if size is None or size <= 20:
+        return None
+    return min(size, CHUNK_SIZE_BLE_MAX)
+
+
+def _byte_view(data) -> memoryview:
+    """Flat unsigned-byte view of any buffer-protocol object, without copying."""
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def _iter_chunks(parts, size: int):
+    """Split the concatenation of *parts* into *size*-byte chunks.
+
+    Chunks inside one part are memoryview slices of it; only a chunk that
+    straddles two parts is joined into new bytes.
+    """
+    held: list[memoryview] = []
+    held_len = 0
+    for part in parts:
+        view = _byte_view(part)
+        i = 0
+        if held:
+            i = min(size - held_len, len(view))
+            held.append(view[:i])
+            held_len += i
+            if held_len < size:
+                continue
+            yield b"".join(held)
+            held, held_len = [], 0
+        while len(view) - i >= size:
+            yield view[i : i + size]
+            i += size
+        if i < len(view):
+            held, held_len = [view[i:]], len(view) - i
+    if held:
+        yield held[0] if len(held) == 1 else b"".join(held)
+
+
+def as_raster(label) -> memoryview:
+    """A print_job label as a flat byte view: packed bytes, or a 2-D array to pack."""
+    if getattr(label, "ndim", 1) == 2:
+        from fichero.imaging import array_to_raster
+
+        return array_to_raster(label)
+    return _byte_view(label)
+
+
 class PrinterClient:
-    def __init__(self, client: BleakClient):
+    def __init__(
+        self,
+        client: "BleakClient",
+        chunk_size: int | None = None,
+        chunk_gap: float | None = None,
+        trace: Hook | None = None,
+    ):
+        """*chunk_size*/*chunk_gap* override the transfer defaults (see `fichero tune`).
+
+        BLE chunks default to the negotiated MTU payload, with the gap scaled
+        so the byte rate matches the hand-tuned 200 bytes per DELAY_CHUNK_GAP.
+        *trace* is a fichero.trace hook that receives a timed event for every
+        command, transfer, readiness wait and label.
+        """
         self.client = client
+        self.trace = trace
         self._buf = bytearray()
-        self._event = asyncio.Event()
-        self._lock = asyncio.Lock()
+        self._lock = asyncio.Lock()  # serialises writes; replies are matched by _waiters
+        self._waiters: deque[tuple[int | str | None, asyncio.Future]] = deque()
+        self._tail: asyncio.Future | None = None  # in-flight request without a framed reply
+        self._flush: asyncio.TimerHandle | None = None
+        self.lost_replies = 0  # timed-out queries whose reply never came (see _expire)
         self._is_classic = getattr(client, "is_classic", False)
+        if self._is_classic:
+            self.chunk_size = chunk_size or CHUNK_SIZE_CLASSIC
+            self.chunk_gap = 0.0
+        else:
+            self.chunk_size = chunk_size or _ble_payload_size(client) or CHUNK_SIZE_BLE
+            if chunk_gap is None:
+                chunk_gap = DELAY_CHUNK_GAP * self.chunk_size / CHUNK_SIZE_BLE
+            self.chunk_gap = chunk_gap
+        self._gap = self.chunk_gap  # current adaptive gap, never below chunk_gap
+        self.pacing = "status"  # or "fixed": always sleep the full DELAY_* per phase
+        self.phase_times: dict[str, list[float]] = {}  # phase -> [count, waited, budget]
+        self.labels_printed = 0
+        self.thermal: "ThermalScheduler | None" = None  # see fichero.thermal
 
-    def _on_notify(self, _char: BleakGATTCharacteristic, data: bytearray) -> None:
+    @property
+    def is_classic(self) -> bool:
+        """True on a Classic Bluetooth (RFCOMM) link, which is a stream and needs no pacing."""
+        return self._is_classic
+
+    def _on_notify(self, _char: "BleakGATTCharacteristic", data: bytearray) -> None:
         self._buf.extend(data)
-        self._event.set()
+        self._deliver()
+
+    def _deliver(self, flush: bool = False) -> None:
+        """Hand complete reply frames to in-flight requests, oldest first.
+
+        A reply whose end cannot be recognised is handed over once the link
+        has been silent for DELAY_NOTIFY_EXTRA (*flush*).
+        """
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+        while self._waiters and self._buf:
+            shape, fut = self._waiters[0]
+            n = frame_length(shape, self._buf)
+            if n is None:
+                if not flush:
+                    loop = asyncio.get_running_loop()
+                    self._flush = loop.call_later(DELAY_NOTIFY_EXTRA, self._deliver, True)
+                    return
+                n = len(self._buf)
+            frame = bytes(self._buf[:n])
+            del self._buf[:n]
+            self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(frame)
+            flush = False
+
+    def _drop(self, fut: asyncio.Future) -> bool:
+        """Forget a request whose reply never came; its partial reply goes too.
+
+        Returns False if the request was no longer waiting.
+        """
+        for i, (_, f) in enumerate(self._waiters):
+            if f is fut:
+                if i == 0:
+                    self._buf.clear()
+                del self._waiters[i]
+                break
+        else:
+            return False
+        if not fut.done():
+            fut.cancel()
+        return True
+
+    def _orphan(self, shape: int | str | None, fut: asyncio.Future) -> None:
+        """Keep a timed-out request's place in line so its late reply is discarded.
+
+        Replies carry no request id, only their order, so dropping the
+        request would hand its reply, when it does come, to the next query
+        in line.  The cancelled future stays queued instead and _deliver
+        throws away the frame it receives.  If nothing arrives within
+        DELAY_LATE_REPLY the slot is given up (_expire).  A reply without
+        a frame cannot be told apart from the next one, so such requests
+        are dropped at once, as before.
+        """
+        if not fut.cancelled():
+            fut.cancel()
+        if not _has_frame(shape):
+            self._drop(fut)
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(DELAY_LATE_REPLY, self._expire, fut)
+
+    def _expire(self, fut: asyncio.Future) -> None:
+        """Give up on a timed-out request's reply; replies may be out of step after this."""
+        if self._drop(fut):
+            self.lost_replies += 1
 
     async def start(self) -> None:
         await self.client.start_notify(NOTIFY_UUID, self._on_notify)
 
     async def send(self, data: bytes, wait: bool = False, timeout: float = 2.0) -> bytes:
+        """Write *data*; with *wait*, return the printer's reply to it.
+
+        Requests are pipelined: the write lock is held only for the write,
+        so several queries can be in flight and replies are matched to them
+        in order.  A reply is complete as soon as frame_length() recognises
+        a whole frame for the command's reply shape.  A reply with no
+        recognisable end (ASCII strings) must be the last one in flight, so
+        later writes wait for it; it ends after DELAY_NOTIFY_EXTRA of silence.
+        A request that times out keeps its place in line, so a reply that
+        comes late is discarded rather than taken for the next one's.
+        """
+        if self.trace is not None:
+            with span(self.trace, "send", "cmd", cmd=command_name(data), bytes=len(data)) as ev:
+                reply = await self._send(data, wait, timeout)
+                if wait:
+                    ev["reply"] = len(reply)
+                return reply
+        return await self._send(data, wait, timeout)
+
+    async def _send(self, data: bytes, wait: bool, timeout: float) -> bytes:
         async with self._lock:
-            if wait:
-                self._buf.clear()
-                self._event.clear()
-            await self.client.write_gatt_char(WRITE_UUID, data, response=False)
-            if wait:
-                try:
-                    await asyncio.wait_for(self._event.wait(), timeout=timeout)
-                    await asyncio.sleep(DELAY_NOTIFY_EXTRA)
-                except asyncio.TimeoutError:
-                    raise PrinterTimeout(f"No response within {timeout}s")
-            return bytes(self._buf)
-
-    async def send_chunked(self, data: bytes, chunk_size: int | None = None) -> None:
+            if self._tail is not None and not self._tail.done():
+                await asyncio.wait({self._tail})
+            if not wait:
+                await self.client.write_gatt_char(WRITE_UUID, data, response=False)
+                return b""
+            if not self._waiters:
+                self._buf.clear()  # unsolicited or late bytes from earlier commands
+            shape = reply_shape(data)
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append((shape, fut))
+            if not _has_frame(shape):
+                self._tail = fut
+            try:
+                await self.client.write_gatt_char(WRITE_UUID, data, response=False)
+            except BaseException:
+                self._drop(fut)
+                raise
+        try:
+            # not wait_for: on 3.10/3.11 it drops a cancel that races the reply
+            await asyncio.wait({fut}, timeout=timeout)
+            if not fut.done():
+                raise PrinterTimeout(f"No response within {timeout}s")
+            return fut.result()
+        finally:
+            if not fut.done() or fut.cancelled():
+                self._orphan(shape, fut)
+
+    async def send_chunked(self, data, chunk_size: int | None = None) -> None:
+        """Write *data* in chunks, pacing BLE writes to what the link sustains.
+
+        *data* is any bytes-like object, or a tuple/list of them sent back to
+        back (e.g. a raster header and its rows); chunks are memoryview
+        slices, so the payload is not copied.  Each chunk is spaced at least
+        the current gap after the previous one started.  A write that blocks
+        longer than SLOW_WRITE (the BLE stack applying backpressure) doubles
+        the gap; fast writes decay it back towards chunk_gap.
+        """
         if chunk_size is None:
-            chunk_size = CHUNK_SIZE_CLASSIC if self._is_classic else CHUNK_SIZE_BLE
-        delay = 0 if self._is_classic else DELAY_CHUNK_GAP
+            chunk_size = self.chunk_size
+        parts = data if isinstance(data, (tuple, list)) else (data,)
+        if self.trace is not None:
+            nbytes = sum(_byte_view(p).nbytes for p in parts)
+            with span(self.trace, "send_chunked", "transfer", bytes=nbytes,
+                      chunk_size=chunk_size):
+                await self._send_chunks(parts, chunk_size)
+        else:
+            await self._send_chunks(parts, chunk_size)
+
+    async def _send_chunks(self, parts, chunk_size: int) -> None:
         async with self._lock:
-            for i in range(0, len(data), chunk_size):
-                chunk = data[i : i + chunk_size]
+            for chunk in _iter_chunks(parts, chunk_size):
+                t0 = time.monotonic()
                 await self.client.write_gatt_char(WRITE_UUID, chunk, response=False)
-                if delay:
-                    await asyncio.sleep(delay)
+                if self._is_classic:
+                    continue
+                elapsed = time.monotonic() - t0
+                if elapsed > SLOW_WRITE:
+                    self._gap = min(max(self._gap * 2, 0.005), DELAY_CHUNK_GAP_MAX)
+                else:
+                    self._gap = max(self.chunk_gap, self._gap * 0.8)
+                if self._gap > elapsed:
+                    await asyncio.sleep(self._gap - elapsed)
+
+    async def measure_throughput(
+        self, chunk_size: int, chunk_gap: float, nbytes: int = 4096, timeout: float = 2.0
+    ) -> float | None:
+        """Bytes/s for pushing about *nbytes* at the given pacing, or None if it fails.
+
+        Sends a blank raster block of that size and then a status query.
+        The printer is not enabled, so it parses the raster without printing
+        it; if any chunk was lost, the query's bytes are taken as the rest
+        of the raster and never answered.  A status reply within *timeout*
+        therefore proves every byte arrived, and the round trip counts
+        towards the elapsed time.
+        """
+        rows = min(max(1, nbytes // BYTES_PER_ROW), 0xFFFF)
+        block = (raster_header(rows), bytes(rows * BYTES_PER_ROW))
+        saved = self.chunk_size, self.chunk_gap, self._gap
+        self.chunk_size, self.chunk_gap, self._gap = chunk_size, chunk_gap, chunk_gap
+        try:
+            t0 = time.monotonic()
+            await self.send_chunked(block)
+            await self.send(bytes([0x10, 0xFF, 0x40]), wait=True, timeout=timeout)
+            return sum(map(len, block)) / (time.monotonic() - t0)
+        except PrinterTimeout:
+            return None
+        finally:
+            self.chunk_size, self.chunk_gap, self._gap = saved
 
     # --- Info commands (all tested and confirmed on D11s fw 2.4.6) ---
 
@@ -265,11 +735,12 @@ class PrinterClient:
             return r[-1]
         return -1
 
-    async def get_status(self) -> PrinterStatus:
-        r = await self.send(bytes([0x10, 0xFF, 0x40]), wait=True)
-        if r:
-            return PrinterStatus(r[-1])
-        return PrinterStatus(0xFF)
+    async def get_status(self, timeout: float = 2.0) -> PrinterStatus:
+        r = await self.send(bytes([0x10, 0xFF, 0x40]), wait=True, timeout=timeout)
+        status = PrinterStatus(r[-1] if r else 0xFF)
+        if self.thermal is not None:
+            self.thermal.saw_status(status)
+        return status
 
     async def get_density(self) -> bytes:
         r = await self.send(bytes([0x10, 0xFF, 0x11]), wait=True)
@@ -345,17 +816,247 @@ class PrinterClient:
             return r[0] == 0xAA or r.startswith(b"OK")
         return False
 
-    async def get_info(self) -> dict:
-        status = await self.get_status()
+    async def print_job(
+        self,
+        labels: Iterable[bytes] | AsyncIterable[bytes],
+        density: int | None = None,
+        paper: int = PAPER_GAP,
+        compact: bool = False,
+        on_printed: Callable[[int], None] | None = None,
+    ) -> bool:
+        """Print several labels in one session.
+
+        A label is a packed raster (any bytes-like object, BYTES_PER_ROW
+        bytes per row) or a 2-D array for fichero.imaging.array_to_raster.
+        Rasters go out as memoryview slices, without copies.
+        Density, paper type, wakeup and enable are sent once, then each
+        raster is followed by a form feed, and a single stop ends the job.
+        *labels* may be an async iterable, so rendering can overlap printing.
+        *compact* sends each raster through fichero.raster.encode_raster
+        (white runs as feeds, doubled rows in double-height mode).
+        With *self.thermal* set, a fichero.thermal.ThermalScheduler paces
+        labels to keep the head from overheating.
+        *on_printed* is called with each label's index once the printer has
+        confirmed it: a status query follows every form feed, and since
+        commands are handled in order its reply proves the label was taken.
+        Once a reply has been lost on this connection (see lost_replies) no
+        reply can be trusted to be that query's, so PrinterTimeout is raised
+        instead of confirming the label.
+        Returns True if the printer acknowledged the final stop.
+        """
+        await self._start_job(density, paper)
+        index = 0
+        async for raster in as_async_iter(labels):
+            if self.thermal is not None:
+                raster = as_raster(raster)
+                await self.thermal.before_label(self, raster)
+            with span(self.trace, "label", "job", index=self.labels_printed):
+                await self._send_raster(raster, compact)
+                if self.thermal is not None:
+                    self.thermal.after_label(self, raster)
+                await self.wait_phase("settle", DELAY_RASTER_SETTLE)
+                await self.form_feed()
+                if on_printed is not None:
+                    status = await self.get_status()
+                    if self.lost_replies:
+                        # an expired request's reply may have been taken for this one
+                        raise PrinterTimeout("Replies out of step, label not confirmed")
+                    await self._check_ready(status)
+            if on_printed is not None:
+                on_printed(index)
+            index += 1
+            self.labels_printed += 1
+        return await self._finish_job()
+
+    async def print_raster(
+        self,
+        raster,
+        density: int | None = None,
+        paper: int = PAPER_GAP,
+        copies: int = 1,
+        compact: bool = False,
+    ) -> bool:
+        """Print *copies* of one packed raster (BYTES_PER_ROW bytes per row) as one job.
+
+        Returns True if the printer acknowledged the final stop.
+        """
+        return await self.print_job([raster] * copies, density=density, paper=paper,
+                                    compact=compact)
+
+    async def print_banner(
+        self,
+        bands: Iterable[bytes] | AsyncIterable[bytes],
+        density: int | None = None,
+        paper: int = PAPER_GAP,
+        compact: bool = False,
+    ) -> bool:
+        """Print packed raster *bands* back to back as one long label.
+
+        Each band goes out as its own raster block as soon as it arrives, so
+        a banner of any length can be streamed from a generator such as
+        fichero.imaging.iter_bands() without building it in memory or
+        hitting the 65535-row limit of one block.  A single form feed and
+        stop follow the last band.  A *thermal* scheduler may pause between
+        bands, but keeps the density.  Returns True if the stop was acknowledged.
+        """
+        await self._start_job(density, paper)
+        with span(self.trace, "label", "job", index=self.labels_printed) as ev:
+            bands_sent = 0
+            async for band in as_async_iter(bands):
+                if self.thermal is not None:
+                    band = as_raster(band)
+                    await self.thermal.before_label(self, band, step_density=False)
+                await self._send_raster(band, compact)
+                if self.thermal is not None:
+                    self.thermal.after_label(self, band)
+                bands_sent += 1
+            await self.wait_phase("settle", DELAY_RASTER_SETTLE)
+            await self.form_feed()
+            ev["bands"] = bands_sent
+        self.labels_printed += 1
+        return await self._finish_job()
+
+    async def _start_job(self, density: int | None, paper: int) -> None:
+        """Density, status check, paper type, wakeup and enable (steps 1-4)."""
+        if self.thermal is not None:
+            self.thermal.start(density)
+        with span(self.trace, "start_job", "job", density=density, paper=paper):
+            await self._prepare_job(density, paper)
+
+    async def _prepare_job(self, density: int | None, paper: int) -> None:
+        if density is not None:
+            ok = await self.set_density(density)
+            await self.wait_phase("density", DELAY_AFTER_DENSITY, acked=ok)
+
+        await self._check_ready(await self.get_status())
+
+        ok = await self.set_paper_type(paper)
+        await self.wait_phase("paper", DELAY_COMMAND_GAP, acked=ok)
+        await self.wakeup()
+        await self.wait_phase("wakeup", DELAY_COMMAND_GAP)
+        await self.enable()
+        await self.wait_phase("enable", DELAY_COMMAND_GAP)
+
+    async def _send_raster(self, raster, compact: bool) -> None:
+        raster = as_raster(raster)
+        if len(raster) % BYTES_PER_ROW:
+            raise ValueError(f"Raster length {len(raster)} is not a multiple of {BYTES_PER_ROW}")
+        if compact:
+            from fichero.raster import encode_raster
+
+            await self.send_chunked(encode_raster(raster))
+        else:
+            await self.send_chunked((raster_header(len(raster) // BYTES_PER_ROW), raster))
+
+    async def _finish_job(self) -> bool:
+        await self.wait_phase("feed", DELAY_AFTER_FEED)
+        return await self.stop_print()
+
+    # --- Readiness ---
+
+    async def wait_phase(self, phase: str, budget: float, acked: bool = False) -> float:
+        """Finish a print phase as soon as the printer is ready, within *budget* s.
+
+        With status pacing a phase whose command was *acked* ("OK") is done
+        at once; otherwise 10 FF 40 is sent, with the normal reply timeout,
+        since the printer handles commands in order and the answer proves
+        everything before it was consumed.  While the answer says the head
+        is still printing, status is polled again until *budget* runs out.
+        A fault in the answer raises PrinterNotReady (overheating is waited
+        out when *self.thermal* is set).  Only a query that gets no answer
+        at all falls back to sleeping what is left of the fixed delay.
+        With fixed pacing the full budget is always slept.  Returns the
+        seconds waited.
+        """
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        deadline = t0 + budget
+        with span(self.trace, phase, "wait", budget=budget, pacing=self.pacing):
+            if self.pacing == "fixed":
+                await asyncio.sleep(budget)
+            elif not acked:
+                while True:
+                    try:
+                        status = await self.get_status()
+                    except PrinterTimeout:
+                        await asyncio.sleep(max(0.0, deadline - loop.time()))
+                        break
+                    await self._check_ready(status)
+                    left = deadline - loop.time()
+                    if not status.printing or left <= 0:
+                        break
+                    await asyncio.sleep(min(DELAY_STATUS_POLL, left))
+        waited = loop.time() - t0
+        entry = self.phase_times.setdefault(phase, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += waited
+        entry[2] += budget
+        return waited
+
+    async def _check_ready(self, status: PrinterStatus) -> None:
+        """Raise PrinterNotReady for a fault; a thermal scheduler waits out overheating."""
+        if status.ok:
+            return
+        if self.thermal is not None and status.overheated and not (status.cover_open
+                                                                   or status.no_paper):
+            await self.thermal.cool_down(self, status)
+        else:
+            raise PrinterNotReady(f"Printer not ready: {status}")
+
+    def pacing_summary(self) -> dict:
+        """Totals from phase_times: seconds waited vs. the fixed-delay budget."""
+        waited = sum(e[1] for e in self.phase_times.values())
+        budget = sum(e[2] for e in self.phase_times.values())
+        labels = max(self.labels_printed, 1)
         return {
-            "model": await self.get_model(),
-            "firmware": await self.get_firmware(),
-            "boot": await self.get_boot_version(),
-            "serial": await self.get_serial(),
-            "battery": f"{await self.get_battery()}%",
+            "waited": waited,
+            "budget": budget,
+            "saved_per_label": (budget - waited) / labels,
+            "phases": {k: {"count": e[0], "waited": e[1], "budget": e[2]}
+                       for k, e in self.phase_times.items()},
+        }
+
+    async def get_info(self) -> dict:
+        """Status, identity, battery and settings in two round trips.
+
+        The framed queries, with 10 FF 70 for firmware, serial and MACs, are
+        pipelined together with the model string.  Only the boot version
+        needs a second round trip, since two ASCII replies in a row cannot
+        be told apart.
+        """
+        status, all_info, battery, shutdown, model = await asyncio.gather(
+            self.get_status(),
+            self.get_all_info(),
+            self.get_battery(),
+            self.get_shutdown_time(),
+            self.get_model(),
+        )
+        boot = await self.get_boot_version()
+        firmware = all_info.get("firmware") or await self.get_firmware()
+        serial = all_info.get("serial") or await self.get_serial()
+        info = {
+            "model": model,
+            "firmware": firmware,
+            "boot": boot,
+            "serial": serial,
+            "battery": f"{battery}%",
             "status": str(status),
-            "shutdown": f"{await self.get_shutdown_time()} min",
+            "shutdown": f"{shutdown} min",
         }
+        for key in ("bt_name", "mac_classic", "mac_ble"):
+            if key in all_info:
+                info[key] = all_info[key]
+        return info
+
+
+async def as_async_iter(items: Iterable | AsyncIterable):
+    """Iterate a plain or async iterable alike, with async for."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
 
 @asynccontextmanager
@@ -363,18 +1064,87 @@ async def connect(
     address: str | None = None,
     classic: bool = False,
     channel: int = RFCOMM_CHANNEL,
+    simulate: "bool | SimulatedPrinter" = False,
+    trace: Hook | None = None,
 ) -> AsyncGenerator[PrinterClient, None]:
-    """Discover printer, connect, and yield a ready PrinterClient."""
-    if classic:
+    """Discover printer, connect, and yield a ready PrinterClient.
+
+    Without an *address*, BLE first tries the printer remembered from the
+    last scan and only scans if that connect fails.  Classic Bluetooth can't
+    scan, but falls back to the classic MAC learned from a previous BLE
+    session.
+
+    *simulate* connects to an in-process SimulatedPrinter instead (pass an
+    instance to control bandwidth, faults etc.); *classic* then picks the
+    RFCOMM link profile.
+
+    *trace* is a fichero.trace hook: it gets "scan" and "connect" events
+    here and is handed to the PrinterClient for everything after.
+    """
+    if simulate:
+        from fichero.simulator import SimulatedPrinter
+
+        if not isinstance(simulate, SimulatedPrinter):
+            simulate = SimulatedPrinter("classic" if classic else "ble")
+        async with AsyncExitStack() as stack:
+            with span(trace, "connect", "link", transport="sim"):
+                client = await stack.enter_async_context(simulate)
+            pc = PrinterClient(client, trace=trace)
+            await pc.start()
+            yield pc
+    elif classic:
+        address = address or load_known_printer().get("mac_classic")
         if not address:
             raise PrinterError("--address is required for Classic Bluetooth (no scanning)")
-        async with RFCOMMClient(address, channel) as client:
-            pc = PrinterClient(client)
+        async with AsyncExitStack() as stack:
+            with span(trace, "connect", "link", transport="classic", address=address):
+                client = await stack.enter_async_context(RFCOMMClient(address, channel))
+            pc = PrinterClient(client, trace=trace)
             await pc.start()
             yield pc
     else:
-        addr = address or await find_printer()
-        async with BleakClient(addr) as client:
-            pc = PrinterClient(client)
+        async with AsyncExitStack() as stack:
+            client = await _open_ble(stack, address, trace)
+            pc = PrinterClient(client, trace=trace)
             await pc.start()
+            tuning = load_tuning(client.address)
+            # pacing measured on other firmware says nothing about this one
+            if tuning and tuning.get("firmware") == await pc.get_firmware():
+                pc.chunk_size, pc.chunk_gap = tuning["chunk_size"], tuning["chunk_gap"]
+                pc._gap = pc.chunk_gap
+            if not address:
+                await _learn_classic_mac(pc)
             yield pc
+
+
+async def _open_ble(
+    stack: AsyncExitStack, address: str | None, trace: Hook | None = None
+) -> "BleakClient":
+    """Connect to *address*, else the remembered printer, else scan."""
+    BleakClient = _bleak("BleakClient")
+    if address:
+        with span(trace, "connect", "link", transport="ble", address=address):
+            return await stack.enter_async_context(BleakClient(address))
+    known = load_known_printer().get("address")
+    if known:
+        try:
+            with span(trace, "connect", "link", transport="ble", address=known):
+                return await stack.enter_async_context(BleakClient(known))
+        except (_bleak("BleakError"), asyncio.TimeoutError, OSError) as e:
+            print(f"  Remembered printer {known} not reachable ({e}), scanning...")
+    with span(trace, "scan", "link"):
+        found = await find_printer()
+    with span(trace, "connect", "link", transport="ble", address=found):
+        return await stack.enter_async_context(BleakClient(found))
+
+
+async def _learn_classic_mac(pc: PrinterClient) -> None:
+    """Store the classic MAC from 10 FF 70 once, so --classic needs no --address."""
+    if load_known_printer().get("mac_classic"):
+        return
+    try:
+        mac = (await pc.get_all_info()).get("mac_classic")
+    except PrinterError:
+        return
+    if mac:
+        save_known_printer(mac_classic=mac)
@@ -0,0 +1,98 @@
+"""Wire-size optimizer for packed rasters.
+
+A label is normally sent as one GS v 0 mode 0 block, 12 bytes per row.
+encode_raster() instead picks, row by row, the cheapest of three encodings:
+
+- a mode 0 block row (12 bytes, 8 more to open a new block)
+- a mode 2 (double-height) block row covering two identical rows
+- a 1B 4A nn paper feed over up to 255 all-white rows (3 bytes)
+
+The choice is an exact dynamic program over the byte cost, so white
+margins turn into feeds and vertically doubled content (large text,
+upscaled images) goes out at half size.  The printed result is identical.
+"""
+
+from fichero.printer import BYTES_PER_ROW, raster_header
+
+HEADER_BYTES = 8
+FEED_BYTES = 3
+MAX_FEED = 255
+MAX_BLOCK_ROWS = 0xFFFF
+
+# Plan step kinds
+RAW, DOUBLE, FEED = "raw", "double", "feed"
+
+# Open-block state while planning
+_NONE, _RAW, _DOUBLE = 0, 1, 2
+
+
+def _rows(raster: bytes) -> list[bytes]:
+    if len(raster) % BYTES_PER_ROW:
+        raise ValueError(f"Raster length {len(raster)} is not a multiple of {BYTES_PER_ROW}")
+    return [raster[i : i + BYTES_PER_ROW] for i in range(0, len(raster), BYTES_PER_ROW)]
+
+
+def plan_raster(raster: bytes) -> list[tuple[str, int, int]]:
+    """Cheapest encoding of *raster* as (kind, first_row, printed_rows) steps.
+
+    Consecutive steps of the same block kind are merged, so every RAW or
+    DOUBLE step is one GS v 0 block and every FEED step one 1B 4A command.
+    """
+    rows = _rows(raster)
+    n = len(rows)
+    blank = bytes(BYTES_PER_ROW)
+    run = [0] * (n + 1)  # all-white rows starting at i
+    for i in range(n - 1, -1, -1):
+        run[i] = run[i + 1] + 1 if rows[i] == blank else 0
+
+    # cost[i][state]: bytes to encode rows[i:] with *state* block already open
+    inf = float("inf")
+    cost = [[0, 0, 0] for _ in range(n + 1)]
+    step = [[RAW] * 3 for _ in range(n)]
+    for i in range(n - 1, -1, -1):
+        pair = i + 1 < n and rows[i] == rows[i + 1]
+        for state in (_NONE, _RAW, _DOUBLE):
+            best, kind = 12 + (0 if state == _RAW else HEADER_BYTES) + cost[i + 1][_RAW], RAW
+            c = (12 + (0 if state == _DOUBLE else HEADER_BYTES) + cost[i + 2][_DOUBLE]
+                 if pair else inf)
+            if c < best:
+                best, kind = c, DOUBLE
+            if run[i]:
+                c = FEED_BYTES + cost[i + min(run[i], MAX_FEED)][_NONE]
+                if c < best:
+                    best, kind = c, FEED
+            cost[i][state] = best
+            step[i][state] = kind
+
+    plan: list[tuple[str, int, int]] = []
+    i, state = 0, _NONE
+    while i < n:
+        kind = step[i][state]
+        span = {RAW: 1, DOUBLE: 2, FEED: min(run[i], MAX_FEED)}[kind]
+        if kind != FEED and plan and plan[-1][0] == kind and state != _NONE:
+            k, start, printed = plan[-1]
+            plan[-1] = (k, start, printed + span)
+        else:
+            plan.append((kind, i, span))
+        state = {RAW: _RAW, DOUBLE: _DOUBLE, FEED: _NONE}[kind]
+        i += span
+    return plan
+
+
+def encode_raster(raster: bytes) -> bytes:
+    """Command stream that prints *raster* exactly, in as few bytes as planned."""
+    out = bytearray()
+    for kind, start, printed in plan_raster(raster):
+        if kind == FEED:
+            out += bytes([0x1B, 0x4A, printed])
+            continue
+        stride = 2 if kind == DOUBLE else 1
+        mode = 2 if kind == DOUBLE else 0
+        data_rows = printed // stride
+        for first in range(0, data_rows, MAX_BLOCK_ROWS):
+            count = min(MAX_BLOCK_ROWS, data_rows - first)
+            out += raster_header(count, mode=mode)
+            for r in range(count):
+                row = start + (first + r) * stride
+                out += raster[row * BYTES_PER_ROW : (row + 1) * BYTES_PER_ROW]
+    return bytes(out)
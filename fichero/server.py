@@ -0,0 +1,232 @@
+"""Print daemon: one persistent printer connection, jobs over a local socket.
+
+Clients send one JSON object per line and get one JSON reply per line:
+
+    {"text": "Hello", "copies": 2}            -> {"ok": true}
+    {"image": "/tmp/logo.png", "dither": "bayer"}
+    {"op": "status"}                          -> {"ok": true, "connected": ..., ...}
+
+Print jobs accept the same fields as a `fichero batch` row (text, image,
+copies, font_size, label_height) plus density, paper and dither.  Jobs are
+rendered as soon as they arrive and printed strictly in arrival order.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+
+from fichero.batch import render_label, row_to_spec
+from fichero.printer import RFCOMM_CHANNEL, PrinterClient, PrinterNotReady, connect
+
+log = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 60.0   # idle status poll; keeps the printer awake and probes the link
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 30.0
+
+PAPER_TYPES = {"gap": 0, "black": 1, "continuous": 2}
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "fichero.sock")
+    return os.path.join(tempfile.gettempdir(), f"fichero-{os.getuid()}.sock")
+
+
+def _reply(done: asyncio.Future, result: dict) -> None:
+    if not done.done():  # its submitter may have been cancelled meanwhile
+        done.set_result(result)
+
+
+class PrintServer:
+    """Owns one PrinterClient, reconnecting with backoff, and a FIFO job queue."""
+
+    def __init__(
+        self,
+        address: str | None = None,
+        classic: bool = False,
+        channel: int = RFCOMM_CHANNEL,
+        simulate: bool = False,
+        density: int = 2,
+        paper: int = 0,
+        keepalive: float = KEEPALIVE_INTERVAL,
+    ):
+        self.address = address
+        self.classic = classic
+        self.channel = channel
+        self.simulate = simulate
+        self.density = density
+        self.paper = paper
+        self.keepalive = keepalive
+        self.printed = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pc: PrinterClient | None = None
+        self._pending: tuple | None = None  # dequeued, not yet sent when the link died
+
+    # --- Jobs ---
+
+    async def submit(self, job: dict) -> dict:
+        """Queue a print job and wait until it has printed (or failed)."""
+        spec = row_to_spec(job, dither=job.get("dither", "fs"))
+        paper = job.get("paper", self.paper)
+        if isinstance(paper, str):
+            if paper not in PAPER_TYPES:
+                raise ValueError(f"unknown paper type {paper!r}")
+            paper = PAPER_TYPES[paper]
+        density = int(job.get("density", self.density))
+        if not 0 <= density <= 2:
+            raise ValueError("density must be 0, 1, or 2")
+
+        loop = asyncio.get_running_loop()
+        render = loop.run_in_executor(None, render_label, spec)
+        done = loop.create_future()
+        await self._queue.put((spec, density, paper, render, done))
+        return await done
+
+    async def status(self) -> dict:
+        info = {
+            "ok": True,
+            "connected": self._pc is not None,
+            "queued": self._queue.qsize(),
+            "printed": self.printed,
+        }
+        if self._pc is not None:
+            info["status"] = str(await self._pc.get_status())
+        return info
+
+    # --- Printer side ---
+
+    async def run_printer(self) -> None:
+        """Connect, serve jobs until the link fails, then reconnect. Never returns."""
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                async with connect(self.address, classic=self.classic,
+                                   channel=self.channel, simulate=self.simulate) as pc:
+                    log.info("Printer connected")
+                    self._pc = pc
+                    delay = RECONNECT_MIN
+                    await self._serve_jobs(pc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Printer link lost (%s), reconnecting in %.0fs", e, delay)
+            finally:
+                self._pc = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _serve_jobs(self, pc: PrinterClient) -> None:
+        """Print queued jobs in order; poll status while idle to keep the printer awake.
+
+        A job dequeued before the previous link died, but not yet started,
+        goes first.  Once a job's raster has started sending it is never
+        retried, so a dropped link cannot cause a duplicate label.
+        """
+        while True:
+            if self._pending is None:
+                try:
+                    self._pending = await asyncio.wait_for(self._queue.get(),
+                                                           timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    await pc.get_status()
+                    continue
+            spec, density, paper, render, done = self._pending
+            if done.cancelled():  # the submitting handler was cancelled: nobody to print for
+                self._pending = None
+                continue
+            try:
+                raster = await render
+            except Exception as e:
+                self._pending = None
+                _reply(done, {"ok": False, "error": f"render failed: {e}"})
+                continue
+
+            self._pending = None
+            try:
+                ok = await pc.print_raster(raster, density, paper=paper, copies=spec["copies"])
+            except PrinterNotReady as e:
+                _reply(done, {"ok": False, "error": str(e)})
+                continue
+            except BaseException as e:
+                _reply(done, {"ok": False, "error": f"printer link lost: {e}"})
+                raise
+            self.printed += spec["copies"]
+            _reply(done, {"ok": ok})
+
+    # --- Client side ---
+
+    async def _dispatch(self, req: dict) -> dict:
+        op = req.get("op", "print")
+        if op == "status":
+            return await self.status()
+        if op == "print":
+            return await self.submit(req)
+        raise ValueError(f"unknown op {op!r}")
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("expected a JSON object")
+                    resp = await self._dispatch(req)
+                except Exception as e:
+                    resp = {"ok": False, "error": str(e)}
+                writer.write((json.dumps(resp) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(
+    server: PrintServer,
+    path: str | None = None,
+    port: int | None = None,
+) -> None:
+    """Run *server* on a Unix socket at *path*, or on 127.0.0.1:*port*."""
+    if port is not None:
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", port)
+        where = f"127.0.0.1:{port}"
+    else:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available here, use --port")
+        path = path or default_socket_path()
+        if os.path.exists(path):
+            os.unlink(path)
+        listener = await asyncio.start_unix_server(server.handle_client, path)
+        os.chmod(path, 0o600)
+        where = path
+    log.info("Listening on %s", where)
+    printer = asyncio.create_task(server.run_printer())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        printer.cancel()
+        if port is None and os.path.exists(path):
+            os.unlink(path)
+
+
+async def submit(job: dict, path: str | None = None, port: int | None = None) -> dict:
+    """Send one request to a running daemon and return its reply."""
+    if port is not None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    else:
+        reader, writer = await asyncio.open_unix_connection(path or default_socket_path())
+    try:
+        writer.write((json.dumps(job) + "\n").encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
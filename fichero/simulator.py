@@ -0,0 +1,327 @@
+"""Simulated D11s printer transport for offline testing and benchmarking.
+
+SimulatedPrinter duck-types the async context manager + write_gatt_char /
+start_notify interface of BleakClient (like RFCOMMClient does), parses the
+command stream documented in docs/PROTOCOL.md and answers like the real
+printer.  Link bandwidth, latency and print-head speed are configurable so
+end-to-end job timings are meaningful without hardware.
+"""
+
+import asyncio
+
+from fichero.printer import BYTES_PER_ROW, PrinterError
+from fichero.thermal import HEAT_TAU, HeatModel, label_heat
+
+# name: (bandwidth bytes/s, one-way latency s, notification payload size)
+TRANSPORT_PROFILES = {
+    "ble": (10_000, 0.015, 20),
+    "classic": (40_000, 0.010, 1024),
+}
+
+ROWS_PER_SECOND = 400   # ~50 mm/s at 8 dots/mm
+FORM_FEED_ROWS = 24     # paper advanced to reach the next label gap
+HEAT_RESET = 0.6        # overheated clears once heat falls to this fraction of the limit
+
+# Fixed command lengths for 10 FF xx (sub-command byte -> total length)
+_CMD_LEN_10FF = {
+    0x04: 3, 0x10: 5, 0x11: 3, 0x12: 5, 0x13: 3, 0x15: 5, 0x20: 4, 0x40: 3,
+    0x50: 4, 0x70: 3, 0x84: 4, 0xB0: 3, 0xC0: 4, 0xFE: 4,
+}
+
+
+class SimulatedPrinter:
+    """In-process D11s model.  Pass to PrinterClient or use connect(simulate=...).
+
+    Printed raster blocks are recorded in *rasters* as (rows, data, mode),
+    and *printed* holds the resulting paper, row by row (feeds as white).
+    Fault flags (cover_open, no_paper, overheated) may be flipped at any
+    time; a raster sent while one is set is rejected with an FF nn frame.
+    With *heat_limit*, printing heats the head (fichero.thermal.HeatModel
+    with *heat_tau*) and sets overheated once the limit is passed, until
+    it cools to HEAT_RESET of the limit.
+    """
+
+    def __init__(
+        self,
+        transport: str = "ble",
+        bandwidth: float | None = None,
+        latency: float | None = None,
+        rows_per_second: float = ROWS_PER_SECOND,
+        battery: int = 86,
+        firmware: str = "2.4.6",
+        address: str = "SIM:00:00:00:00:00",
+        heat_limit: float | None = None,
+        heat_tau: float = HEAT_TAU,
+    ):
+        if transport not in TRANSPORT_PROFILES:
+            raise ValueError(f"Unknown transport {transport!r}")
+        bw, lat, notify = TRANSPORT_PROFILES[transport]
+        self.is_classic = transport == "classic"
+        self.address = address
+        self.bandwidth = bandwidth if bandwidth is not None else bw
+        self.latency = latency if latency is not None else lat
+        self.notify_size = notify
+        self.rows_per_second = rows_per_second
+        self.mtu_size = 247 if not self.is_classic else None
+        self.heat = HeatModel(heat_tau, heat_limit) if heat_limit else None
+
+        # Device state
+        self.battery = battery
+        self.firmware = firmware
+        self.model = "D11s"
+        self.serial = "SIM0000001"
+        self.density = 1
+        self.paper = 0
+        self.shutdown_minutes = 20
+        self.cover_open = False
+        self.no_paper = False
+        self.overheated = False
+        self.charging = False
+        self.enabled = False
+
+        # Observability
+        self.rasters: list[tuple[int, bytes, int]] = []
+        self.commands: list[bytes] = []
+        self.form_feeds = 0
+        self.bytes_received = 0
+        self.rows_fed = 0
+        self.printed = bytearray()  # every row that went past the head, 12 bytes each
+
+        self._rx = bytearray()
+        self._callback = None
+        self._head_busy_until = 0.0
+        self._tx_busy_until = 0.0
+        self._timers: set[asyncio.TimerHandle] = set()
+        self._connected = False
+
+    # --- Transport interface ---
+
+    async def __aenter__(self) -> "SimulatedPrinter":
+        self._connected = True
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._connected = False
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+
+    async def write_gatt_char(self, _uuid: str, data: bytes, response: bool = False) -> None:
+        if not self._connected:
+            raise PrinterError("Simulated printer is not connected")
+        if self.bandwidth:
+            await asyncio.sleep(len(data) / self.bandwidth)
+        self.bytes_received += len(data)
+        self._rx.extend(data)
+        self._parse()
+
+    async def start_notify(self, _uuid: str, callback) -> None:
+        self._callback = callback
+
+    def drop_link(self) -> None:
+        """Lose the connection like a BLE dropout: writes fail and pending
+        replies are lost until the next connect.  Printer state is kept."""
+        self._connected = False
+        self._rx.clear()
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+
+    # --- Status ---
+
+    @property
+    def printing(self) -> bool:
+        return asyncio.get_running_loop().time() < self._head_busy_until
+
+    def _cool(self) -> None:
+        if self.heat is not None and self.overheated:
+            now = asyncio.get_running_loop().time()
+            if self.heat.level(now) <= self.heat.limit * HEAT_RESET:
+                self.overheated = False
+
+    @property
+    def status_byte(self) -> int:
+        self._cool()
+        return (
+            (0x01 if self.printing else 0)
+            | (0x02 if self.cover_open else 0)
+            | (0x04 if self.no_paper else 0)
+            | (0x08 if self.battery < 15 else 0)
+            | (0x40 if self.overheated else 0)
+            | (0x20 if self.charging else 0)
+        )
+
+    @property
+    def error_bits(self) -> int:
+        """FF nn error bitmask (bit 0 overheated, 1 cover, 2 paper, 3 battery)."""
+        self._cool()
+        return (
+            (0x01 if self.overheated else 0)
+            | (0x02 if self.cover_open else 0)
+            | (0x04 if self.no_paper else 0)
+            | (0x08 if self.battery < 5 else 0)
+        )
+
+    # --- Responses ---
+
+    def _reply(self, data: bytes, delay: float = 0.0) -> None:
+        """Deliver *data* as notifications, fragmented like the real link."""
+        if self._callback is None:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        at = now + delay + self.latency
+        for i in range(0, len(data), self.notify_size):
+            frag = bytearray(data[i : i + self.notify_size])
+            # Notifications are delivered in order, like on the real link
+            at = max(at, self._tx_busy_until)
+            if self.bandwidth:
+                at += len(frag) / self.bandwidth
+            self._tx_busy_until = at
+            self._schedule(loop, at - now, frag)
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, delay: float, frag: bytearray) -> None:
+        def deliver() -> None:
+            self._timers.discard(handle)
+            self._callback(None, frag)
+
+        handle = loop.call_later(delay, deliver)
+        self._timers.add(handle)
+
+    def _head_advance(self, rows: int) -> None:
+        """Queue *rows* of paper movement on the print head."""
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._head_busy_until)
+        self._head_busy_until = start + rows / self.rows_per_second
+        self.rows_fed += rows
+
+    # --- Command parser ---
+
+    def _parse(self) -> None:
+        buf = self._rx
+        while buf:
+            n = self._command_length(buf)
+            if n is None or n > len(buf):
+                return  # wait for the rest of the command
+            cmd = bytes(buf[:n])
+            del buf[:n]
+            if cmd != b"\x00":
+                self.commands.append(cmd[:8])
+            self._execute(cmd)
+
+    def _command_length(self, buf: bytearray) -> int | None:
+        b0 = buf[0]
+        if b0 == 0x10:
+            if len(buf) < 2:
+                return None
+            if buf[1] == 0x0C:
+                return 2
+            if buf[1] != 0xFF:
+                return 1
+            if len(buf) < 3:
+                return None
+            return _CMD_LEN_10FF.get(buf[2], 3)
+        if b0 == 0x1D:
+            if len(buf) < 2:
+                return None
+            if buf[1] == 0x0C:
+                return 2
+            if buf[1] == 0x76:
+                if len(buf) < 8:
+                    return None
+                width = buf[4] | (buf[5] << 8)
+                height = buf[6] | (buf[7] << 8)
+                return 8 + width * height
+            return 1
+        if b0 == 0x1B:
+            if len(buf) < 2:
+                return None
+            return 3 if buf[1] == 0x4A else 1
+        if b0 == 0x1F:
+            return 4
+        return 1  # NUL wakeup padding and anything unknown
+
+    def _execute(self, cmd: bytes) -> None:
+        if cmd[0] == 0x10 and len(cmd) >= 3 and cmd[1] == 0xFF:
+            self._execute_10ff(cmd)
+        elif cmd == b"\x10\x0c":
+            self.form_feeds += 1
+            self._head_advance(FORM_FEED_ROWS)
+            self._reply(b"OK")
+        elif cmd == b"\x1d\x0c":
+            self.form_feeds += 1
+            self._head_advance(FORM_FEED_ROWS)
+        elif cmd[:2] == b"\x1b\x4a":
+            self._head_advance(cmd[2])
+            if self.enabled:
+                self.printed += bytes(BYTES_PER_ROW * cmd[2])
+        elif cmd[:2] == b"\x1d\x76":
+            self._raster(cmd)
+
+    def _execute_10ff(self, cmd: bytes) -> None:
+        sub = cmd[2]
+        if sub == 0x20:
+            text = {0xF0: self.model, 0xF1: self.firmware, 0xF2: self.serial,
+                    0xEF: "V1.00"}.get(cmd[3])
+            if text is not None:
+                self._reply(text.encode())
+        elif sub == 0x40:
+            self._reply(bytes([self.status_byte]))
+        elif sub == 0x50 and cmd[3] == 0xF1:
+            self._reply(bytes([0x01 if self.charging else 0x00, self.battery]))
+        elif sub == 0x11:
+            self._reply(bytes([0x01, 0x14, self.density]))
+        elif sub == 0x13:
+            self._reply(self.shutdown_minutes.to_bytes(2, "big"))
+        elif sub == 0x70:
+            mac = self.address.replace("SIM", "00")
+            self._reply(f"FICHERO_SIM|{mac}|{mac}|{self.firmware}|{self.serial}|"
+                        f"{self.battery}".encode())
+        elif sub == 0x10:
+            self.density = cmd[4]
+            self._reply(b"OK")
+        elif sub == 0x84:
+            self.paper = cmd[3]
+            self._reply(b"OK")
+        elif sub == 0x12:
+            self.shutdown_minutes = (cmd[3] << 8) | cmd[4]
+            self._reply(b"OK")
+        elif sub == 0x04:
+            self.density, self.paper, self.shutdown_minutes = 1, 0, 20
+            self._reply(b"OK")
+        elif sub == 0xFE and cmd[3] == 0x01:
+            self.enabled = True
+        elif sub == 0xFE and cmd[3] == 0x45:
+            self.enabled = False
+            # Acknowledge once the head has finished everything queued so far
+            loop = asyncio.get_running_loop()
+            remaining = max(0.0, self._head_busy_until - loop.time())
+            self._reply(b"\xaa", delay=remaining)
+        # Anything else (speed, width, time format...) is silently ignored,
+        # exactly as the D11s does.
+
+    def _raster(self, cmd: bytes) -> None:
+        if self.error_bits:
+            self._reply(bytes([0xFF, self.error_bits]))
+            return
+        if not self.enabled:
+            return  # wrong/missing enable: accepted silently, never printed
+        mode = cmd[3]
+        width = cmd[4] | (cmd[5] << 8)
+        rows = cmd[6] | (cmd[7] << 8)
+        data = cmd[8:]
+        if width != BYTES_PER_ROW:
+            return
+        rows_out = rows * (2 if mode in (2, 3) else 1)
+        self.rasters.append((rows, data, mode))
+        self._head_advance(rows_out)
+        if self.heat is not None and rows:
+            now = asyncio.get_running_loop().time()
+            self.heat.add(label_heat(data, self.density) * rows_out / rows, now)
+            if self.heat.level(now) > self.heat.limit:
+                self.overheated = True
+        if mode in (2, 3):
+            for i in range(0, len(data), BYTES_PER_ROW):
+                self.printed += data[i : i + BYTES_PER_ROW] * 2
+        else:
+            self.printed += data
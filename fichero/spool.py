@@ -0,0 +1,268 @@
+"""Precompiled print jobs: spool files that replay without any rendering.
+
+    with SpoolWriter("labels.spool", density=2) as out:
+        for raster in rasters:
+            out.add(raster)
+
+    with Spool("labels.spool") as spool:
+        await pc.print_job(spool, density=spool.density, paper=spool.paper)
+
+A spool file is a fixed header (job density, paper type and flags), the
+packed label rasters back to back, and an index of one (offset, stored
+length, raster length, encoding) entry per label at the end.  Spool
+memory-maps the file and yields every label as a memoryview of the map,
+so print_job passes send_chunked slices of the page cache: replaying
+decodes no image, packs no bits and copies no raster.
+
+Rasters that PackBits run-length encoding makes smaller (white margins,
+solid fills) are stored encoded and expanded on replay, one step per run
+rather than per pixel.  Identical rasters, such as copies, are stored once
+and indexed as often as they are printed.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+from fichero.printer import BYTES_PER_ROW, PAPER_GAP, as_raster
+
+MAGIC = b"FSPL"
+VERSION = 1
+
+# magic, version, density (NO_DENSITY: leave as set), paper, flags, labels, index offset
+_HEADER = struct.Struct("<4sBBBBIQ")
+# data offset, stored bytes, raster bytes, encoding
+_ENTRY = struct.Struct("<QIIB3x")
+
+NO_DENSITY = 0xFF
+FLAG_COMPACT = 0x01  # replay with print_job(compact=True)
+
+# Label encodings
+RAW, PACKBITS = 0, 1
+
+
+# --- PackBits ---
+
+_RUN = re.compile(rb"(.)\1{2,}", re.DOTALL)  # runs worth a repeat code
+
+
+def packbits(data) -> bytes:
+    """PackBits (TIFF/Apple) run-length encoding of *data*.
+
+    Header byte n < 128 is followed by n + 1 literal bytes; n > 128 by one
+    byte repeated 257 - n times.
+    """
+    data = bytes(data)
+    out = bytearray()
+
+    def literal(chunk: bytes) -> None:
+        for i in range(0, len(chunk), 128):
+            part = chunk[i : i + 128]
+            out.append(len(part) - 1)
+            out.extend(part)
+
+    pos = 0
+    for m in _RUN.finditer(data):
+        literal(data[pos : m.start()])
+        left = m.end() - m.start()
+        while left:
+            n = min(left, 128)
+            if n == 1:
+                out += bytes((0, data[m.start()]))
+            else:
+                out += bytes((257 - n, data[m.start()]))
+            left -= n
+        pos = m.end()
+    literal(data[pos:])
+    return bytes(out)
+
+
+def unpackbits(data, size: int) -> bytes:
+    """Expand PackBits *data*, which must decode to exactly *size* bytes."""
+    out = bytearray()
+    i, end = 0, len(data)
+    while i < end:
+        n = data[i]
+        if n < 128:
+            out += data[i + 1 : i + n + 2]
+            i += n + 2
+        elif n > 128:
+            out += bytes((data[i + 1],)) * (257 - n)
+            i += 2
+        else:
+            i += 1  # 128 is a no-op
+    if len(out) != size:
+        raise ValueError(f"Corrupt PackBits data: {len(out)} bytes decoded, expected {size}")
+    return bytes(out)
+
+
+# --- Writing ---
+
+
+class SpoolWriter:
+    """Build a spool file label by label; it appears at *path* on close().
+
+    The file is written under a temporary name and renamed into place, so
+    an interrupted compile never leaves a truncated spool behind.  *rle*
+    False stores every raster as is.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        density: int | None = None,
+        paper: int = PAPER_GAP,
+        compact: bool = False,
+        rle: bool = True,
+    ):
+        self.path = Path(path)
+        self.density = density
+        self.paper = paper
+        self.compact = compact
+        self.rle = rle
+        self.raster_bytes = 0
+        self._entries: list[tuple[int, int, int, int]] = []
+        self._stored: dict[bytes, tuple[int, int, int, int]] = {}
+        fd, self._tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        self._f = os.fdopen(fd, "wb")
+        self._f.write(bytes(_HEADER.size))
+
+    def add(self, raster) -> None:
+        """Append a label: a packed raster or a 2-D array, as for print_job."""
+        view = as_raster(raster)
+        if len(view) % BYTES_PER_ROW:
+            raise ValueError(f"Raster length {len(view)} is not a multiple of {BYTES_PER_ROW}")
+        digest = hashlib.sha256(view).digest()
+        entry = self._stored.get(digest)
+        if entry is None:
+            data, encoding = view, RAW
+            if self.rle:
+                packed = packbits(view)
+                if len(packed) < len(view):
+                    data, encoding = packed, PACKBITS
+            entry = (self._f.tell(), len(data), len(view), encoding)
+            self._f.write(data)
+            self._stored[digest] = entry
+        self._entries.append(entry)
+        self.raster_bytes += len(view)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """Write the index and header, and move the file into place."""
+        try:
+            index = self._f.tell()
+            for entry in self._entries:
+                self._f.write(_ENTRY.pack(*entry))
+            density = NO_DENSITY if self.density is None else self.density
+            flags = FLAG_COMPACT if self.compact else 0
+            self._f.seek(0)
+            self._f.write(_HEADER.pack(MAGIC, VERSION, density, self.paper, flags,
+                                       len(self._entries), index))
+            self._f.close()
+            os.replace(self._tmp, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        self._f.close()
+        Path(self._tmp).unlink(missing_ok=True)
+
+    def __enter__(self) -> "SpoolWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# --- Reading ---
+
+
+class Spool:
+    """A memory-mapped spool file, a sequence of its labels in print order.
+
+    Stored rasters come back as memoryviews of the map, PackBits ones as
+    bytes.  Raises ValueError for a file that is not a valid spool.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path}: not a spool file")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._index = self._read_index(size)
+        except ValueError:
+            self._map.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def _read_index(self, size: int) -> list[tuple[int, int, int, int]]:
+        magic, version, density, paper, flags, labels, index = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a spool file")
+        if version > VERSION:
+            raise ValueError(f"{self.path}: spool version {version} is newer than this "
+                             f"fichero ({VERSION})")
+        if index + labels * _ENTRY.size != size:
+            raise ValueError(f"{self.path}: truncated spool file")
+        self.density = None if density == NO_DENSITY else density
+        self.paper = paper
+        self.compact = bool(flags & FLAG_COMPACT)
+        entries = [_ENTRY.unpack_from(self._map, index + i * _ENTRY.size) for i in range(labels)]
+        for offset, stored, nbytes, encoding in entries:
+            if (offset < _HEADER.size or offset + stored > index or nbytes % BYTES_PER_ROW
+                    or encoding not in (RAW, PACKBITS) or (encoding == RAW and stored != nbytes)):
+                raise ValueError(f"{self.path}: corrupt spool index")
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> memoryview | bytes:
+        offset, stored, nbytes, encoding = self._index[i]
+        data = self._view[offset : offset + stored]
+        if encoding == PACKBITS:
+            return unpackbits(data, nbytes)
+        return data
+
+    def __iter__(self) -> Iterator[memoryview | bytes]:
+        for i in range(len(self._index)):
+            yield self[i]
+
+    def stats(self) -> dict:
+        unique = {entry[0]: entry for entry in self._index}.values()
+        return {
+            "labels": len(self._index),
+            "unique": len(unique),
+            "raster_bytes": sum(entry[2] for entry in self._index),
+            "file_bytes": len(self._map),
+            "rle": sum(1 for entry in unique if entry[3] == PACKBITS),
+        }
+
+    def close(self) -> None:
+        """Unmap the file.  Labels still referenced keep the map alive until dropped."""
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # a caller still holds a label view; unmapped once it is freed
+
+    def __enter__(self) -> "Spool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
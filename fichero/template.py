@@ -0,0 +1,340 @@
+"""Compiled label templates: a static 1-bit base plus re-rendered variable fields.
+
+Templates are read from the web designer's saved-label JSON (the file
+"Export" writes, or one entry of its saved labels):
+
+    {"label": {"size": {"width": 232, "height": 96}, "printDirection": "left"},
+     "canvas": {"objects": [{"type": "Textbox", "text": "SKU {sku}", ...}, ...]},
+     "csv": {"data": "sku,price\\n..."}}
+
+Text containing {name} placeholders (the designer's syntax, including
+{dt|YYYY-MM-DD}) is a variable field; everything else is static.  compile()
+draws the static layer once into a packed base raster, and render() copies
+that base and ORs in only the variable fields, each redrawn in its own small
+box.  Supported objects: text, QR codes, barcodes, rectangles, lines,
+circles and images.
+"""
+
+import base64
+import csv
+import functools
+import io
+import json
+import logging
+import re
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFont
+
+from fichero.barcode import code128, ean13, qr_matrix
+from fichero.imaging import CAPTION_GAP, floyd_steinberg_dither_rows
+from fichero.printer import PRINTHEAD_PX
+
+log = logging.getLogger(__name__)
+
+VARIABLE_RX = re.compile(r"{\s*(\$?\w+)\s*(?:\|\s*(.*?)\s*)?}")
+
+# dayjs tokens used by the designer's {dt|...} filter -> strftime
+_DT_TOKENS = [("YYYY", "%Y"), ("YY", "%y"), ("MM", "%m"), ("DD", "%d"),
+              ("HH", "%H"), ("mm", "%M"), ("ss", "%S")]
+
+_TEXT_TYPES = {"textbox", "itext", "text", "fabrictext"}
+
+
+def fill(text: str, record: dict) -> str:
+    """Substitute {name} placeholders from *record*, like the designer does.
+
+    {dt} and {dt|FORMAT} give the current time; unknown names are kept.
+    """
+    def sub(m: re.Match) -> str:
+        key, fmt = m.group(1), m.group(2)
+        if key in record:
+            return str(record[key])
+        if key == "dt":
+            fmt = fmt or "YYYY-MM-DD HH:mm:ss"
+            for token, code in _DT_TOKENS:
+                fmt = fmt.replace(token, code)
+            return datetime.now().strftime(fmt)
+        return m.group(0)
+
+    return VARIABLE_RX.sub(sub, text)
+
+
+@functools.lru_cache(maxsize=32)
+def _font(family: str | None, size: int) -> ImageFont.ImageFont:
+    for name in filter(None, [family, family and family.replace(" ", "") + ".ttf"]):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _ink(color) -> bool:
+    """True if a fabric fill/stroke colour prints as black."""
+    if not color or color == "transparent" or not isinstance(color, str):
+        return False
+    try:
+        return ImageColor.getcolor(color, "L") < 128
+    except ValueError:
+        return False
+
+
+class Field:
+    """A variable box: its template string, canvas box and how to draw it.
+
+    *draw(text, w, h)* returns an L image of the box with *text* drawn in.
+    """
+
+    def __init__(self, text: str, box: tuple[int, int, int, int],
+                 draw: Callable[[str, int, int], Image.Image]):
+        self.text = text
+        self.box = box  # x, y, w, h on the canvas
+        self.draw = draw
+
+
+def _text_image(font, align: str, text: str, w: int, h: int) -> Image.Image:
+    img = Image.new("L", (w, h), 255)
+    draw = ImageDraw.Draw(img)
+    draw.fontmode = "1"
+    anchor, at = {"center": ("ma", w / 2), "right": ("ra", w)}.get(align, ("la", 0))
+    draw.multiline_text((at, 0), text, fill=0, font=font, anchor=anchor, align=align)
+    return img
+
+
+def _modules_image(dark: np.ndarray, w: int, h: int) -> Image.Image:
+    """Paint a bool module array into the top left of a w x h box."""
+    box = np.full((h, w), 255, dtype=np.uint8)
+    dark = dark[:h, :w]
+    box[: dark.shape[0], : dark.shape[1]][dark] = 0
+    return Image.fromarray(box)
+
+
+def _qr_image(ecc: str, text: str, w: int, h: int) -> Image.Image:
+    try:
+        matrix = qr_matrix(text, ecc)
+    except ValueError as e:
+        log.warning("QR code %r: %s", text, e)
+        return Image.new("L", (w, h), 255)
+    m = max(1, min(w, h) // len(matrix))
+    return _modules_image(np.kron(matrix, np.ones((m, m), dtype=bool)), w, h)
+
+
+def _barcode_image(encoding: str, font, text: str, w: int, h: int) -> Image.Image:
+    try:
+        if encoding == "EAN13":
+            text, modules = ean13(text)
+        else:
+            modules = code128(text)
+    except ValueError as e:
+        log.warning("Barcode %r: %s", text, e)
+        return Image.new("L", (w, h), 255)
+    # Whole dots per module keep the bar edges sharp
+    bars = np.repeat(modules, max(1, w // len(modules)))
+    bar_h = h
+    if font is not None:
+        left, top, right, bottom = font.getbbox(text)
+        bar_h = max(1, h - (bottom - top) - CAPTION_GAP)
+    img = _modules_image(np.broadcast_to(bars, (bar_h, len(bars))), w, h)
+    if font is not None:
+        draw = ImageDraw.Draw(img)
+        draw.fontmode = "1"
+        draw.text(((min(w, len(bars)) - (right - left)) // 2 - left, h - bottom), text,
+                  fill=0, font=font)
+    return img
+
+
+class Template:
+    """A label layout compiled into a packed base raster plus variable fields.
+
+    *width* x *height* is the canvas in pixels.  With *direction* "left"
+    (the designer's default) the label runs along the canvas width and the
+    canvas height spans the 96px print head; with "top" the canvas width
+    spans the head.  The canvas is scaled so the head side is 96px.
+    """
+
+    def __init__(self, width: int, height: int, direction: str = "left"):
+        if direction not in ("left", "top"):
+            raise ValueError(f"Unknown print direction {direction!r}")
+        head = height if direction == "left" else width
+        self.scale = PRINTHEAD_PX / head
+        self.width = round(width * self.scale)
+        self.height = round(height * self.scale)
+        self.direction = direction
+        self.fields: list[Field] = []
+        self.csv: str | None = None  # CSV data saved with the template
+        self._canvas = Image.new("L", (self.width, self.height), 255)
+        self._base: np.ndarray | None = None
+
+    @property
+    def rows(self) -> int:
+        return self.width if self.direction == "left" else self.height
+
+    # --- Loading ---
+
+    @classmethod
+    def from_designer(cls, data: dict | str | Path) -> "Template":
+        """Build a template from the web designer's saved-label JSON (dict or path)."""
+        if not isinstance(data, dict):
+            data = json.loads(Path(data).read_text(encoding="utf-8"))
+        label = data.get("label") or {}
+        size = label.get("size") or {}
+        if not size.get("width") or not size.get("height"):
+            raise ValueError("template has no label.size")
+        tpl = cls(size["width"], size["height"], label.get("printDirection", "left"))
+        for obj in (data.get("canvas") or {}).get("objects", []):
+            tpl.add_object(obj)
+        tpl.csv = (data.get("csv") or {}).get("data")
+        return tpl
+
+    def _box(self, obj: dict) -> tuple[int, int, int, int]:
+        """Canvas box (x, y, w, h) of a fabric object, honouring origin and scale."""
+        s = self.scale
+        w = obj.get("width", 0) * obj.get("scaleX", 1)
+        h = obj.get("height", 0) * obj.get("scaleY", 1)
+        x, y = obj.get("left", 0), obj.get("top", 0)
+        x -= {"center": w / 2, "right": w}.get(obj.get("originX"), 0)
+        y -= {"center": h / 2, "bottom": h}.get(obj.get("originY"), 0)
+        return round(x * s), round(y * s), max(1, round(w * s)), max(1, round(h * s))
+
+    def add_object(self, obj: dict) -> None:
+        """Add one fabric object (as serialised by the designer) to the layout."""
+        kind = str(obj.get("type", "")).lower()
+        if obj.get("visible") is False:
+            return
+        if obj.get("angle"):
+            log.warning("Ignoring rotation of %s object", obj.get("type"))
+        box = self._box(obj)
+        if kind in _TEXT_TYPES:
+            font = _font(obj.get("fontFamily"), self._font_size(obj))
+            align = obj.get("textAlign", "left")
+            self.add_field(obj.get("text", ""), box, functools.partial(_text_image, font, align))
+        elif kind == "qrcode":
+            self.add_field(obj.get("text", ""), box,
+                           functools.partial(_qr_image, obj.get("ecl", "M")))
+        elif kind == "barcode":
+            font = (_font(obj.get("fontFamily"), self._font_size(obj))
+                    if obj.get("printText", True) else None)
+            self.add_field(obj.get("text", ""), box,
+                           functools.partial(_barcode_image, obj.get("encoding", "EAN13"), font))
+        elif kind in ("rect", "circle", "line"):
+            self._add_shape(kind, obj, box)
+        elif kind in ("image", "fabricimage"):
+            self._add_image(obj, box)
+        else:
+            log.warning("Skipping unsupported %s object", obj.get("type"))
+
+    def _font_size(self, obj: dict) -> int:
+        return max(1, round(obj.get("fontSize", 16) * obj.get("scaleY", 1) * self.scale))
+
+    def add_text(self, text: str, box, font=None, align: str = "left") -> None:
+        """Add text in canvas *box*; with {placeholders} it becomes a variable field."""
+        font = font or _font(None, max(1, box[3]))
+        self.add_field(text, box, functools.partial(_text_image, font, align))
+
+    def add_field(self, text: str, box, draw: Callable[[str, int, int], Image.Image]) -> None:
+        """Add a box drawn by *draw*: into the base, or per record if *text* has {names}."""
+        if VARIABLE_RX.search(text):
+            self.fields.append(Field(text, box, draw))
+        else:
+            self._paste(box, draw(text, box[2], box[3]))
+        self._base = None
+
+    def _paste(self, box, img: Image.Image, canvas: Image.Image | None = None) -> None:
+        canvas = canvas or self._canvas
+        x, y, w, h = box
+        area = (x, y, x + w, y + h)
+        canvas.paste(ImageChops.darker(canvas.crop(area), img), area)
+
+    def _add_shape(self, kind: str, obj: dict, box) -> None:
+        x, y, w, h = box
+        stroke = max(1, round(obj.get("strokeWidth", 1) * self.scale)) if _ink(obj.get("stroke")) else 0
+        fill = 0 if _ink(obj.get("fill")) else None
+        draw = ImageDraw.Draw(self._canvas)
+        rect = [x, y, x + w - 1, y + h - 1]
+        if kind == "rect":
+            draw.rectangle(rect, fill=fill, outline=0 if stroke else None, width=stroke)
+        elif kind == "circle":
+            draw.ellipse(rect, fill=fill, outline=0 if stroke else None, width=stroke)
+        elif stroke:
+            # Fabric lines keep their slope in x1..y2; the box gives the extent
+            rising = (obj.get("x2", 1) - obj.get("x1", 0)) * (obj.get("y2", 0) - obj.get("y1", 0)) < 0
+            ends = [(x, y + h - 1), (x + w - 1, y)] if rising else [(x, y), (x + w - 1, y + h - 1)]
+            draw.line(ends, fill=0, width=stroke)
+        self._base = None
+
+    def _add_image(self, obj: dict, box) -> None:
+        src = obj.get("src", "")
+        if not src.startswith("data:"):
+            log.warning("Skipping image that is not embedded as a data URL")
+            return
+        raw = base64.b64decode(src.split(",", 1)[1])
+        x, y, w, h = box
+        with Image.open(io.BytesIO(raw)) as img:
+            part = floyd_steinberg_dither_rows(img.convert("L").resize((w, h), Image.LANCZOS))
+        self._canvas.paste(part, (x, y))
+        self._base = None
+
+    # --- Rendering ---
+
+    def _to_raster_orientation(self, a: np.ndarray) -> np.ndarray:
+        """Canvas-oriented bool array -> raster rows (clockwise for "left", like the designer)."""
+        return np.rot90(a, -1) if self.direction == "left" else a
+
+    def compile(self) -> bytes:
+        """Pack the static layer into the base raster (done on first render too)."""
+        ink = np.asarray(self._canvas) < 128
+        self._base = np.packbits(self._to_raster_orientation(ink), axis=1)
+        return self._base.tobytes()
+
+    def _draw_field(self, field: Field, record: dict) -> Image.Image:
+        """*field* filled from *record*, drawn alone into an image of its box."""
+        _, _, w, h = field.box
+        return field.draw(fill(field.text, record), w, h)
+
+    def _field_strip(self, field: Field, record: dict) -> tuple[int, np.ndarray] | None:
+        """First raster row of *field* and the packed full-width rows it covers."""
+        x, y, w, h = field.box
+        patch = self._to_raster_orientation(np.asarray(self._draw_field(field, record)) < 128)
+        if self.direction == "left":
+            row0, col0 = x, self.height - y - h
+        else:
+            row0, col0 = y, x
+        # Clip to the label
+        r_lo, c_lo = max(0, -row0), max(0, -col0)
+        r_hi = min(patch.shape[0], self.rows - row0)
+        c_hi = min(patch.shape[1], PRINTHEAD_PX - col0)
+        if r_lo >= r_hi or c_lo >= c_hi:
+            return None
+        strip = np.zeros((r_hi - r_lo, PRINTHEAD_PX), dtype=bool)
+        strip[:, col0 + c_lo : col0 + c_hi] = patch[r_lo:r_hi, c_lo:c_hi]
+        return row0 + r_lo, np.packbits(strip, axis=1)
+
+    def render(self, record: dict | None = None) -> bytes:
+        """Packed raster for one record: the base with variable fields OR-ed in."""
+        if self._base is None:
+            self.compile()
+        out = self._base.copy()
+        for field in self.fields:
+            strip = self._field_strip(field, record or {})
+            if strip is not None:
+                row, packed = strip
+                out[row : row + len(packed)] |= packed
+        return out.tobytes()
+
+    def render_full(self, record: dict | None = None) -> bytes:
+        """Reference render: redraw the whole canvas for *record* and pack it."""
+        canvas = self._canvas.copy()
+        for field in self.fields:
+            self._paste(field.box, self._draw_field(field, record or {}), canvas)
+        ink = np.asarray(canvas) < 128
+        return np.packbits(self._to_raster_orientation(ink), axis=1).tobytes()
+
+    def records(self) -> list[dict]:
+        """Rows of the CSV data saved with the template, if any."""
+        if not self.csv:
+            return []
+        return list(csv.DictReader(io.StringIO(self.csv)))
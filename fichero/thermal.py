@@ -0,0 +1,190 @@
+"""Thermal-aware pacing for long print runs.
+
+    pc.thermal = ThermalScheduler(min_density=1)
+    await pc.print_job(rasters, density=2)
+    print(pc.thermal.stats())
+
+The D11s sets an overheated bit (0x10/0x40) and rejects rasters once its
+head gets too hot, which used to end a long job with PrinterNotReady.
+ThermalScheduler keeps an estimate of head heat instead: every label adds
+its black dots, weighted by density, and heat decays exponentially
+between labels.  Before a label would push the estimate over the limit,
+the scheduler pauses for exactly as long as the model says the head needs
+to cool, or prints at a lower density if that avoids a long pause and
+*min_density* allows it.
+
+The model is only an estimate (HEAT_TAU and HEAT_LIMIT are guesses, not
+measured on hardware), so an overheat report is still handled: the job
+waits for the bit to clear, polling status, and the limit is lowered to
+the heat estimated at the trip so the pauses fit this printer from then on.
+"""
+
+import asyncio
+import math
+
+from fichero.printer import PrinterClient, PrinterNotReady, PrinterStatus
+from fichero.trace import span
+
+HEAT_TAU = 20.0            # s, head cooling time constant
+HEAT_LIMIT = 150_000.0     # heat units (dot x density weight) at the overheat cut-off
+HEAT_MARGIN = 0.9          # schedule to this fraction of the limit
+DENSITY_HEAT = (0.7, 1.0, 1.3)  # relative heat per black dot at density 0, 1, 2
+DENSITY_PAUSE = 0.5        # s; a longer pause drops density instead, if allowed
+COOL_POLL = 2.0            # s between status polls while overheated (at most tau/4)
+COOL_TIMEOUT = 120.0       # s; still overheated after this raises PrinterNotReady
+
+
+def _now() -> float:
+    return asyncio.get_running_loop().time()
+
+
+def black_dots(raster) -> int:
+    """Number of set bits (printed dots) in a packed raster."""
+    return int.from_bytes(raster, "big").bit_count()
+
+
+def label_heat(raster, density: int) -> float:
+    """Heat a raster adds to the head at *density*."""
+    return black_dots(raster) * DENSITY_HEAT[density]
+
+
+class HeatModel:
+    """Head heat as a sum of label energies, each decaying with time constant *tau*."""
+
+    def __init__(self, tau: float = HEAT_TAU, limit: float = HEAT_LIMIT):
+        self.tau = tau
+        self.limit = limit
+        self._heat = 0.0
+        self._at: float | None = None
+
+    def level(self, now: float) -> float:
+        """Estimated heat at time *now* (seconds on any monotonic clock)."""
+        if self._at is None:
+            return 0.0
+        return self._heat * math.exp(-max(now - self._at, 0.0) / self.tau)
+
+    def add(self, heat: float, now: float) -> None:
+        self._heat = self.level(now) + heat
+        self._at = now
+
+    def pause_for(self, heat: float, now: float, target: float) -> float:
+        """Seconds to wait before adding *heat* keeps the level at or under *target*.
+
+        Heat that does not fit even on a cold head gets the time to cool
+        right down (four time constants).
+        """
+        level = self.level(now)
+        if level + heat <= target:
+            return 0.0
+        room = target - heat
+        if room <= 0:
+            return 4 * self.tau
+        return self.tau * math.log(level / room)
+
+
+class ThermalScheduler:
+    """Cool-down pauses and density steps that keep a job under the overheat cut-off.
+
+    Attach to a PrinterClient as *pc.thermal*; print_job and print_banner
+    then call before_label/after_label around every raster, and an
+    overheated status during the job goes to cool_down instead of raising.
+    *min_density* allows dropping the job's density down to that level
+    rather than pausing longer than *max_pause*; None never changes it.
+    """
+
+    def __init__(
+        self,
+        min_density: int | None = None,
+        model: HeatModel | None = None,
+        margin: float = HEAT_MARGIN,
+        max_pause: float = DENSITY_PAUSE,
+        cool_timeout: float = COOL_TIMEOUT,
+    ):
+        self.min_density = min_density
+        self.model = model or HeatModel()
+        self.margin = margin
+        self.max_pause = max_pause
+        self.cool_timeout = cool_timeout
+        self.density: int | None = None    # what the printer is set to now
+        self.requested: int | None = None  # what the job asked for
+        self.pauses = 0
+        self.paused = 0.0
+        self.lowered = 0  # labels printed below the requested density
+        self.trips = 0
+        self._status_seen = False
+
+    def start(self, density: int | None) -> None:
+        """Called at the start of a job with the density it asked for."""
+        self.density = self.requested = density
+
+    def saw_status(self, status: PrinterStatus) -> None:
+        """Called by PrinterClient.get_status with every status it receives."""
+        self._status_seen = True
+
+    async def before_label(self, pc: PrinterClient, raster, step_density: bool = True) -> None:
+        """Pause and/or step density down so *raster* keeps the head under the limit.
+
+        With fixed pacing nothing else looks at status between labels, so
+        one query is made here to catch an overheat the model missed.
+        """
+        if not self._status_seen:
+            status = await pc.get_status()
+            if status.overheated:
+                await self.cool_down(pc, status)
+        self._status_seen = False
+
+        now = _now()
+        target = self.model.limit * self.margin
+        dots = black_dots(raster)
+        density = self.density if self.density is not None else 1
+        pause = self.model.pause_for(dots * DENSITY_HEAT[density], now, target)
+        if step_density and self.requested is not None and self.min_density is not None:
+            # Highest density within the user's range whose pause stays short
+            for d in range(self.requested, self.min_density - 1, -1):
+                density = d
+                pause = self.model.pause_for(dots * DENSITY_HEAT[d], now, target)
+                if pause <= self.max_pause:
+                    break
+            if density != self.density:
+                await pc.set_density(density)
+                self.density = density
+        if pause > 0:
+            with span(pc.trace, "thermal_pause", "wait", heat=round(self.model.level(now)),
+                      density=density):
+                await asyncio.sleep(pause)
+            self.pauses += 1
+            self.paused += pause
+
+    def after_label(self, pc: PrinterClient, raster) -> None:
+        """Add the heat of a raster that was just sent."""
+        density = self.density if self.density is not None else 1
+        if self.requested is not None and density < self.requested:
+            self.lowered += 1
+        self.model.add(label_heat(raster, density), _now())
+
+    async def cool_down(self, pc: PrinterClient, status: PrinterStatus) -> None:
+        """Wait for an overheated printer to clear, and lower the model's limit.
+
+        The limit drops to the heat estimated when the printer tripped, but
+        to no less than half its previous value, since part of the heat may
+        predate the job.  Raises PrinterNotReady if another fault shows up
+        or the head is still hot after *cool_timeout*.
+        """
+        self.trips += 1
+        t0 = _now()
+        self.model.limit = max(self.model.limit * 0.5,
+                               min(self.model.limit, self.model.level(t0)))
+        with span(pc.trace, "cool_down", "wait", limit=round(self.model.limit)):
+            while status.overheated and not (status.cover_open or status.no_paper):
+                if _now() - t0 > self.cool_timeout:
+                    raise PrinterNotReady(f"Still overheated after {self.cool_timeout:.0f}s")
+                await asyncio.sleep(min(COOL_POLL, self.model.tau / 4))
+                status = await pc.get_status()
+        self.pauses += 1
+        self.paused += _now() - t0
+        if not status.ok:
+            raise PrinterNotReady(f"Printer not ready: {status}")
+
+    def stats(self) -> dict:
+        return {"pauses": self.pauses, "paused": self.paused, "lowered": self.lowered,
+                "trips": self.trips, "limit": self.model.limit}
@@ -0,0 +1,116 @@
+"""Per-phase timing of print runs: trace hooks, export and summary.
+
+    tracer = Tracer()
+    async with connect(trace=tracer) as pc:
+        await pc.print_job(labels)
+    tracer.write("run.json", "chrome")
+    print(tracer.summary()["seconds_per_label"])
+
+A trace hook is any callable taking one event dict:
+
+    {"name": "send", "cat": "cmd", "start": 12.5, "end": 12.52,
+     "args": {"cmd": "status", "bytes": 3, "reply": 1}}
+
+*start* and *end* are time.monotonic() seconds.  Categories: "link"
+(scan, connect), "render" (prepare_image, image_to_raster, template
+render), "cmd" (one request written with send()), "transfer" (a
+send_chunked payload), "wait" (a wait_phase readiness wait) and "job"
+(job setup, and one label from its raster to its form feed).
+"""
+
+import json
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+Hook = Callable[[dict], None]
+
+
+@contextmanager
+def span(hook: Hook | None, name: str, cat: str, **args):
+    """Report the enclosed block to *hook* as one event; a no-op without a hook.
+
+    Yields the event's args dict, so the block can add byte counts or
+    results.  A block that raises is reported with an "error" arg.
+    """
+    if hook is None:
+        yield args
+        return
+    start = time.monotonic()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        hook({"name": name, "cat": cat, "start": start, "end": time.monotonic(),
+              "args": args})
+
+
+class Tracer:
+    """Trace hook that keeps every event, for export and a run summary."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+
+    def __call__(self, event: dict) -> None:
+        self.events.append(event)
+
+    def write(self, path: str, fmt: str = "jsonl") -> None:
+        """Save the events as JSON lines, or as a Chrome trace (*fmt* "chrome").
+
+        Chrome traces load in chrome://tracing or https://ui.perfetto.dev,
+        one timeline row per category.
+        """
+        origin = min((e["start"] for e in self.events), default=0.0)
+        with open(path, "w") as f:
+            if fmt == "chrome":
+                json.dump({"traceEvents": [_chrome_event(e, origin) for e in self.events],
+                           "displayTimeUnit": "ms"}, f)
+                return
+            for e in self.events:
+                f.write(json.dumps({**e, "start": round(e["start"] - origin, 6),
+                                    "end": round(e["end"] - origin, 6)}) + "\n")
+
+    def summary(self) -> dict:
+        """Seconds per label, payload throughput and time per phase.
+
+        *bytes_per_second* is raster payload bytes over time spent in
+        send_chunked.  *phases* sums event durations per "cat:name", with
+        commands named by what they do ("cmd:stop"); nested phases (a
+        status query inside a wait) count in both.
+        """
+        events = self.events
+        labels = [e for e in events if e["name"] == "label"]
+        transfers = [e for e in events if e["cat"] == "transfer"]
+        sent = sum(e["args"].get("bytes", 0) for e in events if e["cat"] in ("cmd", "transfer"))
+        payload = sum(e["args"].get("bytes", 0) for e in transfers)
+        transfer_s = sum(e["end"] - e["start"] for e in transfers)
+        phases: dict[str, dict] = {}
+        for e in events:
+            key = f"{e['cat']}:{e['args'].get('cmd', e['name'])}"
+            p = phases.setdefault(key, {"count": 0, "seconds": 0.0})
+            p["count"] += 1
+            p["seconds"] += e["end"] - e["start"]
+        total = (max(e["end"] for e in events) - min(e["start"] for e in events)) if events else 0.0
+        return {
+            "seconds": total,
+            "labels": len(labels),
+            "seconds_per_label": (sum(e["end"] - e["start"] for e in labels) / len(labels)
+                                  if labels else 0.0),
+            "bytes_sent": sent,
+            "bytes_per_second": payload / transfer_s if transfer_s else 0.0,
+            "phases": phases,
+        }
+
+
+# One timeline row per category: pipelined commands overlap, which a single
+# row of complete ("X") events cannot show.
+_CHROME_ROWS = {"link": 1, "job": 1, "render": 2, "transfer": 3, "wait": 4, "cmd": 5}
+
+
+def _chrome_event(e: dict, origin: float) -> dict:
+    return {"name": e["name"], "cat": e["cat"], "ph": "X", "pid": 1,
+            "tid": _CHROME_ROWS.get(e["cat"], 6),
+            "ts": round((e["start"] - origin) * 1e6, 1),
+            "dur": round((e["end"] - e["start"]) * 1e6, 1), "args": e["args"]}
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep the raster cache and remembered printer out of the real home dir."""
+    monkeypatch.setenv("FICHERO_CACHE_DIR", str(tmp_path / "fichero-cache"))
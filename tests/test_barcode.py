@@ -0,0 +1,137 @@
+"""Tests for barcode and QR code encoding and their packed rasters."""
+
+import numpy as np
+import pytest
+
+from fichero.barcode import (
+    START_B,
+    START_C,
+    code128,
+    code128_values,
+    ean13,
+    format_bits,
+    qr_matrix,
+    rs_ecc,
+)
+from fichero.imaging import BARCODE_QUIET, barcode_to_raster, qr_to_raster
+from fichero.printer import BYTES_PER_ROW, PRINTHEAD_PX
+from fichero.template import Template
+
+
+def _bits(raster: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(raster, dtype=np.uint8).reshape(-1, BYTES_PER_ROW), axis=1)
+
+
+class TestCode128:
+    def test_set_b_with_checksum(self):
+        values = code128_values("PJJ123C")
+        assert values[0] == START_B
+        assert values[1:-1] == [48, 42, 42, 17, 18, 19, 35]
+        assert values[-1] == sum([104, 48, 42 * 2, 42 * 3, 17 * 4, 18 * 5, 19 * 6, 35 * 7]) % 103
+
+    def test_digit_runs_use_set_c(self):
+        assert code128_values("123456")[:4] == [START_C, 12, 34, 56]
+        # Odd run: first digit in set B, then switch to C
+        assert code128_values("A12345")[:5] == [START_B, 33, 17, 99, 23]
+
+    def test_module_count(self):
+        data = "SKU-1"
+        # start + 5 symbols + check at 11 modules each, stop at 13
+        assert len(code128(data)) == 11 * 7 + 13
+        assert code128(data)[0] and code128(data)[-1]
+
+    def test_rejects_non_ascii(self):
+        with pytest.raises(ValueError):
+            code128("café")
+
+
+class TestEan13:
+    def test_check_digit_and_guards(self):
+        digits, modules = ean13("400638133393")
+        assert digits == "4006381333931"
+        assert len(modules) == 95
+        bits = "".join("1" if m else "0" for m in modules)
+        assert bits[:3] == "101" and bits[45:50] == "01010" and bits[-3:] == "101"
+
+    def test_wrong_check_digit(self):
+        with pytest.raises(ValueError, match="check digit"):
+            ean13("4006381333932")
+
+
+class TestQr:
+    def test_reed_solomon_reference(self):
+        # "HELLO WORLD" version 1-M from the ISO 18004 worked example
+        data = [32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236, 17]
+        assert rs_ecc(data, 10) == [196, 35, 39, 119, 235, 215, 231, 226, 93, 23]
+
+    def test_format_bits_reference(self):
+        assert format_bits("L", 4) == 0b110011000101111
+
+    @pytest.mark.parametrize("data,size", [("HELLO WORLD", 21), ("https://example.com/item/42", 29),
+                                           ("0123456789" * 20, 37)])
+    def test_structure(self, data, size):
+        m = qr_matrix(data)
+        assert m.shape == (size, size)
+        finder = m[:7, :7]
+        assert finder[0].all() and finder[6].all() and finder[2:5, 2:5].all()
+        assert not finder[1, 1:6].any()
+        assert (m[:7, -7:] == finder).all() and (m[-7:, :7] == finder).all()
+        assert (m[6, 8:-8] == (np.arange(8, size - 8) % 2 == 0)).all()
+        # Both copies of the format information agree
+        first = [m[i, 8] for i in range(6)] + [m[7, 8], m[8, 8], m[8, 7]] + \
+                [m[8, 14 - i] for i in range(9, 15)]
+        second = [m[8, size - 1 - i] for i in range(8)] + [m[size - 15 + i, 8] for i in range(8, 15)]
+        assert first == second
+        assert m[size - 8, 8]
+
+    def test_too_long(self):
+        with pytest.raises(ValueError, match="do not fit"):
+            qr_matrix("x" * 400, "H")
+
+
+class TestRasters:
+    def test_barcode_rows_are_module_aligned(self):
+        bits = _bits(barcode_to_raster("400638133393", "ean13", label_rows=None, module=2,
+                                       caption=False))
+        assert bits.shape == ((95 + 2 * BARCODE_QUIET) * 2, PRINTHEAD_PX)
+        # Every row is all dark or all white, and bars come in pairs of rows
+        assert (bits.all(axis=1) | ~bits.any(axis=1)).all()
+        dark = bits[::2, 0]
+        assert (bits[1::2, 0] == dark).all()
+        assert dark[BARCODE_QUIET : BARCODE_QUIET + 3].tolist() == [1, 0, 1]
+
+    def test_barcode_caption_and_centering(self):
+        bits = _bits(barcode_to_raster("SKU-1", label_rows=240))
+        assert bits.shape == (240, PRINTHEAD_PX)
+        assert bits[:, -8:].any()  # caption beside the bars
+        assert not bits[:20].any() and not bits[-20:].any()
+
+    def test_barcode_too_long_for_label(self):
+        with pytest.raises(ValueError, match="longer label"):
+            barcode_to_raster("X" * 40, label_rows=240)
+
+    def test_qr_fills_head(self):
+        matrix = qr_matrix("HELLO")
+        bits = _bits(qr_to_raster("HELLO", label_rows=None))
+        m = PRINTHEAD_PX // (len(matrix) + 4)
+        assert bits.shape == ((len(matrix) + 4) * m, PRINTHEAD_PX)
+        left = (PRINTHEAD_PX - len(bits)) // 2 + 2 * m
+        assert (bits[2 * m : -2 * m : m, left : left + len(matrix) * m : m] == matrix).all()
+
+
+class TestTemplateCodes:
+    def test_variable_qr_and_barcode(self):
+        tpl = Template.from_designer({
+            "label": {"size": {"width": 232, "height": 96}, "printDirection": "left"},
+            "canvas": {"objects": [
+                {"type": "QRCode", "left": 0, "top": 0, "width": 90, "height": 90,
+                 "text": "https://example.com/{id}", "ecl": "M"},
+                {"type": "Barcode", "left": 100, "top": 0, "width": 130, "height": 90,
+                 "text": "ID{id}", "encoding": "CODE128B", "fontSize": 12},
+            ]},
+        })
+        assert len(tpl.fields) == 2
+        a, b = tpl.render({"id": "1001"}), tpl.render({"id": "2002"})
+        assert a != b
+        assert a == tpl.render_full({"id": "1001"})
+        assert _bits(a).sum() > 1000
@@ -0,0 +1,64 @@
+"""Tests for variable-data batch rendering."""
+
+import asyncio
+import json
+
+import pytest
+
+from fichero.batch import read_rows, render_label, render_ordered, row_to_spec
+
+
+class TestReadRows:
+    def test_csv(self, tmp_path):
+        path = tmp_path / "rows.csv"
+        path.write_text("sku,price\nA1,1.50\nB2,2.00\n")
+        assert list(read_rows(str(path))) == [
+            {"sku": "A1", "price": "1.50"},
+            {"sku": "B2", "price": "2.00"},
+        ]
+
+    def test_ndjson(self, tmp_path):
+        path = tmp_path / "rows.ndjson"
+        path.write_text(json.dumps({"text": "a"}) + "\n\n" + json.dumps({"text": "b"}) + "\n")
+        assert [r["text"] for r in read_rows(str(path))] == ["a", "b"]
+
+    def test_ndjson_bad_line(self, tmp_path):
+        path = tmp_path / "rows.jsonl"
+        path.write_text("{nope\n")
+        with pytest.raises(ValueError, match="rows.jsonl:1"):
+            list(read_rows(str(path)))
+
+
+class TestRowToSpec:
+    def test_template(self):
+        spec = row_to_spec({"sku": "A1", "copies": "3"}, text="SKU {sku}")
+        assert spec["text"] == "SKU A1"
+        assert spec["copies"] == 3
+
+    def test_text_column(self):
+        assert row_to_spec({"text": "hi"})["text"] == "hi"
+
+    def test_missing_field(self):
+        with pytest.raises(ValueError, match="'sku'"):
+            row_to_spec({}, text="{sku}")
+
+    def test_no_source(self):
+        with pytest.raises(ValueError, match="no 'text' or 'image'"):
+            row_to_spec({"price": "1"})
+
+
+class TestRenderOrdered:
+    def _collect(self, specs, **kw):
+        async def run():
+            return [item async for item in render_ordered(specs, **kw)]
+
+        return asyncio.run(run())
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_preserves_order(self, workers):
+        specs = [row_to_spec({"text": f"label {i}"}) for i in range(6)]
+        out = self._collect(specs, workers=workers, lookahead=3)
+        assert [s["text"] for s, _ in out] == [s["text"] for s in specs]
+        for spec, raster in out:
+            assert raster == render_label(spec)
+            assert len(raster) == 12 * 240
@@ -0,0 +1,91 @@
+"""Tests for the on-disk raster cache."""
+
+import os
+
+import pytest
+from PIL import Image
+
+from fichero.cache import RasterCache
+from fichero.paths import default_cache_dir
+
+
+class TestKey:
+    def test_depends_on_source_and_params(self):
+        k = RasterCache.key(b"abc", max_rows=240, dither="fs")
+        assert k == RasterCache.key(b"abc", dither="fs", max_rows=240)
+        assert k != RasterCache.key(b"abd", max_rows=240, dither="fs")
+        assert k != RasterCache.key(b"abc", max_rows=120, dither="fs")
+        assert k != RasterCache.key(b"abc", max_rows=240, dither="bayer")
+
+
+class TestRasterCache:
+    def test_miss_then_hit(self, tmp_path):
+        cache = RasterCache(tmp_path)
+        assert cache.get("k") is None
+        cache.put("k", b"\x00" * 12)
+        assert cache.get("k") == b"\x00" * 12
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_stats_persist_across_instances(self, tmp_path):
+        RasterCache(tmp_path).get("missing")
+        assert RasterCache(tmp_path).stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = RasterCache(tmp_path, max_bytes=250)
+        for i, key in enumerate(["a", "b"]):
+            cache.put(key, b"\xff" * 100)
+            os.utime(cache._path(key), (1000 + i, 1000 + i))
+        cache.get("a")  # refreshes "a", so "b" is now the oldest
+        cache.put("c", b"\xff" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_clear(self, tmp_path):
+        cache = RasterCache(tmp_path)
+        cache.put("a", b"1")
+        cache.get("a")
+        assert cache.clear() == 1
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["hits"] == 0
+
+    def test_default_dir_env(self, tmp_path):
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv("FICHERO_CACHE_DIR", str(tmp_path))
+            assert default_cache_dir() == tmp_path
+
+
+class TestUnusableCache:
+    def test_directory_under_a_file_is_a_miss(self, tmp_path):
+        (tmp_path / "notadir").write_bytes(b"")
+        cache = RasterCache(tmp_path / "notadir" / "x")
+        assert cache.get("k") is None
+        cache.put("k", b"\x00" * 12)
+        assert cache.get("k") is None
+
+    @pytest.mark.parametrize("command", [["text", "Hi"], ["image", "{png}"]])
+    def test_cli_still_prints(self, tmp_path, monkeypatch, capsys, command):
+        from fichero import cli
+
+        png = tmp_path / "t.png"
+        Image.new("L", (96, 40), 0).save(png)
+        (tmp_path / "notadir").write_bytes(b"")
+        argv = ["fichero", "--simulate", "--cache-dir", str(tmp_path / "notadir" / "x")]
+        monkeypatch.setattr("sys.argv", argv + [a.format(png=png) for a in command])
+        cli.main()
+        assert "Done." in capsys.readouterr().out
+
+
+class TestImageRasterCaching:
+    def test_second_call_skips_prepare(self, tmp_path, monkeypatch):
+        from fichero import cli, imaging
+
+        path = tmp_path / "logo.png"
+        Image.new("L", (192, 100), 0).save(path)
+        cache = RasterCache(tmp_path / "cache")
+
+        first = cli._image_raster(str(path), 240, "fs", cache)
+        monkeypatch.setattr(imaging, "prepare_image", None)  # would raise if called
+        assert cli._image_raster(str(path), 240, "fs", cache) == first
+        assert cache.stats()["hits"] == 1
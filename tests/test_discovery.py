@@ -0,0 +1,110 @@
+"""Tests for BLE discovery and the remembered-printer cache."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bleak.exc import BleakError
+
+from fichero.printer import (
+    PrinterClient,
+    PrinterNotFound,
+    connect,
+    find_printer,
+    load_known_printer,
+    save_known_printer,
+)
+
+
+def _mock_bleak(fail: bool = False):
+    client = AsyncMock()
+    if fail:
+        client.__aenter__ = AsyncMock(side_effect=BleakError("gone"))
+    else:
+        client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+    client.start_notify = AsyncMock()
+    return client
+
+
+class TestKnownPrinter:
+    def test_roundtrip_and_merge(self):
+        assert load_known_printer() == {}
+        save_known_printer(address="AA", name="FICHERO_1")
+        save_known_printer(mac_classic="CC")
+        assert load_known_printer() == {"address": "AA", "name": "FICHERO_1", "mac_classic": "CC"}
+
+    def test_new_address_replaces_record(self):
+        save_known_printer(address="AA", mac_classic="CC")
+        save_known_printer(address="BB")
+        assert load_known_printer() == {"address": "BB"}
+
+
+class TestFindPrinter:
+    @pytest.mark.asyncio
+    async def test_returns_first_match_and_remembers_it(self):
+        device = MagicMock(address="11:22", name="FICHERO_5836")
+        device.name = "FICHERO_5836"
+        finder = AsyncMock(return_value=device)
+        with patch("fichero.printer.BleakScanner.find_device_by_filter", finder):
+            assert await find_printer() == "11:22"
+        match = finder.call_args.args[0]
+        adv = MagicMock(local_name=None)
+        assert match(device, adv)
+        other = MagicMock()
+        other.name = "Headphones"
+        assert not match(other, adv)
+        assert load_known_printer()["address"] == "11:22"
+
+    @pytest.mark.asyncio
+    async def test_not_found(self):
+        with patch("fichero.printer.BleakScanner.find_device_by_filter",
+                   AsyncMock(return_value=None)):
+            with pytest.raises(PrinterNotFound):
+                await find_printer()
+
+
+class TestConnectUsesKnownPrinter:
+    @pytest.mark.asyncio
+    async def test_known_address_skips_scan(self):
+        save_known_printer(address="AA", mac_classic="CC")
+        finder = AsyncMock()
+        with (
+            patch("fichero.printer.BleakClient", return_value=_mock_bleak()) as cls,
+            patch("fichero.printer.find_printer", finder),
+        ):
+            async with connect() as pc:
+                assert isinstance(pc, PrinterClient)
+        cls.assert_called_once_with("AA")
+        finder.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_scan_when_known_fails(self):
+        save_known_printer(address="OLD", mac_classic="CC")
+        clients = {"OLD": _mock_bleak(fail=True), "NEW": _mock_bleak()}
+        with (
+            patch("fichero.printer.BleakClient", side_effect=lambda a: clients[a]),
+            patch("fichero.printer.find_printer", AsyncMock(return_value="NEW")),
+        ):
+            async with connect() as pc:
+                assert pc.client is clients["NEW"]
+
+    @pytest.mark.asyncio
+    async def test_learns_classic_mac(self):
+        save_known_printer(address="AA")
+        with (
+            patch("fichero.printer.BleakClient", return_value=_mock_bleak()),
+            patch.object(PrinterClient, "get_all_info",
+                         AsyncMock(return_value={"mac_classic": "CC:CC"})),
+        ):
+            async with connect():
+                pass
+        assert load_known_printer()["mac_classic"] == "CC:CC"
+
+    @pytest.mark.asyncio
+    async def test_classic_uses_remembered_mac(self):
+        save_known_printer(address="AA", mac_classic="CC:CC")
+        rfcomm = _mock_bleak()
+        with patch("fichero.printer.RFCOMMClient", return_value=rfcomm) as cls:
+            async with connect(classic=True):
+                pass
+        cls.assert_called_once_with("CC:CC", 1)
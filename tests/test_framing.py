@@ -0,0 +1,157 @@
+"""Tests for reply framing and request pipelining in PrinterClient.send."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from fichero.printer import PrinterClient, PrinterTimeout, connect, frame_length, reply_shape
+from fichero.simulator import SimulatedPrinter
+
+
+class TestFrameLength:
+    @pytest.mark.parametrize("cmd, shape", [
+        (bytes([0x10, 0xFF, 0x40]), 1),
+        (bytes([0x10, 0xFF, 0x50, 0xF1]), 2),
+        (bytes([0x10, 0xFF, 0x10, 0x00, 0x02]), "ok"),
+        (bytes([0x10, 0xFF, 0xFE, 0x45]), "stop"),
+        (bytes([0x10, 0xFF, 0xFE, 0x01]), None),
+        (bytes([0x10, 0xFF, 0x20, 0xF0]), None),
+    ])
+    def test_shapes(self, cmd, shape):
+        assert reply_shape(cmd) == shape
+
+    @pytest.mark.parametrize("shape, buf, n", [
+        (1, b"\x00", 1),
+        (2, b"\x00", None),
+        (2, b"\x00\x56", 2),
+        ("ok", b"O", None),
+        ("ok", b"OKextra", 2),
+        ("ok", b"\xff\x02", 2),
+        ("stop", b"\xaa", 1),
+        ("stop", b"OK", 2),
+        ("error", b"\xff", None),
+        (None, b"D11s", None),
+    ])
+    def test_fixed(self, shape, buf, n):
+        assert frame_length(shape, buf) == n
+
+    @pytest.mark.parametrize("buf, complete", [
+        (b"F|AA|BB|2.4.6|S1", False),
+        (b"F|AA|BB|2.4.6|S1|86", True),
+        (b"F|AA|BB|2.4.6|S1|100", True),
+        (b"F|AA|BB|2.4.6|S1|10", False),   # may still become 100
+        (b"F|AA|BB|2.4.6|S1|8", False),
+    ])
+    def test_info(self, buf, complete):
+        assert (frame_length("info", buf) == len(buf)) is complete
+
+
+class _Fragmenter:
+    """Transport that answers every write with the given notification fragments."""
+
+    is_classic = False
+    mtu_size = None
+
+    def __init__(self, fragments, gap=0.01):
+        self.fragments = fragments
+        self.gap = gap
+        self.services = MagicMock()
+        self.services.get_characteristic.return_value = None
+
+    async def start_notify(self, _uuid, callback):
+        self.callback = callback
+
+    async def write_gatt_char(self, _uuid, data, response=False):
+        loop = asyncio.get_running_loop()
+        for i, frag in enumerate(self.fragments):
+            loop.call_later(self.gap * i, self.callback, None, bytearray(frag))
+
+
+class TestSend:
+    @pytest.mark.asyncio
+    async def test_assembles_fragments_and_returns_at_frame_end(self):
+        pc = PrinterClient(_Fragmenter([b"O", b"K", b"late"], gap=0.02))
+        await pc.start()
+        t0 = time.monotonic()
+        assert await pc.send(bytes([0x10, 0xFF, 0x84, 0x00]), wait=True) == b"OK"
+        assert time.monotonic() - t0 < 0.04
+
+    @pytest.mark.asyncio
+    async def test_unframed_reply_ends_on_silence(self):
+        pc = PrinterClient(_Fragmenter([b"D1", b"1s"]))
+        await pc.start()
+        assert await pc.send(bytes([0x10, 0xFF, 0x20, 0xF0]), wait=True) == b"D11s"
+
+    @pytest.mark.asyncio
+    async def test_simulated_all_info_over_ble_fragments(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0)
+        async with connect(simulate=sim) as pc:
+            info = await pc.get_all_info()
+            status = await pc.get_status()
+        assert info["battery"] == "86%"
+        assert info["serial"] == sim.serial
+        assert status.ok
+
+
+class TestPipelining:
+    @pytest.mark.asyncio
+    async def test_replies_matched_in_order(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0.1)
+        sim.battery, sim.shutdown_minutes = 42, 7
+        async with connect(simulate=sim) as pc:
+            t0 = time.monotonic()
+            status, info, battery, shutdown = await asyncio.gather(
+                pc.get_status(), pc.get_all_info(), pc.get_battery(), pc.get_shutdown_time())
+            elapsed = time.monotonic() - t0
+        assert status.ok
+        assert info["battery"] == "42%"
+        assert (battery, shutdown) == (42, 7)
+        assert elapsed < 0.2  # one round trip, not four
+
+    @pytest.mark.asyncio
+    async def test_get_info_two_round_trips(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0.1)
+        async with connect(simulate=sim) as pc:
+            t0 = time.monotonic()
+            info = await pc.get_info()
+            elapsed = time.monotonic() - t0
+        assert info["model"] == "D11s"
+        assert info["boot"] == "V1.00"
+        assert info["firmware"] == sim.firmware
+        assert info["mac_classic"] == "00:00:00:00:00:00"
+        assert elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_timeout_drops_request(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0)
+        async with connect(simulate=sim) as pc:
+            with pytest.raises(PrinterTimeout):
+                # 10 FF B0 is silently ignored by the D11s
+                await pc.send(bytes([0x10, 0xFF, 0xB0]), wait=True, timeout=0.05)
+            assert (await pc.get_status()).ok
+
+    @pytest.mark.asyncio
+    async def test_late_reply_not_taken_for_next(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0.08)
+        sim.battery = 42
+        async with connect(simulate=sim) as pc:
+            with pytest.raises(PrinterTimeout):
+                await pc.get_status(timeout=0.05)
+            assert await pc.get_battery() == 42
+            assert await pc.stop_print()
+            assert pc.lost_replies == 0
+
+    @pytest.mark.asyncio
+    async def test_reply_that_never_comes_expires(self, monkeypatch):
+        monkeypatch.setattr("fichero.printer.DELAY_LATE_REPLY", 0.05)
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0)
+        async with connect(simulate=sim) as pc:
+            callback, sim._callback = sim._callback, None  # the reply is lost
+            with pytest.raises(PrinterTimeout):
+                await pc.get_status(timeout=0.02)
+            sim._callback = callback
+            await asyncio.sleep(0.1)
+            assert pc.lost_replies == 1
+            assert (await pc.get_status()).ok
@@ -0,0 +1,203 @@
+"""Tests for image preparation and dithering."""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from fichero.imaging import (
+    _decode_reduced,
+    bayer_matrix,
+    blue_noise_matrix,
+    floyd_steinberg_dither,
+    floyd_steinberg_dither_rows,
+    image_to_raster,
+    iter_bands,
+    ordered_dither,
+    prepare_image,
+    text_to_image,
+)
+
+
+def _noise(w: int, h: int, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (h, w), dtype=np.uint8), mode="L")
+
+
+def _gradient(w: int, h: int) -> Image.Image:
+    x = np.linspace(0, 255, w)[None, :]
+    y = np.linspace(0, 255, h)[:, None]
+    rgb = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    return Image.fromarray(rgb.astype(np.uint8), mode="RGB")
+
+
+def _ink(raster: bytes) -> float:
+    """Fraction of dots that are black."""
+    return np.unpackbits(np.frombuffer(raster, dtype=np.uint8)).mean()
+
+
+def _jpeg(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+class TestFloydSteinbergRows:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_bit_identical_to_pixel_loop(self, seed):
+        img = _noise(96, 120, seed)
+        a = np.array(floyd_steinberg_dither(img))
+        b = np.array(floyd_steinberg_dither_rows(img))
+        assert np.array_equal(a, b)
+
+    def test_bit_identical_on_gradient(self):
+        grad = np.tile(np.linspace(0, 255, 96).astype(np.uint8), (200, 1))
+        img = Image.fromarray(grad, mode="L")
+        assert np.array_equal(
+            np.array(floyd_steinberg_dither(img)),
+            np.array(floyd_steinberg_dither_rows(img)),
+        )
+
+    def test_output_is_binary(self):
+        out = np.array(floyd_steinberg_dither_rows(_noise(96, 10)))
+        assert set(np.unique(out)) <= {0, 255}
+
+
+class TestPrepareImage:
+    def test_engines_agree(self):
+        img = _noise(200, 300).convert("RGB")
+        a = image_to_raster(prepare_image(img, fs_engine="pixel"))
+        b = image_to_raster(prepare_image(img, fs_engine="rows"))
+        assert a == b
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError, match="fs_engine"):
+            prepare_image(_noise(96, 10), fs_engine="bogus")
+
+    def test_crops_to_max_rows(self):
+        img = prepare_image(_noise(96, 500), max_rows=240)
+        assert img.size == (96, 240)
+        assert len(image_to_raster(img)) == 12 * 240
+
+
+class TestDecodeReduced:
+    def test_jpeg_decoded_near_target(self):
+        src = Image.open(io.BytesIO(_jpeg(_gradient(2400, 3200))))
+        img = _decode_reduced(src, 96, 128)
+        assert img.mode == "L"
+        assert 192 <= img.width < 2 * 192 and 256 <= img.height
+
+    def test_other_images_reduced(self):
+        img = _decode_reduced(_gradient(2000, 1000), 96, 48)
+        assert img.size == (200, 100)
+
+    def test_small_image_untouched(self):
+        img = _noise(150, 300)
+        assert _decode_reduced(img, 96, 192) is img
+
+    @pytest.mark.parametrize("jpeg", [True, False])
+    def test_close_to_full_decode(self, jpeg):
+        def src():
+            if jpeg:
+                return Image.open(io.BytesIO(data))
+            return _gradient(2400, 3200)
+
+        data = _jpeg(_gradient(2400, 3200))
+        fast = np.array(prepare_image(src(), max_rows=1000, dither="none"))
+        full = np.array(prepare_image(src(), max_rows=1000, dither="none", draft=False))
+        assert fast.shape == full.shape == (128, 96)
+        assert np.mean(fast != full) < 0.01
+
+    @pytest.mark.parametrize("dither", [False, True])
+    def test_iter_bands_matches_prepare_image(self, dither):
+        data = _jpeg(_gradient(2400, 3200))
+        ref = image_to_raster(prepare_image(Image.open(io.BytesIO(data)), max_rows=1000,
+                                            dither=dither))
+        bands = b"".join(iter_bands(Image.open(io.BytesIO(data)), band_rows=48, dither=dither))
+        if dither:  # autocontrast levels are estimated, error diffusion amplifies the change
+            assert abs(_ink(bands) - _ink(ref)) < 0.01
+        else:
+            assert bands == ref
+
+
+class TestOrderedDither:
+    def test_bayer_matrix_is_permutation(self):
+        for n in (4, 8):
+            m = bayer_matrix(n)
+            assert sorted(m.ravel()) == list(range(n * n))
+
+    def test_bayer_matrix_rejects_non_power_of_two(self):
+        with pytest.raises(ValueError):
+            bayer_matrix(6)
+
+    def test_blue_noise_matrix_is_permutation(self):
+        m = blue_noise_matrix()
+        assert m.shape == (64, 64)
+        assert sorted(m.ravel()) == list(range(64 * 64))
+
+    @pytest.mark.parametrize("mode", ["bayer", "bayer4", "bluenoise"])
+    def test_mid_grey_is_half_black(self, mode):
+        grey = Image.new("L", (96, 256), 128)
+        # autocontrast leaves a flat image untouched, so coverage follows the mask
+        raster = image_to_raster(prepare_image(grey, max_rows=256, dither=mode))
+        black = np.unpackbits(np.frombuffer(raster, dtype=np.uint8)).mean()
+        assert 0.45 < black < 0.55
+
+    @pytest.mark.parametrize("mode", ["bayer", "bluenoise", "none", "fs", True, False])
+    def test_modes_produce_valid_raster(self, mode):
+        img = prepare_image(_noise(150, 400), dither=mode)
+        assert img.mode == "1"
+        assert img.size == (96, 240)
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="dither mode"):
+            prepare_image(_noise(96, 10), dither="atkinson")
+
+
+class TestIterBands:
+    @pytest.mark.parametrize("mode", ["fs", "bayer", "bluenoise", "none"])
+    def test_matches_prepare_image(self, mode):
+        # a 96px wide source is not resampled, so the autocontrast levels agree too
+        img = _noise(96, 500, seed=3).convert("RGB")
+        ref = image_to_raster(prepare_image(img, max_rows=10_000, dither=mode))
+        bands = list(iter_bands(img, dither=mode, band_rows=48))
+        assert b"".join(bands) == ref
+        assert [len(b) for b in bands[:-1]] == [48 * 12] * (len(bands) - 1)
+
+    def test_resampled_source_close_to_prepare_image(self):
+        img = _noise(192, 1000, seed=3).convert("RGB")
+        ref = image_to_raster(prepare_image(img, max_rows=10_000, dither=False))
+        assert b"".join(iter_bands(img, dither=False)) == ref
+        ref = image_to_raster(prepare_image(img, max_rows=10_000))
+        assert abs(_ink(b"".join(iter_bands(img))) - _ink(ref)) < 0.01
+
+    def test_first_band_resizes_only_that_band(self, monkeypatch):
+        sizes = []
+        resize = Image.Image.resize
+
+        def counting_resize(self, size, *args, **kwargs):
+            sizes.append(size)
+            return resize(self, size, *args, **kwargs)
+
+        monkeypatch.setattr(Image.Image, "resize", counting_resize)
+        first = next(iter_bands(_noise(192, 4000), band_rows=48))
+        assert len(first) == 48 * 12 and sizes == [(96, 48)]
+
+    def test_max_rows(self):
+        bands = list(iter_bands(_noise(96, 500), max_rows=100, band_rows=64))
+        assert [len(b) // 12 for b in bands] == [64, 36]
+
+    def test_ordered_row_offset_matches_whole_image(self):
+        img = _noise(96, 40, seed=4)
+        whole = np.array(ordered_dither(img, bayer_matrix(8)))
+        part = np.array(ordered_dither(img.crop((0, 13, 96, 40)), bayer_matrix(8), row_offset=13))
+        assert np.array_equal(whole[13:], part)
+
+
+class TestTextToImage:
+    def test_fit_to_text_length(self):
+        short = text_to_image("Hi", font_size=40, label_height=None)
+        long = text_to_image("Hello banner world", font_size=40, label_height=None)
+        assert short.width == long.width == 96
+        assert long.height > short.height > 32
@@ -0,0 +1,33 @@
+"""The CLI must start without loading its heavy dependencies."""
+
+import subprocess
+import sys
+
+
+def _loaded_after(code: str) -> set[str]:
+    out = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return {name.split(".")[0] for name in out.split()}
+
+
+def test_cli_import_is_light():
+    loaded = _loaded_after("import fichero.cli")
+    assert not loaded & {"numpy", "PIL", "bleak"}
+
+
+def test_bleak_resolved_on_first_use():
+    loaded = _loaded_after("import fichero.printer as p; p.BleakClient")
+    assert "bleak" in loaded
+
+
+def test_replay_is_light(tmp_path):
+    path = str(tmp_path / "job.spool")
+    loaded = _loaded_after(
+        "from fichero.spool import SpoolWriter\n"
+        f"with SpoolWriter({path!r}) as out: out.add(bytes(12 * 40))\n"
+        "import sys; from fichero.cli import main\n"
+        f"sys.argv = ['fichero', '--simulate', 'replay', {path!r}]; main()"
+    )
+    assert "fichero" in loaded and not loaded & {"numpy", "PIL", "bleak"}
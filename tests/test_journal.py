@@ -0,0 +1,149 @@
+"""Tests for journaled, resumable print jobs."""
+
+import asyncio
+
+import pytest
+
+import fichero.printer as printer
+from fichero.journal import JobJournal, job_key, print_resumable
+from fichero.printer import PrinterClient, PrinterError, PrinterNotReady, connect
+from fichero.simulator import SimulatedPrinter
+
+LABELS = [bytes([i]) * 12 * 20 for i in range(8)]
+
+
+def _sim(fault_after: dict[int, str]) -> SimulatedPrinter:
+    """Simulator that, once its Nth raster is printed, applies fault_after[N] once."""
+    sim = SimulatedPrinter("classic", bandwidth=0, latency=0, rows_per_second=1e5)
+    raster = sim._raster
+
+    def faulty(cmd: bytes) -> None:
+        raster(cmd)
+        fault = fault_after.pop(len(sim.rasters), None)
+        if fault == "drop":
+            sim.drop_link()
+        elif fault == "paper":
+            sim.no_paper = True
+
+    sim._raster = faulty
+    return sim
+
+
+def _printed(sim: SimulatedPrinter) -> list[int]:
+    return [data[0] for _, data, _ in sim.rasters]
+
+
+class TestJournal:
+    def test_resumes_same_job_only(self, tmp_path):
+        journal = JobJournal.for_labels(LABELS, tmp_path)
+        journal.mark(0)
+        journal.mark(1)
+        with open(journal.path, "a") as f:
+            f.write('{"done": 2')  # cut short by a crash
+        assert JobJournal.for_labels(LABELS, tmp_path).pending() == list(range(2, 8))
+
+        other = JobJournal(journal.path, job_key(LABELS[:3]), 3)
+        assert other.pending() == [0, 1, 2]
+
+    def test_key_depends_on_content_and_order(self):
+        assert job_key(LABELS) == job_key(list(LABELS))
+        assert job_key(LABELS) != job_key(LABELS[::-1])
+
+
+class TestPrintResumable:
+    @pytest.mark.asyncio
+    async def test_reconnects_and_prints_each_label(self, tmp_path):
+        sim = _sim({3: "drop", 6: "drop"})
+        journal = JobJournal.for_labels(LABELS, tmp_path)
+        assert await print_resumable(LABELS, journal, lambda: connect(simulate=sim),
+                                     backoff=0.01)
+        printed = _printed(sim)
+        assert sorted(set(printed)) == list(range(8))
+        assert len(printed) <= len(LABELS) + 2  # at most the label in flight per drop
+        assert not journal.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_fault_keeps_journal_for_next_run(self, tmp_path):
+        sim = _sim({3: "paper"})
+        with pytest.raises(PrinterNotReady):
+            await print_resumable(LABELS, JobJournal.for_labels(LABELS, tmp_path),
+                                  lambda: connect(simulate=sim))
+        journal = JobJournal.for_labels(LABELS, tmp_path)
+        start = journal.pending()[0]
+        assert start <= 3 and journal.pending() == list(range(start, 8))
+
+        sim.no_paper = False
+        first = len(sim.rasters)
+        assert await print_resumable(LABELS, journal, lambda: connect(simulate=sim))
+        assert _printed(sim)[first:] == list(range(start, 8))
+
+    @pytest.mark.asyncio
+    async def test_first_connect_failure_is_not_retried(self, tmp_path):
+        calls = 0
+
+        def open_printer():
+            nonlocal calls
+            calls += 1
+            return connect(classic=True, address="")
+
+        with pytest.raises(PrinterError):
+            await print_resumable(LABELS, JobJournal.for_labels(LABELS, tmp_path), open_printer)
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_without_progress(self, tmp_path):
+        sim = _sim({1: "drop"})
+        attempts = 0
+
+        def open_printer():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                return connect(classic=True, address="")  # printer gone for good
+            return connect(simulate=sim)
+
+        with pytest.raises(PrinterError):
+            await print_resumable(LABELS, JobJournal.for_labels(LABELS, tmp_path), open_printer,
+                                  tries=3, backoff=0.01)
+        assert attempts == 3
+
+    @pytest.mark.asyncio
+    async def test_stale_reply_does_not_confirm_label(self, tmp_path, monkeypatch):
+        # Label 2's settle query times out and its slot expires; the late reply
+        # then lands on the post-feed query, and the link drops while that
+        # query's own reply is still pending.
+        monkeypatch.setattr(printer, "DELAY_RASTER_SETTLE", 0.06)
+        monkeypatch.setattr(printer, "DELAY_LATE_REPLY", 0.01)
+        sim = SimulatedPrinter("classic", bandwidth=0, latency=0, rows_per_second=1e5)
+        raster, execute = sim._raster, sim._execute_10ff
+        queries = []  # status queries sent after label 2
+        get_status = PrinterClient.get_status
+
+        def status(self, timeout=2.0):
+            return get_status(self, 0.05 if len(queries) == 0 and sim.latency else timeout)
+
+        def slow_raster(cmd: bytes) -> None:
+            raster(cmd)
+            if len(sim.rasters) == 3:
+                sim.latency = 0.1
+
+        def drop_after_stale_reply(cmd: bytes) -> None:
+            execute(cmd)
+            if cmd[2] != 0x40 or not sim.latency:
+                return
+            queries.append(cmd)
+            if len(queries) == 2:
+                def drop() -> None:
+                    sim.drop_link()
+                    sim.latency = 0
+
+                asyncio.get_running_loop().call_later(0.07, drop)
+
+        monkeypatch.setattr(PrinterClient, "get_status", status)
+        sim._raster, sim._execute_10ff = slow_raster, drop_after_stale_reply
+        journal = JobJournal.for_labels(LABELS, tmp_path)
+        assert await print_resumable(LABELS, journal, lambda: connect(simulate=sim),
+                                     backoff=0.1)
+        printed = _printed(sim)
+        assert sorted(set(printed)) == list(range(8))
+        assert printed.count(2) == 2  # reprinted, never confirmed by the stale reply
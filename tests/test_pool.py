@@ -0,0 +1,134 @@
+"""Tests for the multi-printer pool."""
+
+import pytest
+
+from fichero.pool import PrinterPool, parse_target
+from fichero.printer import PrinterError
+from fichero.simulator import SimulatedPrinter
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    for name in ("DELAY_AFTER_DENSITY", "DELAY_COMMAND_GAP", "DELAY_RASTER_SETTLE",
+                 "DELAY_AFTER_FEED", "DELAY_NOTIFY_EXTRA"):
+        monkeypatch.setattr(f"fichero.printer.{name}", 0)
+    monkeypatch.setattr("fichero.pool.HEALTH_INTERVAL", 0.01)
+    monkeypatch.setattr("fichero.pool.RECONNECT_BACKOFF", 0.01)
+
+
+def _sim(name: str, bandwidth: float = 0) -> dict:
+    sim = SimulatedPrinter("classic", bandwidth=bandwidth, latency=0, rows_per_second=1e6)
+    return {"address": name, "simulate": sim}
+
+
+LABEL = bytes(12 * 240)
+
+
+class TestParseTarget:
+    def test_forms(self):
+        assert parse_target("AA:BB") == {"address": "AA:BB"}
+        assert parse_target("classic:AA:BB@3") == {"address": "AA:BB", "classic": True,
+                                                   "channel": 3}
+        assert parse_target("sim:one")["simulate"] is True
+
+
+class TestPool:
+    @pytest.mark.asyncio
+    async def test_spreads_labels_and_counts(self):
+        a, b = _sim("a"), _sim("b")
+        async with PrinterPool([a, b]) as pool:
+            used = await pool.print_all([LABEL] * 8)
+            stats = pool.stats()
+        assert set(used) == {"a", "b"}
+        assert len(a["simulate"].rasters) + len(b["simulate"].rasters) == 8
+        assert stats["printed"] == 8
+        assert stats["labels_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_faster_printer_takes_more(self):
+        fast, slow = _sim("fast", bandwidth=1_000_000), _sim("slow", bandwidth=50_000)
+        async with PrinterPool([fast, slow]) as pool:
+            used = await pool.print_all([LABEL] * 12)
+        assert used.count("fast") > used.count("slow")
+
+    @pytest.mark.asyncio
+    async def test_fault_moves_queue_to_healthy_printer(self):
+        a, b = _sim("a"), _sim("b")
+        async with PrinterPool([a, b]) as pool:
+            b["simulate"].cover_open = True
+            used = await pool.print_all([LABEL] * 6)
+            assert not pool.stats()["printers"]["b"]["healthy"]
+        assert used == ["a"] * 6
+
+    @pytest.mark.asyncio
+    async def test_link_loss_moves_unsent_labels_only(self):
+        class FlakySim(SimulatedPrinter):
+            async def write_gatt_char(self, uuid, data, response=False):
+                if self.form_feeds >= 1:
+                    raise PrinterError("link lost")
+                await super().write_gatt_char(uuid, data, response)
+
+        flaky = {"address": "flaky", "simulate": FlakySim("classic", bandwidth=0, latency=0)}
+        ok = _sim("ok", bandwidth=200_000)  # slower, so flaky gets work first
+        async with PrinterPool([flaky, ok]) as pool:
+            with pytest.raises(PrinterError, match="may have printed"):
+                await pool.print_all([LABEL] * 6)
+            stats = pool.stats()["printers"]
+        assert stats["flaky"]["error"] == "link lost"
+        assert (stats["flaky"]["printed"], stats["flaky"]["uncertain"]) == (1, 1)
+        assert len(ok["simulate"].rasters) == 4  # the interrupted label is not sent again
+
+    @pytest.mark.asyncio
+    async def test_fault_after_raster_is_not_reprinted(self):
+        a, b = _sim("a"), _sim("b", bandwidth=200_000)  # b slower, so a gets work first
+        sim = a["simulate"]
+        raster = sim._raster
+
+        def cover_opens(cmd: bytes) -> None:
+            raster(cmd)
+            if len(sim.rasters) == 1:
+                sim.cover_open = True  # reported by the settle query after the raster
+
+        sim._raster = cover_opens
+        async with PrinterPool([a, b]) as pool:
+            with pytest.raises(PrinterError, match="may have printed"):
+                await pool.print_all([LABEL] * 6)
+            stats = pool.stats()["printers"]
+        assert stats["a"]["uncertain"] == 1 and "cover" in stats["a"]["error"].lower()
+        assert len(sim.rasters) == 1
+        assert len(b["simulate"].rasters) == 5  # the label on a's paper is not sent again
+
+    @pytest.mark.asyncio
+    async def test_lost_link_reconnects(self):
+        a, b = _sim("a"), _sim("b", bandwidth=50_000)
+        sim = a["simulate"]
+        raster = sim._raster
+
+        def drop_once(cmd: bytes) -> None:
+            raster(cmd)
+            if len(sim.rasters) == 2:
+                sim.drop_link()
+
+        sim._raster = drop_once
+        async with PrinterPool([a, b]) as pool:
+            with pytest.raises(PrinterError, match="may have printed"):
+                await pool.print_all([LABEL] * 12)
+            stats = pool.stats()["printers"]
+        assert stats["a"]["uncertain"] == 1 and stats["a"]["error"] is None
+        assert len(sim.rasters) > 2  # back at work after reconnecting
+        assert len(sim.rasters) + len(b["simulate"].rasters) == 12  # nothing printed twice
+
+    @pytest.mark.asyncio
+    async def test_unreachable_printer_skipped(self):
+        dead = _sim("dead")
+        dead["simulate"].no_paper = True
+        async with PrinterPool([dead, _sim("ok")]) as pool:
+            assert await pool.print_all([LABEL] * 2) == ["ok", "ok"]
+
+    @pytest.mark.asyncio
+    async def test_no_printer_available(self):
+        dead = _sim("dead")
+        dead["simulate"].no_paper = True
+        with pytest.raises(PrinterError, match="No printer"):
+            async with PrinterPool([dead]):
+                pass
@@ -0,0 +1,150 @@
+"""Tests for the single-session multi-label print job."""
+
+import asyncio
+
+import pytest
+
+from fichero.printer import PrinterNotReady, PrinterTimeout, connect, raster_header
+from fichero.simulator import SimulatedPrinter
+
+
+@pytest.fixture
+def no_delays(monkeypatch):
+    for name in ("DELAY_AFTER_DENSITY", "DELAY_COMMAND_GAP", "DELAY_RASTER_SETTLE",
+                 "DELAY_AFTER_FEED", "DELAY_NOTIFY_EXTRA"):
+        monkeypatch.setattr(f"fichero.printer.{name}", 0)
+
+
+def _sim() -> SimulatedPrinter:
+    return SimulatedPrinter(bandwidth=0, latency=0, rows_per_second=1e6)
+
+
+class TestRasterHeader:
+    def test_layout(self):
+        assert raster_header(240) == bytes([0x1D, 0x76, 0x30, 0, 12, 0, 0xF0, 0x00])
+        assert raster_header(0x1234, mode=2)[3:] == bytes([2, 12, 0, 0x34, 0x12])
+
+    @pytest.mark.parametrize("rows", [0, 0x10000])
+    def test_out_of_range(self, rows):
+        with pytest.raises(ValueError):
+            raster_header(rows)
+
+
+class TestPrintJob:
+    @pytest.mark.asyncio
+    async def test_setup_once_feed_per_label_one_stop(self, no_delays):
+        sim = _sim()
+        labels = [bytes([i]) * 12 * 10 for i in range(3)]
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_job(labels, density=2, paper=1)
+        assert [data for _, data, _ in sim.rasters] == labels
+        assert sim.form_feeds == 3
+        assert (sim.density, sim.paper) == (2, 1)
+        sent = [c[:4] for c in sim.commands]
+        assert sent.count(bytes([0x10, 0xFF, 0xFE, 0x01])) == 1
+        assert sent.count(bytes([0x10, 0xFF, 0xFE, 0x45])) == 1
+        assert sent.count(bytes([0x10, 0xFF, 0x84, 0x01])) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_iterable(self, no_delays):
+        sim = _sim()
+
+        async def gen():
+            for _ in range(2):
+                yield bytes(24)
+
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_job(gen())
+        assert len(sim.rasters) == 2
+
+    @pytest.mark.asyncio
+    async def test_not_ready(self, no_delays):
+        sim = _sim()
+        sim.no_paper = True
+        async with connect(simulate=sim) as pc:
+            with pytest.raises(PrinterNotReady):
+                await pc.print_job([bytes(12)])
+        assert sim.rasters == []
+
+    @pytest.mark.asyncio
+    async def test_rejects_partial_rows(self, no_delays):
+        async with connect(simulate=_sim()) as pc:
+            with pytest.raises(ValueError, match="multiple of 12"):
+                await pc.print_job([bytes(13)])
+
+
+class TestPrintBanner:
+    @pytest.mark.asyncio
+    async def test_bands_form_one_label(self, no_delays):
+        sim = _sim()
+        bands = [bytes([i + 1]) * 12 * 64 for i in range(5)]
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_banner(iter(bands), paper=2)
+        assert len(sim.rasters) == 5
+        assert bytes(sim.printed) == b"".join(bands)
+        assert sim.form_feeds == 1
+        assert sim.paper == 2
+
+
+class TestPacing:
+    @pytest.mark.asyncio
+    async def test_status_pacing_beats_fixed_budget(self, monkeypatch):
+        monkeypatch.setattr("fichero.printer.DELAY_NOTIFY_EXTRA", 0)
+        sim = _sim()
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_job([bytes(24)] * 2, density=1)
+            summary = pc.pacing_summary()
+        assert len(sim.rasters) == 2
+        assert pc.labels_printed == 2
+        assert summary["phases"]["settle"]["count"] == 2
+        assert summary["waited"] < summary["budget"] / 10
+        assert summary["saved_per_label"] > 0
+
+    @pytest.mark.asyncio
+    async def test_fixed_pacing_sleeps_full_budget(self):
+        async with connect(simulate=_sim()) as pc:
+            pc.pacing = "fixed"
+            waited = await pc.wait_phase("settle", 0.05)
+        assert waited >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_short_budget_still_waits_for_reply(self):
+        sim = SimulatedPrinter("ble", bandwidth=0, latency=0.03)
+        async with connect(simulate=sim) as pc:
+            waited = await pc.wait_phase("enable", 0.01)
+            assert waited >= 0.03  # the reply, not the 10 ms budget
+            assert not pc._waiters  # nothing left to swallow a later reply
+
+    @pytest.mark.asyncio
+    async def test_settle_polls_while_printing(self):
+        sim = _sim()
+        async with connect(simulate=sim) as pc:
+            loop = asyncio.get_running_loop()
+            sim._head_busy_until = loop.time() + 0.15
+            waited = await pc.wait_phase("settle", 0.5)
+            assert 0.15 <= waited < 0.3
+            sim._head_busy_until = loop.time() + 1.0
+            waited = await pc.wait_phase("settle", 0.1)
+            assert 0.1 <= waited < 0.2
+
+    @pytest.mark.asyncio
+    async def test_no_reply_falls_back_to_budget(self, monkeypatch):
+        async def silent(timeout=2.0):
+            raise PrinterTimeout("no reply")
+
+        async with connect(simulate=_sim()) as pc:
+            monkeypatch.setattr(pc, "get_status", silent)
+            assert await pc.wait_phase("settle", 0.05) >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_fault_mid_job_raises(self, monkeypatch):
+        monkeypatch.setattr("fichero.printer.DELAY_NOTIFY_EXTRA", 0)
+        sim = _sim()
+        async with connect(simulate=sim) as pc:
+            sim.cover_open = True
+            with pytest.raises(PrinterNotReady, match="cover open"):
+                await pc.wait_phase("settle", 0.5)
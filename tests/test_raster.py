@@ -0,0 +1,89 @@
+"""Tests for the wire-size raster optimizer."""
+
+import random
+
+import pytest
+
+from fichero.printer import BYTES_PER_ROW, connect, raster_header
+from fichero.raster import DOUBLE, FEED, RAW, encode_raster, plan_raster
+from fichero.simulator import SimulatedPrinter
+
+ROW = BYTES_PER_ROW
+WHITE = bytes(ROW)
+
+
+async def _printed(stream: bytes) -> bytes:
+    """Feed *stream* to an enabled simulator and return what it put on paper."""
+    sim = SimulatedPrinter(bandwidth=0, latency=0, rows_per_second=1e6)
+    async with sim:
+        sim.enabled = True
+        await sim.write_gatt_char(None, stream)
+    return bytes(sim.printed)
+
+
+def _row(seed: int) -> bytes:
+    return random.Random(seed).randbytes(ROW)
+
+
+class TestPlan:
+    def test_white_margins_become_feeds(self):
+        raster = WHITE * 50 + _row(1) + WHITE * 40
+        assert plan_raster(raster) == [(FEED, 0, 50), (RAW, 50, 1), (FEED, 51, 40)]
+
+    def test_long_white_run_split_at_255(self):
+        assert [p for _, _, p in plan_raster(WHITE * 600)] == [255, 255, 90]
+
+    def test_doubled_rows_use_double_height(self):
+        raster = b"".join(_row(i) * 2 for i in range(20))
+        assert plan_raster(raster) == [(DOUBLE, 0, 40)]
+        assert len(encode_raster(raster)) == 8 + 20 * ROW
+
+    def test_distinct_rows_stay_one_block(self):
+        raster = _row(1) + _row(2) + _row(3)
+        assert plan_raster(raster) == [(RAW, 0, 3)]
+        assert encode_raster(raster) == raster_header(3) + raster
+
+    def test_rejects_partial_rows(self):
+        with pytest.raises(ValueError, match="multiple of 12"):
+            plan_raster(bytes(13))
+
+
+class TestEncode:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("seed", range(5))
+    async def test_prints_identically_and_never_larger(self, seed):
+        rng = random.Random(seed)
+        rows = []
+        while len(rows) < 240:
+            kind = rng.choice(["white", "pair", "noise"])
+            n = rng.randint(1, 30)
+            if kind == "white":
+                rows += [WHITE] * n
+            elif kind == "pair":
+                r = _row(rng.random())
+                rows += [r, r]
+            else:
+                rows += [_row(rng.random()) for _ in range(n)]
+        raster = b"".join(rows)
+        stream = encode_raster(raster)
+        assert await _printed(stream) == raster
+        assert len(stream) <= len(raster_header(len(rows)) + raster)
+
+    @pytest.mark.asyncio
+    async def test_all_white(self):
+        raster = WHITE * 240
+        assert encode_raster(raster) == bytes([0x1B, 0x4A, 240])
+        assert await _printed(encode_raster(raster)) == raster
+
+    @pytest.mark.asyncio
+    async def test_print_job_compact(self, monkeypatch):
+        for name in ("DELAY_AFTER_DENSITY", "DELAY_COMMAND_GAP", "DELAY_RASTER_SETTLE",
+                     "DELAY_AFTER_FEED", "DELAY_NOTIFY_EXTRA"):
+            monkeypatch.setattr(f"fichero.printer.{name}", 0)
+        sim = SimulatedPrinter(bandwidth=0, latency=0, rows_per_second=1e6)
+        raster = WHITE * 100 + _row(7) * 40 + WHITE * 100
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_job([raster, raster], compact=True)
+        assert bytes(sim.printed) == raster * 2
+        assert sim.bytes_received < len(raster)
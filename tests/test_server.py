@@ -0,0 +1,132 @@
+"""Tests for the print daemon."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from fichero.printer import PrinterStatus
+from fichero.server import PrintServer, serve, submit
+
+
+def _fake_pc():
+    pc = MagicMock()
+    pc.get_status = AsyncMock(return_value=PrinterStatus(0))
+    return pc
+
+
+class TestPrintServer:
+    @pytest.mark.asyncio
+    async def test_jobs_print_in_order_over_one_connection(self, tmp_path):
+        pc = _fake_pc()
+        connects = 0
+        printed = []
+        release = asyncio.Event()
+
+        @asynccontextmanager
+        async def fake_connect(*a, **kw):
+            nonlocal connects
+            connects += 1
+            yield pc
+
+        async def fake_print_raster(raster, density, paper=0, copies=1):
+            printed.append((len(raster), density, paper, copies))
+            await release.wait()  # hold the printer so later jobs queue up behind
+            return True
+
+        pc.print_raster = fake_print_raster
+        server = PrintServer(keepalive=0.05)
+        sock = str(tmp_path / "f.sock")
+        with patch("fichero.server.connect", fake_connect):
+            task = asyncio.create_task(serve(server, path=sock))
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                try:
+                    status = await submit({"op": "status"}, path=sock)
+                    break
+                except OSError:
+                    continue
+            assert status["ok"]
+
+            jobs = [{"text": "one", "copies": 2, "paper": "continuous"},
+                    {"text": "two", "density": 0}, {"text": "three", "density": 1}]
+            replies = [asyncio.create_task(submit(jobs[0], path=sock))]
+            while not printed:
+                await asyncio.sleep(0.01)
+            for job in jobs[1:]:  # queued one at a time, so arrival order is known
+                queued = server._queue.qsize()
+                replies.append(asyncio.create_task(submit(job, path=sock)))
+                while server._queue.qsize() == queued:
+                    await asyncio.sleep(0.01)
+            release.set()
+            assert await asyncio.gather(*replies) == [{"ok": True}] * 3
+            bad = await submit({"text": "x", "density": 9}, path=sock)
+            assert not bad["ok"] and "density" in bad["error"]
+
+            await asyncio.sleep(0.1)  # idle long enough for a keepalive poll
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert connects == 1
+        assert printed == [(2880, 2, 2, 2), (2880, 0, 0, 1), (2880, 1, 0, 1)]
+        assert pc.get_status.await_count >= 2
+
+    @pytest.mark.asyncio
+    async def test_reconnects_and_keeps_unsent_job(self):
+        attempts = 0
+        printed = []
+
+        @asynccontextmanager
+        async def flaky_connect(*a, **kw):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise OSError("link down")
+            pc = _fake_pc()
+            pc.print_raster = fake_print_raster
+            yield pc
+
+        async def fake_print_raster(raster, density, paper=0, copies=1):
+            printed.append(copies)
+            return True
+
+        server = PrintServer()
+        with (
+            patch("fichero.server.connect", flaky_connect),
+            patch("fichero.server.RECONNECT_MIN", 0.01),
+        ):
+            runner = asyncio.create_task(server.run_printer())
+            reply = await asyncio.wait_for(server.submit({"text": "hi", "copies": 3}), 5)
+            runner.cancel()
+
+        assert reply == {"ok": True}
+        assert attempts == 2
+        assert printed == [3]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_submit_is_not_printed(self):
+        printed = []
+        pc = _fake_pc()
+
+        async def fake_print_raster(raster, density, paper=0, copies=1):
+            printed.append(copies)
+            return True
+
+        @asynccontextmanager
+        async def fake_connect(*a, **kw):
+            yield pc
+
+        pc.print_raster = fake_print_raster
+        server = PrintServer()
+        gone = asyncio.create_task(server.submit({"text": "gone", "copies": 2}))
+        await asyncio.sleep(0)
+        gone.cancel()
+        with patch("fichero.server.connect", fake_connect):
+            runner = asyncio.create_task(server.run_printer())
+            reply = await asyncio.wait_for(server.submit({"text": "kept"}), 5)
+            runner.cancel()
+
+        assert reply == {"ok": True}
+        assert printed == [1]
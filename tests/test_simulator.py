@@ -0,0 +1,114 @@
+"""Tests for the simulated printer transport."""
+
+import asyncio
+
+import pytest
+
+from fichero.printer import PrinterClient, connect
+from fichero.simulator import SimulatedPrinter
+
+
+def _fast(**kw) -> SimulatedPrinter:
+    kw.setdefault("bandwidth", 0)
+    kw.setdefault("latency", 0)
+    kw.setdefault("rows_per_second", 1e6)
+    return SimulatedPrinter(**kw)
+
+
+class TestQueries:
+    @pytest.mark.asyncio
+    async def test_info_round_trips(self):
+        async with connect(simulate=_fast()) as pc:
+            assert await pc.get_model() == "D11s"
+            assert await pc.get_firmware() == "2.4.6"
+            assert await pc.get_battery() == 86
+            assert await pc.get_shutdown_time() == 20
+            assert str(await pc.get_status()) == "ready"
+            assert (await pc.get_all_info())["firmware"] == "2.4.6"
+
+    @pytest.mark.asyncio
+    async def test_settings_apply(self):
+        sim = _fast()
+        async with connect(simulate=sim) as pc:
+            assert await pc.set_density(2)
+            assert await pc.set_paper_type(2)
+            assert await pc.set_shutdown_time(300)
+            assert await pc.get_shutdown_time() == 300
+        assert (sim.density, sim.paper) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_status_bits(self):
+        sim = _fast(battery=10)
+        sim.cover_open = True
+        async with connect(simulate=sim) as pc:
+            status = await pc.get_status()
+        assert status.cover_open and status.low_battery and not status.ok
+
+    @pytest.mark.asyncio
+    async def test_fragmented_notifications_reassemble(self):
+        sim = _fast(latency=0.001)
+        sim.notify_size = 5
+        async with connect(simulate=sim) as pc:
+            info = await pc.get_all_info()
+        assert info["bt_name"] == "FICHERO_SIM"
+        assert info["battery"] == "86%"
+
+
+class TestPrinting:
+    @staticmethod
+    async def _print(pc: PrinterClient, raster: bytes) -> bool:
+        await pc.wakeup()
+        await pc.enable()
+        rows = len(raster) // 12
+        await pc.send_chunked(bytes([0x1D, 0x76, 0x30, 0, 12, 0, rows & 0xFF, rows >> 8]) + raster)
+        await pc.form_feed()
+        return await pc.stop_print()
+
+    @pytest.mark.asyncio
+    async def test_raster_split_across_chunks(self):
+        sim = _fast()
+        raster = bytes(range(240)) * 12
+        async with connect(simulate=sim) as pc:
+            pc.chunk_size, pc.chunk_gap, pc._gap = 7, 0.0, 0.0  # straddle writes
+            assert await self._print(pc, raster)
+        assert sim.rasters == [(240, raster, 0)]
+        assert sim.form_feeds == 1
+
+    @pytest.mark.asyncio
+    async def test_raster_without_enable_is_ignored(self):
+        sim = _fast()
+        async with connect(simulate=sim) as pc:
+            await pc.send_chunked(bytes([0x1D, 0x76, 0x30, 0, 12, 0, 1, 0]) + bytes(12))
+            await asyncio.sleep(0)
+        assert sim.rasters == []
+
+    @pytest.mark.asyncio
+    async def test_error_frame_when_out_of_paper(self):
+        sim = _fast()
+        sim.no_paper = True
+        async with connect(simulate=sim) as pc:
+            await pc.enable()
+            r = await pc.send(bytes([0x1D, 0x76, 0x30, 0, 12, 0, 1, 0]) + bytes(12), wait=True)
+        assert r == b"\xff\x04"
+        assert sim.rasters == []
+
+    @pytest.mark.asyncio
+    async def test_stop_waits_for_print_head(self):
+        sim = _fast(rows_per_second=2400)  # 240 rows + feed ~= 0.11 s
+        loop = asyncio.get_running_loop()
+        async with connect(simulate=sim) as pc:
+            t0 = loop.time()
+            assert await self._print(pc, bytes(2880))
+            assert loop.time() - t0 >= 0.1
+            assert not (await pc.get_status()).printing
+
+    @pytest.mark.asyncio
+    async def test_bandwidth_model(self):
+        sim = _fast(bandwidth=100_000)
+        loop = asyncio.get_running_loop()
+        async with connect(simulate=sim) as pc:
+            pc.chunk_gap = pc._gap = 0.0
+            t0 = loop.time()
+            await pc.send_chunked(bytes(10_000))
+            assert loop.time() - t0 >= 0.1
+        assert sim.bytes_received == 10_000
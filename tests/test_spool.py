@@ -0,0 +1,75 @@
+"""Tests for spool files: compile once, replay without rendering."""
+
+import numpy as np
+import pytest
+
+from fichero.printer import PAPER_CONTINUOUS, connect
+from fichero.simulator import SimulatedPrinter
+from fichero.spool import Spool, SpoolWriter, packbits, unpackbits
+
+NOISE = np.random.default_rng(0).integers(0, 256, 12 * 40, dtype=np.uint8).tobytes()
+LABELS = [bytes(12 * 240), NOISE, b"\xff" * 12 * 8 + bytes(12 * 100), bytes(12 * 240)]
+
+
+def _write(path, labels=LABELS, **kw) -> None:
+    with SpoolWriter(path, **kw) as out:
+        for label in labels:
+            out.add(label)
+
+
+class TestPackBits:
+    @pytest.mark.parametrize("data", [b"", b"a", b"aa", b"aaab", bytes(300), NOISE,
+                                      b"ab" * 100 + bytes(129) + b"x"])
+    def test_round_trip(self, data):
+        assert unpackbits(packbits(data), len(data)) == data
+
+    def test_white_rows_shrink(self):
+        assert len(packbits(bytes(12 * 240))) == 2 * 23
+
+    def test_wrong_size_rejected(self):
+        with pytest.raises(ValueError, match="Corrupt"):
+            unpackbits(packbits(bytes(100)), 99)
+
+
+class TestSpool:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "job.spool"
+        _write(path, density=1, paper=PAPER_CONTINUOUS, compact=True)
+        with Spool(path) as spool:
+            assert [bytes(label) for label in spool] == LABELS
+            assert (spool.density, spool.paper, spool.compact) == (1, PAPER_CONTINUOUS, True)
+            stats = spool.stats()
+        assert stats["labels"] == 4 and stats["unique"] == 3 and stats["rle"] == 2
+        assert stats["file_bytes"] < sum(map(len, LABELS)) // 4
+
+    def test_raw_labels_are_views_of_the_map(self, tmp_path):
+        path = tmp_path / "job.spool"
+        _write(path, rle=False)
+        with Spool(path) as spool:
+            assert spool.density is None
+            assert all(isinstance(label, memoryview) for label in spool)
+            assert spool[1] == NOISE
+
+    def test_rejects_bad_files(self, tmp_path):
+        path = tmp_path / "job.spool"
+        _write(path)
+        data = path.read_bytes()
+        for bad in (b"", b"nope" + data[4:], data[:-1]):
+            path.write_bytes(bad)
+            with pytest.raises(ValueError, match="spool"):
+                Spool(path)
+
+    def test_failed_compile_leaves_nothing(self, tmp_path):
+        with pytest.raises(ValueError, match="multiple"):
+            _write(tmp_path / "job.spool", [bytes(12), bytes(5)])
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_replay_prints_every_label(self, tmp_path):
+        path = tmp_path / "job.spool"
+        _write(path, density=2)
+        sim = SimulatedPrinter("classic", bandwidth=0, latency=0, rows_per_second=1e5)
+        with Spool(path) as spool:
+            async with connect(simulate=sim) as pc:
+                assert await pc.print_job(spool, density=spool.density, paper=spool.paper)
+        assert [data for _, data, _ in sim.rasters] == LABELS
@@ -0,0 +1,122 @@
+"""Tests for compiled label templates."""
+
+import base64
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from fichero.printer import BYTES_PER_ROW, PRINTHEAD_PX
+from fichero.template import Template, fill
+
+ROW = BYTES_PER_ROW
+
+
+def _designer_label(objects: list[dict], direction: str = "left", csv: str | None = None) -> dict:
+    data = {
+        "canvas": {"version": "6.0.0", "objects": objects},
+        "label": {"printDirection": direction, "size": {"width": 232, "height": 96}},
+    }
+    if csv is not None:
+        data["csv"] = {"data": csv}
+    return data
+
+
+def _text(text: str, left: int = 4, top: int = 4, **kw) -> dict:
+    obj = {"type": "Textbox", "left": left, "top": top, "width": 200, "height": 30,
+           "text": text, "fontSize": 24, "fontFamily": "Noto Sans"}
+    obj.update(kw)
+    return obj
+
+
+def _rows(raster: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(raster, dtype=np.uint8).reshape(-1, ROW), axis=1)
+
+
+class TestFill:
+    def test_known_and_unknown_names(self):
+        assert fill("SKU {sku} {missing}", {"sku": 42}) == "SKU 42 {missing}"
+
+    def test_date_filter(self):
+        out = fill("{dt|YYYY-MM-DD}", {})
+        assert len(out) == 10 and out[4] == out[7] == "-"
+
+
+class TestDesigner:
+    def test_parses_size_and_direction(self):
+        tpl = Template.from_designer(_designer_label([_text("Hello")]))
+        assert tpl.rows == 232
+        assert len(tpl.render()) == 232 * ROW
+        assert tpl.fields == []
+
+        top = Template.from_designer(_designer_label([], direction="top"))
+        assert top.scale == PRINTHEAD_PX / 232
+        assert len(top.render()) == top.rows * ROW
+
+    def test_reads_file_and_saved_csv(self, tmp_path):
+        path = tmp_path / "label.json"
+        path.write_text(json.dumps(_designer_label([_text("{sku}")], csv="sku\nA1\nB2\n")))
+        tpl = Template.from_designer(path)
+        assert len(tpl.fields) == 1
+        assert tpl.records() == [{"sku": "A1"}, {"sku": "B2"}]
+
+    def test_missing_size_rejected(self):
+        with pytest.raises(ValueError):
+            Template.from_designer({"canvas": {"objects": []}, "label": {}})
+
+    def test_left_direction_rotates_clockwise(self):
+        # A bar along the canvas top edge ends up on the right of the print head
+        rect = {"type": "Rect", "left": 0, "top": 0, "width": 232, "height": 8,
+                "fill": "#000000", "stroke": None}
+        bits = _rows(Template.from_designer(_designer_label([rect])).render())
+        assert bits[:, -8:].all()
+        assert not bits[:, :-8].any()
+
+    def test_shapes_and_images(self):
+        img = Image.new("L", (20, 20), 0)
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        src = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+        objects = [
+            {"type": "Line", "left": 10, "top": 40, "width": 100, "height": 0, "x1": -50,
+             "y1": 0, "x2": 50, "y2": 0, "stroke": "#000", "strokeWidth": 2},
+            {"type": "Circle", "left": 150, "top": 10, "width": 40, "height": 40,
+             "radius": 20, "fill": "transparent", "stroke": "black"},
+            {"type": "Image", "left": 200, "top": 60, "width": 20, "height": 20, "src": src},
+        ]
+        bits = _rows(Template.from_designer(_designer_label(objects)).render())
+        assert bits.sum() > 20 * 20 + 100
+
+    def test_unsupported_objects_skipped(self, caplog):
+        tpl = Template.from_designer(_designer_label([{"type": "Mystery", "width": 5}]))
+        assert not _rows(tpl.render()).any()
+        assert "Mystery" in caplog.text
+
+
+class TestRender:
+    @pytest.mark.parametrize("direction", ["left", "top"])
+    def test_incremental_matches_full_render(self, direction):
+        objects = [
+            _text("PRICE", top=2),
+            _text("{sku}", top=34, textAlign="center"),
+            _text("{price} EUR", left=120, top=60, textAlign="right", width=100),
+            {"type": "Rect", "left": 0, "top": 0, "width": 232, "height": 96,
+             "fill": "", "stroke": "#000", "strokeWidth": 2},
+        ]
+        tpl = Template.from_designer(_designer_label(objects, direction))
+        for record in ({"sku": "A-1", "price": "9.99"}, {"sku": "WWWWWWWW", "price": "1"}, {}):
+            assert tpl.render(record) == tpl.render_full(record)
+
+    def test_only_variable_rows_change(self):
+        tpl = Template.from_designer(_designer_label([_text("STATIC", left=4),
+                                                      _text("{n}", left=120, width=60)]))
+        a, b = _rows(tpl.render({"n": 1})), _rows(tpl.render({"n": 7}))
+        changed = np.flatnonzero((a != b).any(axis=1))
+        assert changed.size and changed.min() >= 120 and changed.max() < 180
+        assert (a[:120] == _rows(tpl.compile())[:120]).all()
+
+    def test_field_clipped_to_label(self):
+        tpl = Template.from_designer(_designer_label([_text("{n}", left=220, top=80)]))
+        assert tpl.render({"n": "XXXXXXXX"}) == tpl.render_full({"n": "XXXXXXXX"})
@@ -0,0 +1,97 @@
+"""Tests for thermal-aware pacing."""
+
+import math
+
+import pytest
+
+from fichero.printer import PrinterNotReady, connect
+from fichero.simulator import SimulatedPrinter
+from fichero.thermal import (
+    DENSITY_HEAT,
+    HeatModel,
+    ThermalScheduler,
+    black_dots,
+    label_heat,
+)
+
+BLACK = b"\xff" * 12 * 240  # a fully black 30 mm label
+TAU = 0.3
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr("fichero.thermal.COOL_POLL", 0.02)
+
+
+def _hot_sim() -> SimulatedPrinter:
+    """Trips after two black labels in quick succession."""
+    return SimulatedPrinter("classic", bandwidth=0, latency=0, rows_per_second=1e5,
+                            heat_limit=2.5 * label_heat(BLACK, 2), heat_tau=TAU)
+
+
+class TestHeatModel:
+    def test_decay(self):
+        model = HeatModel(tau=2.0)
+        model.add(100.0, now=10.0)
+        assert model.level(12.0) == pytest.approx(100 * math.exp(-1))
+
+    def test_pause_fills_to_target(self):
+        model = HeatModel(tau=1.0)
+        model.add(80.0, now=0.0)
+        pause = model.pause_for(50.0, now=0.0, target=100.0)
+        assert model.level(pause) + 50 == pytest.approx(100.0)
+        assert model.pause_for(10.0, now=0.0, target=100.0) == 0.0
+
+    def test_black_dots(self):
+        assert black_dots(b"\x0f\x01") == 5
+        assert label_heat(BLACK, 0) == 96 * 240 * DENSITY_HEAT[0]
+
+
+class TestScheduler:
+    @pytest.mark.asyncio
+    async def test_job_dies_without_scheduler(self):
+        async with connect(simulate=_hot_sim()) as pc:
+            with pytest.raises(PrinterNotReady, match="overheated"):
+                await pc.print_job([BLACK] * 6, density=2)
+
+    @pytest.mark.asyncio
+    async def test_pauses_keep_job_alive(self):
+        sim = _hot_sim()
+        thermal = ThermalScheduler(model=HeatModel(tau=TAU, limit=sim.heat.limit))
+        async with connect(simulate=sim) as pc:
+            pc.thermal = thermal
+            assert await pc.print_job([BLACK] * 6, density=2)
+        assert len(sim.rasters) == 6
+        assert thermal.trips == 0 and thermal.pauses >= 3
+
+    @pytest.mark.asyncio
+    async def test_overheat_is_waited_out_and_learned(self):
+        sim = _hot_sim()
+        thermal = ThermalScheduler(model=HeatModel(tau=TAU, limit=10 * sim.heat.limit))
+        async with connect(simulate=sim) as pc:
+            pc.thermal = thermal
+            assert await pc.print_job([BLACK] * 6, density=2)
+        assert len(sim.rasters) == 6
+        assert thermal.trips >= 1
+        assert thermal.model.limit < 10 * sim.heat.limit
+
+    @pytest.mark.asyncio
+    async def test_lowers_density_within_limit(self):
+        sim = _hot_sim()
+        thermal = ThermalScheduler(min_density=1, max_pause=0.0,
+                                   model=HeatModel(tau=TAU, limit=sim.heat.limit))
+        async with connect(simulate=sim) as pc:
+            pc.thermal = thermal
+            assert await pc.print_job([BLACK] * 4, density=2)
+        assert thermal.lowered >= 1
+        densities = {c[4] for c in sim.commands if c[:3] == bytes([0x10, 0xFF, 0x10])}
+        assert densities == {1, 2}
+
+    @pytest.mark.asyncio
+    async def test_other_faults_still_raise(self):
+        sim = _hot_sim()
+        sim.overheated = sim.no_paper = True
+        async with connect(simulate=sim) as pc:
+            pc.thermal = ThermalScheduler()
+            with pytest.raises(PrinterNotReady, match="no paper"):
+                await pc.print_job([BLACK])
@@ -0,0 +1,89 @@
+"""Tests for per-phase print tracing."""
+
+import json
+
+import pytest
+
+from fichero.printer import command_name, connect
+from fichero.simulator import SimulatedPrinter
+from fichero.trace import Tracer, span
+
+
+def _sim() -> SimulatedPrinter:
+    return SimulatedPrinter(bandwidth=0, latency=0, rows_per_second=1e6)
+
+
+class TestSpan:
+    def test_no_hook_is_a_no_op(self):
+        with span(None, "x", "render") as ev:
+            ev["bytes"] = 1
+
+    def test_records_args_and_errors(self):
+        tracer = Tracer()
+        with pytest.raises(ValueError):
+            with span(tracer, "x", "render", n=1) as ev:
+                ev["bytes"] = 4
+                raise ValueError
+        (event,) = tracer.events
+        assert event["args"] == {"n": 1, "bytes": 4, "error": "ValueError"}
+        assert event["end"] >= event["start"]
+
+
+def test_command_names():
+    assert command_name(bytes([0x10, 0xFF, 0x40])) == "status"
+    assert command_name(bytes([0x10, 0xFF, 0xFE, 0x45])) == "stop"
+    assert command_name(bytes([0x10, 0xFF, 0xFE, 0x01])) == "enable"
+    assert command_name(b"\x99\x01") == "9901"
+
+
+class TestPrintTrace:
+    @pytest.mark.asyncio
+    async def test_phases_bytes_and_summary(self):
+        tracer = Tracer()
+        labels = [bytes(12 * 40)] * 3
+        async with connect(simulate=_sim(), trace=tracer) as pc:
+            pc.chunk_gap = pc._gap = 0
+            assert await pc.print_job(labels, density=1)
+        names = {(e["cat"], e["name"]) for e in tracer.events}
+        assert {("link", "connect"), ("job", "start_job"), ("job", "label"),
+                ("transfer", "send_chunked"), ("wait", "settle"), ("cmd", "send")} <= names
+        transfers = [e for e in tracer.events if e["cat"] == "transfer"]
+        assert [e["args"]["bytes"] for e in transfers] == [8 + 12 * 40] * 3
+        stop = [e for e in tracer.events if e["args"].get("cmd") == "stop"]
+        assert len(stop) == 1 and stop[0]["args"]["reply"] >= 1
+
+        summary = tracer.summary()
+        assert summary["labels"] == 3
+        assert summary["bytes_per_second"] > 0
+        assert summary["phases"]["cmd:form_feed"]["count"] == 3
+        assert summary["bytes_sent"] >= 3 * (8 + 12 * 40)
+
+    @pytest.mark.asyncio
+    async def test_untraced_client_records_nothing(self):
+        async with connect(simulate=_sim()) as pc:
+            assert pc.trace is None
+            await pc.get_status()
+
+
+class TestWrite:
+    def _tracer(self) -> Tracer:
+        tracer = Tracer()
+        tracer({"name": "connect", "cat": "link", "start": 10.0, "end": 10.5, "args": {}})
+        tracer({"name": "send", "cat": "cmd", "start": 10.5, "end": 10.75,
+                "args": {"cmd": "status", "bytes": 3}})
+        return tracer
+
+    def test_json_lines(self, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        self._tracer().write(str(path))
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [(e["name"], e["start"], e["end"]) for e in lines] == [
+            ("connect", 0.0, 0.5), ("send", 0.5, 0.75)]
+
+    def test_chrome(self, tmp_path):
+        path = tmp_path / "trace.json"
+        self._tracer().write(str(path), "chrome")
+        events = json.loads(path.read_text())["traceEvents"]
+        assert events[1]["ph"] == "X"
+        assert (events[1]["ts"], events[1]["dur"]) == (500000.0, 250000.0)
+        assert events[0]["tid"] != events[1]["tid"]
@@ -0,0 +1,189 @@
+"""Tests for BLE chunk sizing, adaptive pacing and saved tuning."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from fichero.printer import (
+    CHUNK_SIZE_BLE,
+    CHUNK_SIZE_CLASSIC,
+    DELAY_CHUNK_GAP,
+    PrinterClient,
+    PrinterTimeout,
+    RFCOMMClient,
+    connect,
+    load_tuning,
+    save_tuning,
+)
+from fichero.imaging import array_to_raster
+from fichero.simulator import SimulatedPrinter
+
+
+def _ble(payload=None, mtu=None):
+    client = MagicMock(is_classic=False)
+    client.write_gatt_char = AsyncMock()
+    if payload is None:
+        client.services.get_characteristic.return_value = None
+    else:
+        client.services.get_characteristic.return_value.max_write_without_response_size = payload
+    client.mtu_size = mtu
+    return client
+
+
+class TestChunkSizing:
+    def test_uses_negotiated_payload(self):
+        pc = PrinterClient(_ble(payload=244))
+        assert pc.chunk_size == 244
+        assert pc.chunk_gap == pytest.approx(DELAY_CHUNK_GAP * 244 / CHUNK_SIZE_BLE)
+
+    def test_falls_back_to_mtu(self):
+        assert PrinterClient(_ble(mtu=185)).chunk_size == 182
+
+    def test_unnegotiated_mtu_uses_default(self):
+        pc = PrinterClient(_ble(mtu=23))
+        assert pc.chunk_size == CHUNK_SIZE_BLE
+        assert pc.chunk_gap == DELAY_CHUNK_GAP
+
+    def test_classic(self):
+        pc = PrinterClient(RFCOMMClient("AA"))
+        assert (pc.chunk_size, pc.chunk_gap) == (CHUNK_SIZE_CLASSIC, 0.0)
+
+    def test_explicit_tuning_wins(self):
+        pc = PrinterClient(_ble(payload=244), chunk_size=100, chunk_gap=0.0)
+        assert (pc.chunk_size, pc.chunk_gap) == (100, 0.0)
+
+
+class TestAdaptivePacing:
+    @pytest.mark.asyncio
+    async def test_chunks_and_no_sleep_when_gap_zero(self):
+        client = _ble()
+        pc = PrinterClient(client, chunk_size=100, chunk_gap=0.0)
+        with patch("fichero.printer.asyncio.sleep", AsyncMock()) as sleep:
+            await pc.send_chunked(bytes(250))
+        assert [len(c.args[1]) for c in client.write_gatt_char.await_args_list] == [100, 100, 50]
+        sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_grows_gap_then_decays(self):
+        client = _ble()
+        pc = PrinterClient(client, chunk_size=10, chunk_gap=0.001)
+
+        async def slow_write(*a, **kw):
+            await asyncio.sleep(0.06)
+
+        client.write_gatt_char = AsyncMock(side_effect=slow_write)
+        await pc.send_chunked(bytes(20))
+        grown = pc._gap
+        assert grown > 0.001
+
+        client.write_gatt_char = AsyncMock()
+        with patch("fichero.printer.asyncio.sleep", AsyncMock()):
+            await pc.send_chunked(bytes(10 * 100))
+        assert pc._gap == pytest.approx(0.001)
+
+
+class TestZeroCopy:
+    @pytest.mark.asyncio
+    async def test_chunks_are_views_of_the_payload(self):
+        client = _ble()
+        pc = PrinterClient(client, chunk_size=100, chunk_gap=0.0)
+        data = bytearray(range(256)) * 2
+        await pc.send_chunked((b"HEAD", data))
+        chunks = [c.args[1] for c in client.write_gatt_char.await_args_list]
+        assert b"".join(bytes(c) for c in chunks) == b"HEAD" + data
+        assert [len(c) for c in chunks] == [100] * 5 + [16]
+        # Only the chunk straddling the header is joined; the rest share data's memory
+        assert all(isinstance(c, memoryview) and c.obj is data for c in chunks[1:])
+
+    def test_array_to_raster(self):
+        dots = np.zeros((24, 96), dtype=bool)
+        dots[3, :8] = True
+        raster = array_to_raster(dots)
+        assert len(raster) == 24 * 12 and raster[36] == 0xFF
+
+        packed = np.zeros((24, 12), dtype=np.uint8)
+        assert array_to_raster(packed).obj is packed  # already packed: no copy
+        assert bytes(array_to_raster(np.where(dots, 255, 0).astype(np.uint8))) == bytes(raster)
+        with pytest.raises(ValueError):
+            array_to_raster(np.zeros((24, 95)))
+
+    @pytest.mark.asyncio
+    async def test_print_job_accepts_arrays_and_buffers(self):
+        rng = np.random.default_rng(0)
+        dots = rng.random((48, 96)) < 0.3
+        packed = np.packbits(dots, axis=1)
+        sim = SimulatedPrinter(bandwidth=0, latency=0, rows_per_second=1e6)
+        async with connect(simulate=sim) as pc:
+            await pc.print_job([dots, packed, memoryview(packed.tobytes())])
+        assert bytes(sim.printed) == packed.tobytes() * 3
+
+
+class TestTuningPersistence:
+    def test_roundtrip(self):
+        assert load_tuning("AA") == {}
+        save_tuning("AA", firmware="2.4.6", chunk_size=244, chunk_gap=0.005)
+        save_tuning("BB", firmware="2.4.6", chunk_size=100, chunk_gap=0.01)
+        assert load_tuning("AA")["chunk_size"] == 244
+        assert load_tuning("BB")["chunk_gap"] == 0.01
+
+    def test_unwritable_cache_reports_not_saved(self, tmp_path, monkeypatch, capsys):
+        from fichero import cli
+
+        (tmp_path / "notadir").write_bytes(b"")
+        monkeypatch.setenv("FICHERO_CACHE_DIR", str(tmp_path / "notadir" / "x"))
+        assert not save_tuning("AA", chunk_size=100, chunk_gap=0.01)
+
+        monkeypatch.setattr("sys.argv", ["fichero", "--simulate", "tune", "--bytes", "240"])
+        cli.main()
+        out = capsys.readouterr().out
+        assert "not saved: chunk" in out and "kB/s" in out
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("firmware, applied", [("2.4.6", True), ("2.5.0", False)])
+    async def test_connect_applies_tuning_for_same_firmware(self, firmware, applied):
+        save_tuning("AA", firmware="2.4.6", chunk_size=150, chunk_gap=0.003)
+        client = AsyncMock()
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=None)
+        client.address = "AA"
+        client.is_classic = False
+        client.services = MagicMock()
+        with patch("fichero.printer.BleakClient", return_value=client), \
+                patch.object(PrinterClient, "get_firmware", AsyncMock(return_value=firmware)):
+            async with connect("AA") as pc:
+                assert ((pc.chunk_size, pc.chunk_gap) == (150, 0.003)) is applied
+
+
+class TestMeasureThroughput:
+    @pytest.mark.asyncio
+    async def test_timeout_returns_none_and_restores(self):
+        pc = PrinterClient(_ble(), chunk_size=200, chunk_gap=0.02)
+        with patch.object(pc, "send", AsyncMock(side_effect=PrinterTimeout("x"))):
+            assert await pc.measure_throughput(100, 0.0, nbytes=300) is None
+        assert (pc.chunk_size, pc.chunk_gap) == (200, 0.02)
+
+    @pytest.mark.asyncio
+    async def test_blank_raster_is_parsed_not_printed(self):
+        sim = SimulatedPrinter(bandwidth=0, latency=0)
+        async with connect(simulate=sim) as pc:
+            assert await pc.measure_throughput(100, 0.0, nbytes=1200)
+        assert sim.bytes_received == 8 + 1200 + 3
+        assert sim.commands[-1] == b"\x10\xff\x40" and not sim.printed
+
+    @pytest.mark.asyncio
+    async def test_lost_chunk_is_detected(self):
+        sim = SimulatedPrinter(bandwidth=0, latency=0)
+        write = sim.write_gatt_char
+        writes = 0
+
+        async def lossy_write(uuid, data, response=False):
+            nonlocal writes
+            writes += 1
+            if writes != 3:  # the link silently loses one chunk
+                await write(uuid, data, response)
+
+        sim.write_gatt_char = lossy_write
+        async with connect(simulate=sim) as pc:
+            assert await pc.measure_throughput(100, 0.0, nbytes=1200, timeout=0.1) is None